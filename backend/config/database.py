@@ -0,0 +1,152 @@
+"""
+Database engine profiles
+
+A profile turns the DB_* settings into SQLALCHEMY_ENGINE_OPTIONS and, for
+SQLite, PRAGMAs run on every new connection:
+
+- 'sqlite': WAL journal (readers don't block the writer), synchronous=NORMAL,
+  a busy timeout so concurrent writers wait instead of failing with
+  "database is locked", memory-mapped I/O and a larger page cache
+- 'server' (PostgreSQL, MySQL, ...): sized connection pool with pre-ping and
+  recycling of old connections
+- 'none': SQLAlchemy defaults
+
+DB_PROFILE=auto (default) picks 'sqlite' or 'server' from the database URI.
+"""
+
+from typing import Any, Dict
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+PROFILES = ('sqlite', 'server', 'none')
+
+
+def resolve_profile(config: Dict[str, Any]) -> str:
+    """
+    Get the profile configured for an application
+
+    Args:
+        config: Flask application config
+
+    Returns:
+        Profile name ('sqlite', 'server' or 'none')
+
+    Raises:
+        ValueError: If DB_PROFILE is not 'auto' or a known profile
+    """
+    profile = str(config.get('DB_PROFILE', 'auto')).lower()
+    if profile == 'auto':
+        backend = make_url(config['SQLALCHEMY_DATABASE_URI']).get_backend_name()
+        return 'sqlite' if backend == 'sqlite' else 'server'
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE '{profile}' (expected auto, {', '.join(PROFILES)})")
+    if profile == 'sqlite' and make_url(config['SQLALCHEMY_DATABASE_URI']).get_backend_name() != 'sqlite':
+        raise ValueError("DB_PROFILE 'sqlite' needs a sqlite:// DATABASE_URL")
+    return profile
+
+
+def sqlite_pragmas(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    PRAGMAs of the 'sqlite' profile
+
+    Args:
+        config: Flask application config
+
+    Returns:
+        Dictionary of PRAGMA name -> value, in the order they are run
+    """
+    pragmas = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(config.get('DB_BUSY_TIMEOUT', 5000)),
+        'mmap_size': int(config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        # Negative cache_size is in KiB instead of pages
+        'cache_size': -int(config.get('SQLITE_CACHE_SIZE_KB', 20000)),
+    }
+    if make_url(config['SQLALCHEMY_DATABASE_URI']).database in (None, '', ':memory:'):
+        # In-memory databases have no journal file to put in WAL mode
+        del pragmas['journal_mode']
+    return pragmas
+
+
+def configure_database(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply the database profile to an application config
+
+    Fills SQLALCHEMY_ENGINE_OPTIONS (options already set there win) and must
+    run before db.init_app.
+
+    Args:
+        config: Flask application config
+
+    Returns:
+        Description of the profile, to report and to pass to install_profile
+    """
+    profile = resolve_profile(config)
+    options: Dict[str, Any] = {}
+    info: Dict[str, Any] = {
+        'profile': profile,
+        'backend': make_url(config['SQLALCHEMY_DATABASE_URI']).get_backend_name()
+    }
+
+    if profile == 'sqlite':
+        busy_timeout = int(config.get('DB_BUSY_TIMEOUT', 5000))
+        # pysqlite waits this long for locks taken before the PRAGMA runs
+        options['connect_args'] = {'timeout': busy_timeout / 1000}
+        info['pragmas'] = sqlite_pragmas(config)
+    elif profile == 'server':
+        options.update({
+            'pool_size': int(config.get('DB_POOL_SIZE', 5)),
+            'max_overflow': int(config.get('DB_MAX_OVERFLOW', 10)),
+            'pool_timeout': int(config.get('DB_POOL_TIMEOUT', 30)),
+            'pool_recycle': int(config.get('DB_POOL_RECYCLE', 1800)),
+            'pool_pre_ping': True
+        })
+
+    user_options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if 'connect_args' in options and 'connect_args' in user_options:
+        user_options['connect_args'] = {**options['connect_args'], **user_options['connect_args']}
+    options.update(user_options)
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    info['engine_options'] = {key: value for key, value in options.items() if key != 'connect_args'}
+    return info
+
+
+def install_profile(engine: Engine, info: Dict[str, Any]):
+    """
+    Run the PRAGMAs of a profile on every new connection of an engine
+
+    Args:
+        engine: SQLAlchemy engine (db.engine)
+        info: Profile description returned by configure_database
+    """
+    pragmas = info.get('pragmas')
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def describe_profile(info: Dict[str, Any]) -> str:
+    """
+    One-line description of a profile for the startup banner
+
+    Args:
+        info: Profile description returned by configure_database
+
+    Returns:
+        Text like "sqlite (journal_mode=WAL, synchronous=NORMAL, ...)"
+    """
+    if info.get('pragmas'):
+        settings = info['pragmas']
+    else:
+        settings = info.get('engine_options', {})
+    details = ', '.join(f'{name}={value}' for name, value in settings.items())
+    return f"{info['profile']} ({details})" if details else info['profile']
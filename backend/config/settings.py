@@ -23,6 +23,10 @@ class Config:
     
     # Data Storage
     DATA_DIR = os.getenv('DATA_DIR', 'data')
+    SHEET_CACHE_SIZE = int(os.getenv('SHEET_CACHE_SIZE', '64'))
+    INVESTMENT_SUMMARY_CACHE_SIZE = int(os.getenv('INVESTMENT_SUMMARY_CACHE_SIZE', '128'))  # Projects
+    SHEET_STORE = os.getenv('SHEET_STORE', 'json')  # 'json' (files in DATA_DIR) or 'sql' (database tables)
+    SHEET_FORMAT = os.getenv('SHEET_FORMAT', 'json')  # File format of the json store: 'json' or 'binary'
     
     # Database Configuration
     SQLALCHEMY_DATABASE_URI = os.getenv(
@@ -31,6 +35,16 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = os.getenv('SQLALCHEMY_ECHO', 'False').lower() == 'true'
+    AUTO_MIGRATE = os.getenv('AUTO_MIGRATE', 'True').lower() == 'true'  # Run migrations when the development server starts (main)
+    # Engine profile (see config/database.py): 'auto', 'sqlite', 'server' or 'none'
+    DB_PROFILE = os.getenv('DB_PROFILE', 'auto')
+    DB_BUSY_TIMEOUT = int(os.getenv('DB_BUSY_TIMEOUT', '5000'))  # ms a writer waits for a locked SQLite database
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', '20000'))
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))  # seconds
     
     # CORS
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:3000,http://localhost:8000,http://localhost:5000,file://,*').split(',')
@@ -43,6 +57,16 @@ class Config:
     ENABLE_CALCULATIONS = os.getenv('ENABLE_CALCULATIONS', 'True').lower() == 'true'
     ENABLE_AUTOSAVE = os.getenv('ENABLE_AUTOSAVE', 'True').lower() == 'true'
     AUTOSAVE_INTERVAL = int(os.getenv('AUTOSAVE_INTERVAL', '30'))
+    JOURNAL_MAX_ENTRIES = int(os.getenv('JOURNAL_MAX_ENTRIES', '500'))
+    
+    # Import
+    IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '1000'))  # Rows read and saved at a time
+    IMPORT_PREVIEW_SIZE = int(os.getenv('IMPORT_PREVIEW_SIZE', '5'))  # Items returned as a preview
+    IMPORT_JOBS_DIR = os.getenv('IMPORT_JOBS_DIR', '')  # Spooled uploads (default: DATA_DIR/import_jobs)
+    IMPORT_WORKERS = int(os.getenv('IMPORT_WORKERS', '2'))  # Imports running at the same time
+    IMPORT_JOBS_PER_PROJECT = int(os.getenv('IMPORT_JOBS_PER_PROJECT', '1'))  # Queued or running per project
+    IMPORT_MAX_QUEUED = int(os.getenv('IMPORT_MAX_QUEUED', '20'))
+    IMPORT_JOB_TTL = int(os.getenv('IMPORT_JOB_TTL', '3600'))  # Seconds finished jobs are kept
     
     # Logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -60,6 +84,8 @@ class ProductionConfig(Config):
     DEBUG = False
     TESTING = False
     FLASK_DEBUG = False
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
 
 
 class TestingConfig(Config):
@@ -0,0 +1,89 @@
+"""Baseline: schema created by db.create_all before migrations were introduced
+
+Creates the projects, equipment (amounts still as text in ano0/year_values)
+and sheets/sheet_rows/sheet_cells tables as they were before the first
+migration. Databases created by db.create_all() already have them, so
+existing tables are left alone.
+
+Revision ID: 0001_baseline
+Revises: 
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'projects' not in tables:
+        op.create_table(
+            'projects',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('nome', sa.String(255), nullable=False),
+            sa.Column('primeiro_ano', sa.Integer(), nullable=False),
+            sa.Column('num_anos', sa.Integer(), nullable=False),
+            sa.Column('unidade_monetaria', sa.String(10), nullable=False),
+            sa.Column('pin', sa.String(4), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False)
+        )
+
+    if 'equipment' not in tables:
+        op.create_table(
+            'equipment',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('project_id', sa.Integer(), sa.ForeignKey('projects.id'), nullable=False),
+            sa.Column('sheet_key', sa.String(100), nullable=False),
+            sa.Column('equipment_name', sa.String(255), nullable=False),
+            sa.Column('ano0', sa.String(50), nullable=True),
+            sa.Column('year_values', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False)
+        )
+
+    if 'sheets' not in tables:
+        op.create_table(
+            'sheets',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(255), nullable=False),
+            sa.Column('meta', sa.Text(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=False)
+        )
+        op.create_index('ix_sheets_name', 'sheets', ['name'], unique=True)
+
+    if 'sheet_rows' not in tables:
+        op.create_table(
+            'sheet_rows',
+            sa.Column('sheet_id', sa.Integer(), sa.ForeignKey('sheets.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('position', sa.Integer(), primary_key=True, autoincrement=False),
+            sa.Column('row_name', sa.String(255), nullable=True)
+        )
+        op.create_index('ix_sheet_rows_sheet_row_name', 'sheet_rows', ['sheet_id', 'row_name', 'position'])
+
+    if 'sheet_cells' not in tables:
+        op.create_table(
+            'sheet_cells',
+            sa.Column('sheet_id', sa.Integer(), sa.ForeignKey('sheets.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('position', sa.Integer(), primary_key=True, autoincrement=False),
+            sa.Column('column_index', sa.Integer(), primary_key=True, autoincrement=False),
+            sa.Column('value', sa.Text(), nullable=False)
+        )
+
+
+def downgrade():
+    op.drop_table('sheet_cells')
+    op.drop_index('ix_sheet_rows_sheet_row_name', table_name='sheet_rows')
+    op.drop_table('sheet_rows')
+    op.drop_index('ix_sheets_name', table_name='sheets')
+    op.drop_table('sheets')
+    op.drop_table('equipment')
+    op.drop_table('projects')
@@ -0,0 +1,156 @@
+"""Store equipment amounts as numbers in an equipment_year_values table
+
+Converts equipment.ano0 ("1.234,56") into the numeric ano0_amount column and
+the equipment.year_values JSON text into one equipment_year_values row per
+year. Safe to run on databases already created with the new schema.
+
+Revision ID: 0002_equipment_year_values
+Revises: 0001_baseline
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+import json
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_equipment_year_values'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+
+def _parse_amount(value):
+    # Frozen copy of parse_pt_number: migrations must not change with the app
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if not isinstance(value, str):
+        return 0.0
+    cleaned = value.strip().replace(' ', '').replace('\xa0', '')
+    if ',' in cleaned or cleaned.count('.') > 1:
+        cleaned = cleaned.replace('.', '').replace(',', '.')
+    try:
+        return float(cleaned)
+    except ValueError:
+        return 0.0
+
+
+def _format_amount(value):
+    return f"{value or 0:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = inspector.get_table_names()
+
+    if 'equipment_year_values' not in tables:
+        op.create_table(
+            'equipment_year_values',
+            sa.Column('equipment_id', sa.Integer(), sa.ForeignKey('equipment.id', ondelete='CASCADE'),
+                      primary_key=True),
+            sa.Column('year', sa.Integer(), primary_key=True, autoincrement=False),
+            sa.Column('amount', sa.Numeric(18, 2), nullable=False)
+        )
+
+    columns = {column['name'] for column in inspector.get_columns('equipment')}
+    if 'ano0_amount' not in columns:
+        with op.batch_alter_table('equipment') as batch_op:
+            batch_op.add_column(sa.Column('ano0_amount', sa.Numeric(18, 2), nullable=False, server_default='0'))
+
+    legacy_columns = [name for name in ('ano0', 'year_values') if name in columns]
+    if not legacy_columns:
+        return
+
+    equipment = sa.table(
+        'equipment',
+        sa.column('id', sa.Integer),
+        sa.column('ano0', sa.String),
+        sa.column('year_values', sa.Text),
+        sa.column('ano0_amount', sa.Numeric)
+    )
+    year_values = sa.table(
+        'equipment_year_values',
+        sa.column('equipment_id', sa.Integer),
+        sa.column('year', sa.Integer),
+        sa.column('amount', sa.Numeric)
+    )
+
+    rows = bind.execute(sa.select(*[equipment.c[name] for name in ['id'] + legacy_columns])).mappings().all()
+    amount_params = []
+    year_params = []
+    for row in rows:
+        if 'ano0' in row:
+            amount_params.append({'row_id': row['id'], 'amount': _parse_amount(row['ano0'])})
+        try:
+            values = json.loads(row.get('year_values') or '{}')
+        except ValueError:
+            values = {}
+        for year, value in (values.items() if isinstance(values, dict) else []):
+            try:
+                year = int(year)
+            except (TypeError, ValueError):
+                continue
+            year_params.append({'equipment_id': row['id'], 'year': year, 'amount': _parse_amount(value)})
+
+    if amount_params:
+        bind.execute(
+            equipment.update().where(equipment.c.id == sa.bindparam('row_id'))
+            .values(ano0_amount=sa.bindparam('amount')),
+            amount_params
+        )
+    if year_params:
+        bind.execute(year_values.delete().where(
+            year_values.c.equipment_id.in_({params['equipment_id'] for params in year_params})
+        ))
+        bind.execute(year_values.insert(), year_params)
+
+    with op.batch_alter_table('equipment') as batch_op:
+        for name in legacy_columns:
+            batch_op.drop_column(name)
+
+
+def downgrade():
+    bind = op.get_bind()
+    with op.batch_alter_table('equipment') as batch_op:
+        batch_op.add_column(sa.Column('ano0', sa.String(50), nullable=True))
+        batch_op.add_column(sa.Column('year_values', sa.Text(), nullable=True))
+
+    equipment = sa.table(
+        'equipment',
+        sa.column('id', sa.Integer),
+        sa.column('ano0', sa.String),
+        sa.column('year_values', sa.Text),
+        sa.column('ano0_amount', sa.Numeric)
+    )
+    year_values = sa.table(
+        'equipment_year_values',
+        sa.column('equipment_id', sa.Integer),
+        sa.column('year', sa.Integer),
+        sa.column('amount', sa.Numeric)
+    )
+
+    values_by_equipment = {}
+    for equipment_id, year, amount in bind.execute(sa.select(
+            year_values.c.equipment_id, year_values.c.year, year_values.c.amount)):
+        values_by_equipment.setdefault(equipment_id, {})[str(year)] = _format_amount(amount)
+
+    params = [
+        {
+            'row_id': equipment_id,
+            'ano0': _format_amount(amount),
+            'year_values': json.dumps(values_by_equipment.get(equipment_id, {}))
+        }
+        for equipment_id, amount in bind.execute(sa.select(equipment.c.id, equipment.c.ano0_amount))
+    ]
+    if params:
+        bind.execute(
+            equipment.update().where(equipment.c.id == sa.bindparam('row_id'))
+            .values(ano0=sa.bindparam('ano0'), year_values=sa.bindparam('year_values')),
+            params
+        )
+
+    with op.batch_alter_table('equipment') as batch_op:
+        batch_op.drop_column('ano0_amount')
+    op.drop_table('equipment_year_values')
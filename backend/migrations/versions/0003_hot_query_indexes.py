@@ -0,0 +1,82 @@
+"""Index the hot equipment and project queries
+
+Adds the composite index used to list the equipment of a sheet in order
+(project_id, sheet_key, created_at), a unique index on projects.nome and
+indexes on projects.updated_at and created_at. Databases that already hold
+projects with the same name stop the upgrade with the list of duplicates, to
+be renamed before running it again, so the schema never differs from the
+model. Safe to run on databases created with the new schema.
+
+Revision ID: 0003_hot_query_indexes
+Revises: 0002_equipment_year_values
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+import logging
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_hot_query_indexes'
+down_revision = '0002_equipment_year_values'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+# Index name -> (table, columns)
+INDEXES = {
+    'ix_equipment_project_sheet_created': ('equipment', ['project_id', 'sheet_key', 'created_at']),
+    'ix_projects_updated_at': ('projects', ['updated_at']),
+    'ix_projects_created_at': ('projects', ['created_at']),
+}
+
+
+def _existing_indexes(inspector, table):
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = inspector.get_table_names()
+
+    for name, (table, columns) in INDEXES.items():
+        if table in tables and name not in _existing_indexes(inspector, table):
+            op.create_index(name, table, columns)
+
+    if 'projects' not in tables:
+        return
+    existing = _existing_indexes(inspector, 'projects')
+    if 'uq_projects_nome' in existing:
+        return
+
+    duplicates = bind.execute(
+        sa.text('SELECT nome, COUNT(*) FROM projects GROUP BY nome HAVING COUNT(*) > 1 ORDER BY nome')
+    ).all()
+    if duplicates:
+        listed = ', '.join(f'"{nome}" ({count}x)' for nome, count in duplicates)
+        raise RuntimeError(
+            f'projects.nome must be unique, but these names are used by more than one project: {listed}. '
+            'Rename the duplicate projects and run the upgrade again.'
+        )
+
+    if 'ix_projects_nome' in existing:
+        # Non-unique index created by an earlier version of this migration
+        logger.info('Replacing the non-unique ix_projects_nome with uq_projects_nome')
+        op.drop_index('ix_projects_nome', table_name='projects')
+    op.create_index('uq_projects_nome', 'projects', ['nome'], unique=True)
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = inspector.get_table_names()
+
+    indexes = dict(INDEXES)
+    indexes['uq_projects_nome'] = ('projects', ['nome'])
+    indexes['ix_projects_nome'] = ('projects', ['nome'])
+    for name, (table, _columns) in indexes.items():
+        if table in tables and name in _existing_indexes(inspector, table):
+            op.drop_index(name, table_name=table)
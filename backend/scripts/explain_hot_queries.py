@@ -0,0 +1,105 @@
+"""
+Script para mostrar o plano de execução das consultas mais frequentes
+Imprime o EXPLAIN QUERY PLAN (SQLite) ou EXPLAIN (outros bancos) de cada consulta
+e termina com código 1 se alguma delas percorrer uma tabela inteira
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.src.app import create_app
+from backend.src import db
+from backend.src.models.equipment import Equipment, EquipmentYearValue
+from backend.src.models.project import Project
+
+SAMPLE_PROJECT_ID = 1
+SAMPLE_SHEET_KEY = 'ativos-tangiveis-equipamento-basico'
+SAMPLE_NAME = 'Projeto'
+
+
+def hot_queries():
+    """
+    Build the statements run by the busiest routes
+
+    Returns:
+        List of (description, statement)
+    """
+    return [
+        ('list_equipment: equipamentos de uma planilha',
+         db.select(Equipment)
+         .where(Equipment.project_id == SAMPLE_PROJECT_ID, Equipment.sheet_key == SAMPLE_SHEET_KEY)
+         .order_by(Equipment.created_at.asc())),
+        ('list_equipment: ETag',
+         db.select(db.func.count(Equipment.id), db.func.max(Equipment.id), db.func.max(Equipment.updated_at))
+         .where(Equipment.project_id == SAMPLE_PROJECT_ID, Equipment.sheet_key == SAMPLE_SHEET_KEY)),
+        ('create_project / update_project: projeto por nome',
+         db.select(Project).where(Project.nome == SAMPLE_NAME).limit(1)),
+        ('get_current_project: projeto mais recente',
+         db.select(Project).order_by(Project.updated_at.desc()).limit(1)),
+        ('list_projects: projetos por data de criação',
+         db.select(Project).order_by(Project.created_at.desc())),
+        ('investment_summary: valores por ano',
+         db.select(Equipment.sheet_key, EquipmentYearValue.year, db.func.sum(EquipmentYearValue.amount))
+         .join(Equipment, Equipment.id == EquipmentYearValue.equipment_id)
+         .where(Equipment.project_id == SAMPLE_PROJECT_ID)
+         .group_by(Equipment.sheet_key, EquipmentYearValue.year)),
+    ]
+
+
+def is_full_scan(detail: str) -> bool:
+    """
+    Check whether a SQLite plan line reads a whole table
+
+    Args:
+        detail: Detail column of EXPLAIN QUERY PLAN
+
+    Returns:
+        True for "SCAN <table>" lines that use no index
+    """
+    return detail.startswith('SCAN ') and 'USING' not in detail
+
+
+def explain_hot_queries():
+    """Print the plan of every hot query"""
+    app = create_app()
+
+    with app.app_context():
+        dialect = db.engine.dialect
+        sqlite = dialect.name == 'sqlite'
+
+        print("=" * 60)
+        print("Plano de execução das consultas frequentes")
+        print(f"Banco de dados: {app.config['SQLALCHEMY_DATABASE_URI']}")
+        print("=" * 60)
+
+        full_scans = []
+        for description, statement in hot_queries():
+            sql = str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+            prefix = 'EXPLAIN QUERY PLAN ' if sqlite else 'EXPLAIN '
+            rows = db.session.execute(db.text(prefix + sql)).all()
+
+            print(f"\n{description}")
+            print(f"  {' '.join(sql.split())}")
+            for row in rows:
+                detail = str(row[-1])
+                print(f"    {detail if sqlite else ' | '.join(str(value) for value in row)}")
+                if sqlite and is_full_scan(detail):
+                    full_scans.append(description)
+
+        print("\n" + "=" * 60)
+        if full_scans:
+            print(f"⚠️  {len(full_scans)} consulta(s) sem índice:")
+            for description in full_scans:
+                print(f"  - {description}")
+            print("Execute as migrações: python backend/scripts/upgrade_db.py")
+        else:
+            print("✓ Todas as consultas usam índices")
+        print("=" * 60)
+        return not full_scans
+
+
+if __name__ == '__main__':
+    sys.exit(0 if explain_hot_queries() else 1)
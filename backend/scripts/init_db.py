@@ -1,6 +1,6 @@
 """
 Initialize database
-Creates database tables if they don't exist
+Creates database tables if they don't exist, by applying the migrations
 """
 
 import sys
@@ -10,9 +10,8 @@ from sqlalchemy import inspect
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from backend.src.app import create_app
+from backend.src.app import create_app, upgrade_database
 from backend.src import db
-from backend.src.models.project import Project
 
 def init_database():
     """Initialize database and create tables"""
@@ -20,7 +19,7 @@ def init_database():
     
     with app.app_context():
         # Create all tables
-        db.create_all()
+        upgrade_database()
         
         # Get table names using inspect (compatible with newer SQLAlchemy versions)
         try:
@@ -0,0 +1,64 @@
+"""
+Script para mover as planilhas de projetos para o layout por projeto
+Move data/<planilha>_project_<id>.json para data/projects/<id>/<planilha>.json
+e cria o manifest.json de cada projeto
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config.settings import Config
+from backend.src.models.storage import DataStorage, split_project_sheet_name
+
+
+def migrate_project_layout(data_dir=None):
+    """Move flat project sheet files (and their journals) into per-project directories"""
+    data_dir = Path(data_dir or os.getenv('DATA_DIR', Config.DATA_DIR))
+    storage = DataStorage(str(data_dir), flush_interval=0)
+
+    print("=" * 60)
+    print(f"Migrando planilhas de projetos em {data_dir}...")
+    print("=" * 60)
+
+    sheet_suffixes = tuple(DataStorage.FILE_EXTENSIONS.values()) + (DataStorage.JOURNAL_SUFFIX,)
+    moved = 0
+    projects = set()
+    for path in sorted(data_dir.iterdir()):
+        if not path.is_file() or path.suffix not in sheet_suffixes:
+            continue
+        parts = split_project_sheet_name(path.stem)
+        if parts is None:
+            continue
+
+        project_id, sheet = parts
+        target = storage.get_project_dir(project_id) / f'{sheet}{path.suffix}'
+        if target.exists():
+            print(f"⚠️  {path.name}: {target} já existe, ficheiro mantido")
+            continue
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(path, target)
+        projects.add(project_id)
+        moved += 1
+        print(f"✓ {path.name} → {target.relative_to(data_dir)}")
+
+    # Rewrite every moved sheet once so the manifests get sizes and versions
+    for project_id in sorted(projects):
+        project_dir = storage.get_project_dir(project_id)
+        sheet_names = {path.stem for path in project_dir.iterdir()
+                       if path.suffix in sheet_suffixes and path.name != DataStorage.MANIFEST_FILE}
+        for sheet in sorted(sheet_names):
+            sheet_name = f'{sheet}_project_{project_id}'
+            storage.save_sheet_data(sheet_name, storage.load_sheet_data(sheet_name))
+
+    print("=" * 60)
+    print(f"✓ {moved} ficheiro(s) movido(s) para {len(projects)} projeto(s)")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    migrate_project_layout(sys.argv[1] if len(sys.argv) > 1 else None)
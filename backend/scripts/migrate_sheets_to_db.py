@@ -0,0 +1,104 @@
+"""
+Script para migrar as planilhas JSON (data/*.json e data/projects/<id>/*.json)
+para o banco de dados
+Depois de executar, defina SHEET_STORE=sql para usar o armazenamento relacional
+"""
+
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.src.app import create_app
+from backend.src import db
+from backend.src.models.storage import DataStorage, project_sheet_name
+from backend.src.models.sheet import SqlSheetStore
+
+
+def list_sheet_names(json_store: DataStorage) -> List[str]:
+    """
+    List every sheet of a JSON data directory under its storage name
+
+    Top-level files keep their name; sheets of a project, stored under
+    projects/<id>/, are listed as <sheet>_project_<id>, the name get_storage()
+    resolves them by. Each project directory is read both from its manifest
+    and from its files, so sheets that only have journaled edits are included.
+
+    Args:
+        json_store: JSON store of the data directory
+
+    Returns:
+        Sorted list of sheet names
+    """
+    sheet_suffixes = tuple(DataStorage.FILE_EXTENSIONS.values()) + (DataStorage.JOURNAL_SUFFIX,)
+    data_dir = json_store.data_dir
+    sheet_names = {
+        path.stem for path in data_dir.iterdir()
+        if path.is_file() and path.suffix in sheet_suffixes
+    }
+
+    projects_dir = data_dir / DataStorage.PROJECTS_DIR
+    if projects_dir.is_dir():
+        for project_dir in projects_dir.iterdir():
+            if not project_dir.is_dir() or not project_dir.name.isdigit():
+                continue
+            project_id = int(project_dir.name)
+            sheets = set(json_store.load_project_manifest(project_id)['sheets'])
+            sheets.update(
+                path.stem for path in project_dir.iterdir()
+                if path.is_file() and path.suffix in sheet_suffixes and path.name != DataStorage.MANIFEST_FILE
+            )
+            sheet_names.update(project_sheet_name(project_id, sheet) for sheet in sheets)
+
+    return sorted(sheet_names)
+
+
+def migrate_sheets(json_store: DataStorage, sql_store: SqlSheetStore) -> Tuple[int, int]:
+    """
+    Copy every sheet of a JSON store (including pending journal edits) into the sheet tables
+
+    Args:
+        json_store: JSON store to read from
+        sql_store: SQL store to write to (needs an application context)
+
+    Returns:
+        Tuple of (migrated sheets, sheets found)
+    """
+    sheet_names = list_sheet_names(json_store)
+
+    print("=" * 60)
+    print(f"Migrando {len(sheet_names)} planilha(s) de {json_store.data_dir} para o banco de dados...")
+    print("=" * 60)
+
+    migrated = 0
+    for sheet_name in sheet_names:
+        try:
+            data = json_store.load_sheet_data(sheet_name)
+            sql_store.save_sheet_data(sheet_name, data)
+            migrated += 1
+            print(f"✓ {sheet_name} ({len(data.get('rows', []))} linhas)")
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️  Erro ao migrar {sheet_name}: {e}")
+
+    print("=" * 60)
+    print(f"✓ {migrated} de {len(sheet_names)} planilha(s) migrada(s)")
+    return migrated, len(sheet_names)
+
+
+def migrate_sheets_to_db():
+    """Copy every JSON sheet of DATA_DIR into the sheet tables"""
+    app = create_app()
+
+    with app.app_context():
+        data_dir = Path(app.config.get('DATA_DIR', 'data'))
+        migrate_sheets(DataStorage(str(data_dir), flush_interval=0), SqlSheetStore())
+
+        print("Os ficheiros JSON foram mantidos. Defina SHEET_STORE=sql para usar o banco de dados.")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    migrate_sheets_to_db()
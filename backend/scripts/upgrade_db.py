@@ -0,0 +1,35 @@
+"""
+Script para aplicar as migrações do banco de dados (Flask-Migrate/Alembic)
+Execute-o antes de iniciar o servidor (o servidor de desenvolvimento também o faz com AUTO_MIGRATE=True)
+"""
+
+import sys
+from pathlib import Path
+from flask_migrate import current
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.src.app import create_app, upgrade_database, MIGRATIONS_DIR
+
+
+def upgrade_db():
+    """Apply every pending migration"""
+    app = create_app()
+
+    with app.app_context():
+        print("=" * 60)
+        print("Aplicando migrações do banco de dados...")
+        print(f"Banco de dados: {app.config['SQLALCHEMY_DATABASE_URI']}")
+        print("=" * 60)
+
+        upgrade_database()
+        current(directory=str(MIGRATIONS_DIR))
+
+        print("=" * 60)
+        print("✓ Banco de dados atualizado!")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    upgrade_db()
@@ -3,11 +3,13 @@ Backend source package initialization
 """
 
 from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate
 
 # Initialize SQLAlchemy
 db = SQLAlchemy()
+migrate = Migrate()
 
 # Import models after db initialization
-from backend.src.models import project, storage, equipment
+from backend.src.models import project, storage, equipment, sheet
 
-__all__ = ['db', 'project', 'storage', 'equipment']
+__all__ = ['db', 'migrate', 'project', 'storage', 'equipment', 'sheet']
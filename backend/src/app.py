@@ -5,6 +5,7 @@ Sistema de gestão de planos estratégicos, financeiros e de negócio
 
 from flask import Flask
 from flask_cors import CORS
+from flask_migrate import upgrade
 import os
 import sys
 import webbrowser
@@ -16,10 +17,15 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from backend.config.settings import config
-from backend.src import db
+from backend.config.database import configure_database, describe_profile, install_profile
+from backend.src import db, migrate
 from backend.src.routes import spreadsheet_routes, health_routes, frontend_routes, project_routes, equipment_routes, import_routes
 from backend.src.models.project import Project
 from backend.src.models.equipment import Equipment
+from backend.src.services.import_jobs import init_import_jobs
+from backend.src.services.sheet_templates import warm_templates
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / 'migrations'
 
 
 def create_app(config_name=None):
@@ -38,20 +44,23 @@ def create_app(config_name=None):
     config_name = config_name or os.getenv('FLASK_ENV', 'development')
     app.config.from_object(config[config_name])
     
-    # Initialize database
+    # Initialize database with the engine profile of this environment
+    database_profile = configure_database(app.config)
+    app.extensions['database_profile'] = database_profile
     db.init_app(app)
+    migrate.init_app(app, db, directory=str(MIGRATIONS_DIR), render_as_batch=True)
+    with app.app_context():
+        install_profile(db.engine, database_profile)
     
     # Create data directory if it doesn't exist
     data_dir = Path(app.config.get('DATA_DIR', 'data'))
     data_dir.mkdir(parents=True, exist_ok=True)
     
-    # Create tables
-    with app.app_context():
-        try:
-            db.create_all()
-        except Exception as e:
-            print(f"Warning: Could not create database tables: {e}")
-            print("This might be normal if tables already exist.")
+    # Compile the default sheets of new projects once
+    warm_templates()
+    
+    # Thread pool of the background imports
+    init_import_jobs(app)
     
     # Enable CORS - allow all origins in development
     if app.config['FLASK_ENV'] == 'development':
@@ -70,6 +79,18 @@ def create_app(config_name=None):
     return app
 
 
+def upgrade_database():
+    """
+    Apply every pending database migration (needs an application context)
+
+    The schema is only created and migrated here, never by create_app, so
+    worker processes and scripts don't race each other on startup. Run it
+    before serving with python backend/scripts/upgrade_db.py or
+    flask db upgrade; main() also runs it when AUTO_MIGRATE is enabled.
+    """
+    upgrade(directory=str(MIGRATIONS_DIR))
+
+
 def open_browser(url, delay=1.5):
     """
     Open browser after a delay
@@ -96,6 +117,11 @@ def main():
     """Main entry point"""
     app = create_app()
     
+    # Bring the database up to date before serving (development server only)
+    if app.config.get('AUTO_MIGRATE', True):
+        with app.app_context():
+            upgrade_database()
+    
     host = app.config['FLASK_HOST']
     port = app.config['FLASK_PORT']
     url = f"http://localhost:{port}"
@@ -104,18 +130,23 @@ def main():
     print("Starting Viabiliza+África Backend API...")
     print("=" * 60)
     print(f"Environment: {app.config['FLASK_ENV']}")
+    print(f"Database: {describe_profile(app.extensions['database_profile'])}")
     print(f"Frontend: {url}")
     print(f"API: {url}/api")
     print("\nEndpoints:")
     print("  GET  /                    → Frontend (index.html)")
     print("  GET  /api/spreadsheet/<sheet_name>")
     print("  POST /api/spreadsheet/update")
+    print("  POST /api/spreadsheet/<sheet_name>/update/batch")
     print("  POST /api/spreadsheet/<sheet_name>/calculate")
     print("  POST /api/spreadsheet/<sheet_name>/save")
+    print("  GET  /api/spreadsheet/<sheet_name>/export")
     print("  POST /api/spreadsheet/pressupostos/calculate-rst")
     print("  GET  /api/projects              → List projects")
     print("  POST /api/projects              → Create project")
     print("  GET  /api/projects/<id>         → Get project")
+    print("  GET  /api/projects/<id>/snapshot → Get project with equipment and sheets")
+    print("  GET  /api/projects/<id>/investment-summary → Get investment and depreciation summary")
     print("  PUT  /api/projects/<id>         → Update project")
     print("  DELETE /api/projects/<id>        → Delete project")
     print("  GET  /api/projects/current      → Get current project")
@@ -126,7 +157,9 @@ def main():
     print("  PUT  /api/equipment/<id>         → Update equipment")
     print("  DELETE /api/equipment/<id>        → Delete equipment")
     print("  POST /api/equipment/<project_id>/<sheet_key>/bulk → Save bulk equipment")
-    print("  POST /api/import/excel              → Import data from Excel")
+    print("  POST /api/import/excel              → Import data from Excel, CSV or Parquet")
+    print("  POST /api/import/jobs               → Start a background import")
+    print("  GET  /api/import/jobs/<job_id>      → Get background import progress")
     print("  GET  /api/import/template           → Download Excel template")
     print("  GET  /api/health")
     print("=" * 60)
@@ -3,6 +3,6 @@ Models package
 Define data structures and models
 """
 
-from backend.src.models import project, storage, equipment
+from backend.src.models import project, storage, equipment, sheet
 
-__all__ = ['project', 'storage', 'equipment']
+__all__ = ['project', 'storage', 'equipment', 'sheet']
@@ -2,79 +2,183 @@
 Equipment model for database
 """
 
+import json
 from datetime import datetime
+from typing import Dict, Optional
 from backend.src import db
+from backend.src.utils.parsers import parse_pt_number, format_pt_number
+
+
+def parse_year_values(values) -> Dict[int, float]:
+    """
+    Parse the values per year sent by clients
+
+    Args:
+        values: Dictionary of year -> amount (strings like "1.234,56" or
+            numbers), or the same dictionary as a JSON string
+
+    Returns:
+        Dictionary of year -> amount rounded to cents; keys that are not
+        years are ignored
+    """
+    if isinstance(values, str):
+        values = json.loads(values) if values.strip() else {}
+
+    amounts = {}
+    for year, value in (values or {}).items():
+        try:
+            year = int(year)
+        except (TypeError, ValueError):
+            continue
+        amounts[year] = round(parse_pt_number(value) or 0.0, 2)
+    return amounts
 
 
 class Equipment(db.Model):
     """
     Equipment model - stores equipment data for investment sheets
+
+    Amounts are stored as numbers: the initial value in ano0_amount and one
+    EquipmentYearValue row per year. The ano0 and year_values attributes keep
+    the original string interface ("1.234,56") for routes and clients.
     """
     __tablename__ = 'equipment'
-    
+    __table_args__ = (
+        # Equipment of a sheet in display order (list_equipment, bulk save, summaries)
+        db.Index('ix_equipment_project_sheet_created', 'project_id', 'sheet_key', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
     sheet_key = db.Column(db.String(100), nullable=False)  # e.g., 'ativos-tangiveis-equipamento-basico'
     equipment_name = db.Column(db.String(255), nullable=False)
-    ano0 = db.Column(db.String(50), default='0,00')
-    year_values = db.Column(db.Text)  # JSON string with year values: {"2023": "1000,00", "2024": "2000,00", ...}
+    ano0_amount = db.Column(db.Numeric(18, 2, asdecimal=False), nullable=False, default=0.0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
-    
-    # Relationship
+
+    # Relationships
     project = db.relationship('Project', backref='equipment')
-    
+    year_amounts = db.relationship(
+        'EquipmentYearValue',
+        order_by='EquipmentYearValue.year',
+        cascade='all, delete-orphan',
+        lazy='selectin'
+    )
+
+    @property
+    def ano0(self) -> str:
+        """Initial value formatted as "1.234,56\""""
+        return format_pt_number(self.ano0_amount or 0.0)
+
+    @ano0.setter
+    def ano0(self, value):
+        self.ano0_amount = round(parse_pt_number(value) or 0.0, 2)
+
+    @property
+    def year_values(self) -> Dict[str, str]:
+        """Values per year, e.g. {"2023": "1.000,00"}"""
+        return {str(item.year): format_pt_number(item.amount) for item in self.year_amounts}
+
+    @year_values.setter
+    def year_values(self, values):
+        """
+        Replace the values per year
+
+        Args:
+            values: Dictionary of year -> amount (strings or numbers), or
+                the same dictionary as a JSON string
+        """
+        amounts = parse_year_values(values)
+
+        # Update rows in place: deleting and re-inserting the same (equipment, year)
+        # key in one flush could violate the primary key
+        existing = {item.year: item for item in self.year_amounts}
+        for year, item in existing.items():
+            if year not in amounts:
+                self.year_amounts.remove(item)
+        for year, amount in amounts.items():
+            if year in existing:
+                existing[year].amount = amount
+            else:
+                self.year_amounts.append(EquipmentYearValue(year=year, amount=amount))
+
+        # Child rows don't touch this row, so bump updated_at for ETags
+        self.updated_at = datetime.utcnow()
+
     def to_dict(self):
         """
         Convert equipment to dictionary
-        
+
         Returns:
             Dictionary representation of the equipment
         """
-        import json
-        year_values = {}
-        if self.year_values:
-            try:
-                year_values = json.loads(self.year_values)
-            except:
-                pass
-        
         return {
             'id': self.id,
             'projectId': self.project_id,
             'sheetKey': self.sheet_key,
             'equipmentName': self.equipment_name,
             'ano0': self.ano0,
-            'yearValues': year_values,
+            'yearValues': self.year_values,
             'createdAt': self.created_at.isoformat() if self.created_at else None,
             'updatedAt': self.updated_at.isoformat() if self.updated_at else None
         }
-    
+
     @classmethod
     def from_dict(cls, data, project_id):
         """
         Create equipment from dictionary
-        
+
         Args:
             data: Dictionary with equipment data
             project_id: Project ID
-            
+
         Returns:
             Equipment instance
         """
-        import json
-        year_values = data.get('yearValues', {})
-        if isinstance(year_values, dict):
-            year_values = json.dumps(year_values)
-        
         return cls(
             project_id=project_id,
             sheet_key=data.get('sheetKey'),
             equipment_name=data.get('equipmentName'),
             ano0=data.get('ano0', '0,00'),
-            year_values=year_values
+            year_values=data.get('yearValues', {})
         )
-    
+
+    @classmethod
+    def year_totals(cls, project_id: int, sheet_key: Optional[str] = None) -> Dict[int, float]:
+        """
+        Sum the equipment values of a project per year with a single GROUP BY
+
+        Args:
+            project_id: Project ID
+            sheet_key: Only sum equipment of this sheet (default: every sheet)
+
+        Returns:
+            Dictionary of year -> total amount
+        """
+        query = (
+            db.select(EquipmentYearValue.year, db.func.sum(EquipmentYearValue.amount))
+            .join(cls, cls.id == EquipmentYearValue.equipment_id)
+            .where(cls.project_id == project_id)
+            .group_by(EquipmentYearValue.year)
+            .order_by(EquipmentYearValue.year)
+        )
+        if sheet_key is not None:
+            query = query.where(cls.sheet_key == sheet_key)
+        return {year: float(total or 0) for year, total in db.session.execute(query)}
+
     def __repr__(self):
         return f'<Equipment {self.equipment_name}>'
 
+
+class EquipmentYearValue(db.Model):
+    """
+    Value of an equipment in one year
+    """
+    __tablename__ = 'equipment_year_values'
+
+    equipment_id = db.Column(db.Integer, db.ForeignKey('equipment.id', ondelete='CASCADE'), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    amount = db.Column(db.Numeric(18, 2, asdecimal=False), nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f'<EquipmentYearValue {self.equipment_id}:{self.year}>'
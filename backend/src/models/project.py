@@ -11,6 +11,13 @@ class Project(db.Model):
     Project model
     """
     __tablename__ = 'projects'
+    __table_args__ = (
+        # Project names are unique (create/update look them up by nome)
+        db.Index('uq_projects_nome', 'nome', unique=True),
+        # get_current_project and list_projects order by these
+        db.Index('ix_projects_updated_at', 'updated_at'),
+        db.Index('ix_projects_created_at', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(255), nullable=False)
@@ -0,0 +1,485 @@
+"""
+Relational sheet store
+
+Optional database-backed alternative to the JSON files handled by
+DataStorage (enabled with SHEET_STORE=sql). A sheet is split into three
+tables: ``sheets`` (name and non-row metadata), ``sheet_rows`` (one row per
+spreadsheet row, indexed by row name) and ``sheet_cells`` (one row per
+cell). Updating a single cell is an indexed row lookup plus one UPSERT,
+instead of loading, scanning and rewriting the whole sheet.
+"""
+
+import json
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from sqlalchemy.dialects import sqlite, postgresql
+from backend.src import db
+from backend.src.models.sheet_codec import numeric_cell
+from backend.src.models.storage import (
+    DetachedProjectData, SheetVersionConflict, apply_cell_edit, project_sheet_name, sheet_version, split_project_sheet_name
+)
+
+
+class Sheet(db.Model):
+    """
+    Sheet model - name and metadata (title, headers, ...) of a spreadsheet
+    """
+    __tablename__ = 'sheets'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), nullable=False, unique=True, index=True)
+    meta = db.Column(db.Text)  # JSON object with every sheet key except 'rows'
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<Sheet {self.name}>'
+
+
+class SheetRow(db.Model):
+    """
+    SheetRow model - a row of a sheet, addressed by position
+    """
+    __tablename__ = 'sheet_rows'
+    __table_args__ = (
+        db.Index('ix_sheet_rows_sheet_row_name', 'sheet_id', 'row_name', 'position'),
+    )
+
+    sheet_id = db.Column(db.Integer, db.ForeignKey('sheets.id', ondelete='CASCADE'), primary_key=True)
+    position = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    row_name = db.Column(db.String(255))  # First cell of the row, used for lookups
+
+    def __repr__(self):
+        return f'<SheetRow {self.sheet_id}:{self.position} {self.row_name}>'
+
+
+class SheetCell(db.Model):
+    """
+    SheetCell model - a single cell value, JSON encoded to keep its type
+    """
+    __tablename__ = 'sheet_cells'
+
+    sheet_id = db.Column(db.Integer, db.ForeignKey('sheets.id', ondelete='CASCADE'), primary_key=True)
+    position = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    column_index = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    value = db.Column(db.Text, nullable=False)
+
+    def __repr__(self):
+        return f'<SheetCell {self.sheet_id}:{self.position}:{self.column_index}>'
+
+
+class SqlSheetStore:
+    """Store sheets in the database, with the same interface as DataStorage"""
+
+    def load_sheet_data(self, sheet_name: str) -> Dict[str, Any]:
+        """
+        Load sheet data from the database
+
+        Args:
+            sheet_name: Name of the sheet
+
+        Returns:
+            Dictionary with sheet data, or empty dict if the sheet doesn't exist
+        """
+        return self.load_sheets([sheet_name])[sheet_name]
+
+    def load_sheets(self, sheet_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Load several sheets with one query per table
+
+        Args:
+            sheet_names: Names of the sheets
+
+        Returns:
+            Dictionary of sheet name -> sheet data (empty dict if missing)
+        """
+        loaded = {sheet_name: {} for sheet_name in sheet_names}
+        if not sheet_names:
+            return loaded
+
+        sheets = db.session.execute(
+            db.select(Sheet.id, Sheet.name, Sheet.meta).where(Sheet.name.in_(sheet_names))
+        ).all()
+        if not sheets:
+            return loaded
+        names = {sheet_id: name for sheet_id, name, _meta in sheets}
+        rows = {sheet_id: {} for sheet_id in names}
+        for sheet_id, name, meta in sheets:
+            loaded[name] = json.loads(meta) if meta else {}
+
+        row_positions = db.session.execute(
+            db.select(SheetRow.sheet_id, SheetRow.position).where(SheetRow.sheet_id.in_(names))
+        )
+        for sheet_id, position in row_positions:
+            rows[sheet_id][position] = []
+
+        cells = db.session.execute(
+            db.select(SheetCell.sheet_id, SheetCell.position, SheetCell.column_index, SheetCell.value)
+            .where(SheetCell.sheet_id.in_(names))
+            .order_by(SheetCell.sheet_id, SheetCell.position, SheetCell.column_index)
+        )
+        for sheet_id, position, column_index, value in cells:
+            row = rows[sheet_id].setdefault(position, [])
+            if len(row) < column_index:
+                row.extend([''] * (column_index - len(row)))
+            row.append(json.loads(value))
+
+        for sheet_id, name in names.items():
+            sheet_rows = rows[sheet_id]
+            loaded[name]['rows'] = [sheet_rows[position] for position in sorted(sheet_rows)]
+        return loaded
+
+    def load_sheet_values(self, sheet_name: str) -> Dict[str, Any]:
+        """
+        Load sheet data with numeric cells as floats, for calculations
+
+        Args:
+            sheet_name: Name of the sheet
+
+        Returns:
+            Dictionary with sheet data where numeric cells are floats
+        """
+        data = self.load_sheet_data(sheet_name)
+        if data:
+            data['rows'] = [row[:1] + [numeric_cell(cell) for cell in row[1:]] for row in data['rows']]
+        return data
+
+    def export_sheet_json(self, sheet_name: str) -> str:
+        """
+        Export a sheet as pretty-printed JSON
+
+        Args:
+            sheet_name: Name of the sheet
+
+        Returns:
+            JSON document
+        """
+        return json.dumps(self.load_sheet_data(sheet_name), ensure_ascii=False, indent=2)
+
+    def save_sheet_data(self, sheet_name: str, data: Dict[str, Any],
+                        expected_version: Optional[int] = None) -> int:
+        """
+        Replace a sheet in the database
+
+        Args:
+            sheet_name: Name of the sheet
+            data: Dictionary with sheet data
+            expected_version: Version the caller based the data on, or None
+                to overwrite unconditionally
+
+        Returns:
+            New version of the sheet
+
+        Raises:
+            SheetVersionConflict: If the sheet is no longer at expected_version
+        """
+        try:
+            version = self._replace_sheet(sheet_name, data, expected_version)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return version
+
+    def save_sheets(self, sheets: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Save several sheets in one transaction
+
+        Args:
+            sheets: Dictionary of sheet name -> sheet data
+
+        Returns:
+            Dictionary of sheet name -> new version
+        """
+        try:
+            versions = {
+                sheet_name: self._replace_sheet(sheet_name, data, None)
+                for sheet_name, data in sheets.items()
+            }
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return versions
+
+    def update_cell(self, sheet_name: str, row_name: str, column_index: int, value: Any,
+                    expected_version: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Update a single cell with an indexed row lookup and one UPSERT
+
+        Args:
+            sheet_name: Name of the sheet
+            row_name: Name of the row (first cell of the row)
+            column_index: Index of the column to update
+            value: New cell value
+            expected_version: Version the caller based the edit on, or None
+
+        Returns:
+            Updated sheet data
+        """
+        return self.update_cells(sheet_name, [
+            {'row_name': row_name, 'column_index': column_index, 'value': value}
+        ], expected_version)
+
+    def update_cells(self, sheet_name: str, edits: List[Dict[str, Any]],
+                     expected_version: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Update several cells in one transaction
+
+        Args:
+            sheet_name: Name of the sheet
+            edits: List of {'row_name', 'column_index', 'value'} dictionaries
+            expected_version: Version the caller based the edits on, or None
+                to apply them unconditionally
+
+        Returns:
+            Updated sheet data
+
+        Raises:
+            SheetVersionConflict: If the sheet is no longer at expected_version
+        """
+        try:
+            sheet = self._get_or_create_sheet(sheet_name)
+            self._bump_version(sheet, expected_version)
+            for edit in edits:
+                row_name = edit['row_name']
+                column_index = edit['column_index']
+                value = edit['value']
+
+                position = db.session.execute(
+                    db.select(SheetRow.position)
+                    .where(SheetRow.sheet_id == sheet.id, SheetRow.row_name == row_name)
+                    .order_by(SheetRow.position)
+                    .limit(1)
+                ).scalar()
+
+                if position is None:
+                    self._append_row(sheet.id, row_name, column_index, value)
+                else:
+                    self._upsert_cell(sheet.id, position, column_index, value)
+
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return self.load_sheet_data(sheet_name)
+
+    def list_project_sheets(self, project_id: int) -> List[str]:
+        """
+        List the names of every sheet of a project
+
+        Args:
+            project_id: Project ID
+
+        Returns:
+            List of sheet names (e.g., ['pressupostos_project_1'])
+        """
+        suffix = project_sheet_name(project_id, '')
+        return db.session.execute(
+            db.select(Sheet.name).where(Sheet.name.endswith(suffix, autoescape=True)).order_by(Sheet.name)
+        ).scalars().all()
+
+    def copy_project_data(self, source_project_id: int, target_project_id: int) -> List[str]:
+        """
+        Copy every sheet of a project to another project
+
+        Args:
+            source_project_id: Project to copy from
+            target_project_id: Project to copy to
+
+        Returns:
+            List of the new sheet names
+        """
+        copied = []
+        for sheet_name in self.list_project_sheets(source_project_id):
+            target_name = project_sheet_name(target_project_id, split_project_sheet_name(sheet_name)[1])
+            self.save_sheet_data(target_name, self.load_sheet_data(sheet_name))
+            copied.append(target_name)
+        return copied
+
+    def delete_project_data(self, project_id: int) -> List[str]:
+        """
+        Remove every sheet of a project
+
+        Args:
+            project_id: Project ID
+
+        Returns:
+            List of the removed sheet names
+        """
+        try:
+            removed = self.detach_project_data(project_id).sheets
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return removed
+
+    def detach_project_data(self, project_id: int) -> DetachedProjectData:
+        """
+        Delete every sheet of a project in the current transaction, without
+        committing, so a rollback brings them back
+
+        Args:
+            project_id: Project ID
+
+        Returns:
+            DetachedProjectData with the removed sheet names
+        """
+        removed = self.list_project_sheets(project_id)
+        if removed:
+            sheet_ids = db.select(Sheet.id).where(Sheet.name.in_(removed))
+            db.session.execute(db.delete(SheetCell).where(SheetCell.sheet_id.in_(sheet_ids)))
+            db.session.execute(db.delete(SheetRow).where(SheetRow.sheet_id.in_(sheet_ids)))
+            db.session.execute(db.delete(Sheet).where(Sheet.name.in_(removed)))
+        return DetachedProjectData(removed)
+
+    def flush(self, sheet_name: Optional[str] = None):
+        """Writes are committed immediately, so there is nothing to flush"""
+
+    def pending_sheets(self) -> List[str]:
+        """Writes are committed immediately, so no sheet is ever pending"""
+        return []
+
+    def cache_stats(self) -> Dict[str, int]:
+        """The database store has no parsed-sheet cache"""
+        return {'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0, 'max_size': 0}
+
+    @staticmethod
+    def _row_name(row: list) -> Optional[str]:
+        if not row or row[0] is None:
+            return None
+        return str(row[0])[:255]
+
+    def _get_or_create_sheet(self, sheet_name: str) -> Sheet:
+        sheet = Sheet.query.filter_by(name=sheet_name).first()
+        if sheet is None:
+            sheet = Sheet(name=sheet_name, meta='{}')
+            db.session.add(sheet)
+            db.session.flush()
+        return sheet
+
+    def _bump_version(self, sheet: Sheet, expected_version: Optional[int],
+                      meta: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Move a sheet to its next version, or raise if it is not at expected_version
+
+        The metadata (which holds the version) is replaced with a
+        compare-and-swap UPDATE, so two transactions based on the same
+        version cannot both succeed.
+
+        Args:
+            sheet: Sheet row
+            expected_version: Version the caller based its write on, or None
+            meta: New metadata, or None to keep the current one
+
+        Returns:
+            New version of the sheet
+        """
+        old_meta = sheet.meta
+        current = json.loads(old_meta) if old_meta else {}
+        current_version = sheet_version(current)
+        if expected_version is not None and expected_version != current_version:
+            raise SheetVersionConflict(sheet.name, expected_version, current_version)
+
+        new_meta = dict(current if meta is None else meta, version=current_version + 1)
+        result = db.session.execute(
+            db.update(Sheet)
+            .where(Sheet.id == sheet.id, Sheet.meta == old_meta)
+            .values(meta=json.dumps(new_meta, ensure_ascii=False), updated_at=datetime.utcnow())
+            .execution_options(synchronize_session='fetch')
+        )
+        if result.rowcount != 1:
+            # Another transaction committed a new version in the meantime
+            raise SheetVersionConflict(sheet.name, current_version, current_version + 1)
+        return new_meta['version']
+
+    def _replace_sheet(self, sheet_name: str, data: Dict[str, Any], expected_version: Optional[int]) -> int:
+        """Replace the rows and metadata of a sheet without committing"""
+        sheet = self._get_or_create_sheet(sheet_name)
+        meta = {k: v for k, v in data.items() if k != 'rows'}
+        version = self._bump_version(sheet, expected_version, meta)
+
+        db.session.execute(db.delete(SheetCell).where(SheetCell.sheet_id == sheet.id))
+        db.session.execute(db.delete(SheetRow).where(SheetRow.sheet_id == sheet.id))
+
+        row_params = []
+        cell_params = []
+        for position, row in enumerate(data.get('rows', [])):
+            row_params.append({
+                'sheet_id': sheet.id,
+                'position': position,
+                'row_name': self._row_name(row)
+            })
+            for column_index, value in enumerate(row):
+                cell_params.append({
+                    'sheet_id': sheet.id,
+                    'position': position,
+                    'column_index': column_index,
+                    'value': json.dumps(value, ensure_ascii=False)
+                })
+
+        if row_params:
+            db.session.execute(db.insert(SheetRow), row_params)
+        if cell_params:
+            db.session.execute(db.insert(SheetCell), cell_params)
+        return version
+
+    def _append_row(self, sheet_id: int, row_name: str, column_index: int, value: Any):
+        last_position = db.session.execute(
+            db.select(db.func.max(SheetRow.position)).where(SheetRow.sheet_id == sheet_id)
+        ).scalar()
+        position = 0 if last_position is None else last_position + 1
+
+        # Build the new row exactly as the JSON store would
+        new_sheet = {'rows': []}
+        apply_cell_edit(new_sheet, row_name, column_index, value)
+        new_row = new_sheet['rows'][0]
+
+        db.session.execute(db.insert(SheetRow), [{
+            'sheet_id': sheet_id,
+            'position': position,
+            'row_name': self._row_name(new_row)
+        }])
+        db.session.execute(db.insert(SheetCell), [
+            {
+                'sheet_id': sheet_id,
+                'position': position,
+                'column_index': idx,
+                'value': json.dumps(cell, ensure_ascii=False)
+            }
+            for idx, cell in enumerate(new_row)
+        ])
+
+    def _upsert_cell(self, sheet_id: int, position: int, column_index: int, value: Any):
+        params = {
+            'sheet_id': sheet_id,
+            'position': position,
+            'column_index': column_index,
+            'value': json.dumps(value, ensure_ascii=False)
+        }
+        dialect = db.session.get_bind().dialect.name
+
+        if dialect in ('sqlite', 'postgresql'):
+            insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+            stmt = insert(SheetCell).values(**params)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['sheet_id', 'position', 'column_index'],
+                set_={'value': stmt.excluded.value}
+            )
+            db.session.execute(stmt)
+            return
+
+        # Generic fallback: update by primary key, insert if nothing matched
+        result = db.session.execute(
+            db.update(SheetCell)
+            .where(
+                SheetCell.sheet_id == sheet_id,
+                SheetCell.position == position,
+                SheetCell.column_index == column_index
+            )
+            .values(value=params['value'])
+        )
+        if result.rowcount == 0:
+            db.session.execute(db.insert(SheetCell), [params])
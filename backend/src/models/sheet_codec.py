@@ -0,0 +1,241 @@
+"""
+Compact binary sheet encoding
+
+Layout (after the ``VBSHEET`` magic and a format version byte, the rest is
+zlib-compressed)::
+
+    u32 metadata length, metadata as compact UTF-8 JSON (every key but 'rows')
+    u32 row count
+    per row: u32 cell count, then one typed cell per column
+
+Numeric cells are stored as float64 together with the way they were written
+(decimal places, decimal separator and thousands grouping), so a cell such as
+"1.234,56" comes back as exactly the same string while its numeric value can
+be read without parsing text again. Cells that would not round-trip exactly
+are kept as strings.
+"""
+
+import json
+import re
+import struct
+import zlib
+from typing import Any, Dict, Optional, Tuple
+from backend.src.utils.numbers import format_number
+
+MAGIC = b'VBSHEET'
+FORMAT_VERSION = 1
+
+# Cell type tags
+TAG_EMPTY = 0
+TAG_NUMBER_TEXT = 1     # numeric string: float64 + decimals + style
+TAG_FLOAT = 2           # JSON float
+TAG_INT = 3             # JSON integer
+TAG_STRING = 4          # any other string
+TAG_JSON = 5            # any other JSON value (bool, null, lists, ...)
+
+# Number text styles
+STYLE_PLAIN = 0         # 1234.56
+STYLE_COMMA = 1         # 1234,56
+STYLE_COMMA_GROUPED = 2  # 1.234,56
+
+_PLAIN_NUMBER = re.compile(r'^-?\d+(?:\.(\d+))?$')
+_COMMA_NUMBER = re.compile(r'^-?\d+(?:,(\d+))?$')
+_GROUPED_NUMBER = re.compile(r'^-?\d{1,3}(?:\.\d{3})+(?:,(\d+))?$')
+
+_U32 = struct.Struct('<I')
+_NUMBER = struct.Struct('<dBB')
+_FLOAT = struct.Struct('<d')
+_INT = struct.Struct('<q')
+
+
+def is_binary_sheet(blob: bytes) -> bool:
+    """
+    Check whether raw file contents use the binary sheet encoding
+
+    Args:
+        blob: File contents
+
+    Returns:
+        True if the contents start with the binary sheet magic
+    """
+    return blob[:len(MAGIC)] == MAGIC
+
+
+def format_number_text(value: float, decimals: int, style: int) -> str:
+    """
+    Format a number the way it was originally written in a cell
+
+    Args:
+        value: Numeric value
+        decimals: Number of decimal places
+        style: STYLE_PLAIN, STYLE_COMMA or STYLE_COMMA_GROUPED
+
+    Returns:
+        Formatted string
+    """
+    if style == STYLE_COMMA_GROUPED:
+        return format_number(value, decimals)
+    text = f'{value:.{decimals}f}'
+    if style == STYLE_COMMA:
+        return text.replace('.', ',')
+    return text
+
+
+def classify_number_text(text: str) -> Optional[Tuple[float, int, int]]:
+    """
+    Recognise a cell string that can be stored as a float64 without loss
+
+    Args:
+        text: Cell string
+
+    Returns:
+        Tuple (value, decimals, style), or None if the string is not a number
+        that formats back to exactly the same text
+    """
+    for pattern, style in ((_PLAIN_NUMBER, STYLE_PLAIN),
+                           (_COMMA_NUMBER, STYLE_COMMA),
+                           (_GROUPED_NUMBER, STYLE_COMMA_GROUPED)):
+        match = pattern.match(text)
+        if match is None:
+            continue
+        decimals = len(match.group(1) or '')
+        if decimals > 255:
+            return None
+        if style == STYLE_PLAIN:
+            value = float(text)
+        else:
+            value = float(text.replace('.', '').replace(',', '.'))
+        if format_number_text(value, decimals, style) == text:
+            return value, decimals, style
+        return None
+    return None
+
+
+def encode_sheet(sheet_data: Dict[str, Any]) -> bytes:
+    """
+    Encode sheet data in the binary sheet format
+
+    Args:
+        sheet_data: Dictionary with sheet data
+
+    Returns:
+        Encoded bytes
+    """
+    parts = []
+    meta = json.dumps({k: v for k, v in sheet_data.items() if k != 'rows'},
+                      ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    parts.append(_U32.pack(len(meta)))
+    parts.append(meta)
+
+    rows = sheet_data.get('rows', [])
+    parts.append(_U32.pack(len(rows)))
+    for row in rows:
+        parts.append(_U32.pack(len(row)))
+        for cell in row:
+            parts.append(_encode_cell(cell))
+
+    return MAGIC + bytes([FORMAT_VERSION]) + zlib.compress(b''.join(parts))
+
+
+def decode_sheet(blob: bytes, numeric: bool = False) -> Dict[str, Any]:
+    """
+    Decode sheet data from the binary sheet format
+
+    Args:
+        blob: Encoded bytes
+        numeric: Return numeric cells as floats instead of their original text
+            (the first cell of each row, the row label, is always kept as text)
+
+    Returns:
+        Dictionary with sheet data
+    """
+    if not is_binary_sheet(blob):
+        raise ValueError('Not a binary sheet')
+    version = blob[len(MAGIC)]
+    if version != FORMAT_VERSION:
+        raise ValueError(f'Unsupported binary sheet version {version}')
+
+    payload = zlib.decompress(blob[len(MAGIC) + 1:])
+    offset = 0
+
+    (meta_length,) = _U32.unpack_from(payload, offset)
+    offset += _U32.size
+    sheet_data = json.loads(payload[offset:offset + meta_length].decode('utf-8'))
+    offset += meta_length
+
+    (row_count,) = _U32.unpack_from(payload, offset)
+    offset += _U32.size
+    rows = []
+    for _ in range(row_count):
+        (cell_count,) = _U32.unpack_from(payload, offset)
+        offset += _U32.size
+        row = []
+        for column_index in range(cell_count):
+            cell, offset = _decode_cell(payload, offset, numeric and column_index > 0)
+            row.append(cell)
+        rows.append(row)
+
+    sheet_data['rows'] = rows
+    return sheet_data
+
+
+def numeric_cell(cell: Any) -> Any:
+    """
+    Convert a JSON-format cell to the value decode_sheet(numeric=True) would give
+
+    Args:
+        cell: Cell value
+
+    Returns:
+        Float for numeric text, the cell unchanged otherwise
+    """
+    if isinstance(cell, str) and cell:
+        number = classify_number_text(cell)
+        if number is not None:
+            return number[0]
+    return cell
+
+
+def _encode_cell(cell: Any) -> bytes:
+    if cell == '' and isinstance(cell, str):
+        return bytes([TAG_EMPTY])
+    if isinstance(cell, str):
+        number = classify_number_text(cell)
+        if number is not None:
+            return bytes([TAG_NUMBER_TEXT]) + _NUMBER.pack(*number)
+        encoded = cell.encode('utf-8')
+        return bytes([TAG_STRING]) + _U32.pack(len(encoded)) + encoded
+    if isinstance(cell, float):
+        return bytes([TAG_FLOAT]) + _FLOAT.pack(cell)
+    if isinstance(cell, int) and not isinstance(cell, bool) and -2 ** 63 <= cell < 2 ** 63:
+        return bytes([TAG_INT]) + _INT.pack(cell)
+    encoded = json.dumps(cell, ensure_ascii=False).encode('utf-8')
+    return bytes([TAG_JSON]) + _U32.pack(len(encoded)) + encoded
+
+
+def _decode_cell(payload: bytes, offset: int, numeric: bool) -> Tuple[Any, int]:
+    tag = payload[offset]
+    offset += 1
+
+    if tag == TAG_EMPTY:
+        return '', offset
+    if tag == TAG_NUMBER_TEXT:
+        value, decimals, style = _NUMBER.unpack_from(payload, offset)
+        offset += _NUMBER.size
+        return (value if numeric else format_number_text(value, decimals, style)), offset
+    if tag == TAG_FLOAT:
+        (value,) = _FLOAT.unpack_from(payload, offset)
+        return value, offset + _FLOAT.size
+    if tag == TAG_INT:
+        (value,) = _INT.unpack_from(payload, offset)
+        return value, offset + _INT.size
+
+    (length,) = _U32.unpack_from(payload, offset)
+    offset += _U32.size
+    text = payload[offset:offset + length].decode('utf-8')
+    offset += length
+    if tag == TAG_STRING:
+        return text, offset
+    if tag == TAG_JSON:
+        return json.loads(text), offset
+    raise ValueError(f'Unknown cell tag {tag}')
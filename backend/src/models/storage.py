@@ -1,63 +1,920 @@
 """
 Data storage models and operations
+
+Sheets are persisted as JSON files. Cell edits go through a write-behind
+layer: they are applied to an in-memory copy of the sheet and appended to a
+per-sheet journal (``<sheet>.journal``, one JSON edit per line) at the same
+time. The journal is compacted into the sheet file every AUTOSAVE_INTERVAL
+seconds or once it reaches JOURNAL_MAX_ENTRIES edits. On startup, a journal
+left behind by a crash is replayed on top of the sheet file.
+
+Sheets that belong to a project (named ``<sheet>_project_<id>``) are
+stored under ``projects/<id>/<sheet>.json`` next to a small
+``manifest.json`` with the name, size and version of every sheet of the
+project, so listing, copying or removing a project's sheets is a single
+directory operation. Other sheets stay directly in the data directory.
+
+Sheet files are written as pretty-printed JSON or, with SHEET_FORMAT=binary,
+in the compact encoding of models/sheet_codec (``.vbs`` files). Reading
+detects the format from the file contents, so both can coexist.
+
+Parsed sheets are kept in a bounded LRU cache validated by the mtime and
+size of the sheet and journal files. Callers always receive copies, so
+route handlers cannot corrupt cached state.
+
+Every write bumps the sheet's ``version``. Writers may pass the version they
+read; if the sheet has moved on, SheetVersionConflict is raised instead of
+overwriting someone else's changes. Each sheet has its own lock (a thread
+lock plus a ``<sheet>.lock`` file lock for multi-worker deployments), so
+writers to different sheets never wait on each other.
 """
 
+import atexit
+import copy
 import json
 import os
-from typing import Dict, Any
+import re
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 
+from backend.config.settings import Config
+from backend.src.models.sheet_codec import decode_sheet, encode_sheet, is_binary_sheet, numeric_cell
+from backend.src.utils.locks import KeyedLocks
+
+PROJECT_SHEET_PATTERN = re.compile(r'^(?P<sheet>.+)_project_(?P<project_id>\d+)$')
+
+
+def project_sheet_name(project_id: int, sheet: str) -> str:
+    """
+    Get the storage name of a project sheet
+
+    Args:
+        project_id: Project ID
+        sheet: Sheet name within the project (e.g., 'pressupostos')
+
+    Returns:
+        Sheet name used by the storage (e.g., 'pressupostos_project_1')
+    """
+    return f'{sheet}_project_{project_id}'
+
+
+def split_project_sheet_name(sheet_name: str) -> Optional[Tuple[int, str]]:
+    """
+    Split a project sheet name into project ID and sheet
+
+    Args:
+        sheet_name: Sheet name used by the storage
+
+    Returns:
+        Tuple (project_id, sheet), or None if the sheet doesn't belong to a project
+    """
+    match = PROJECT_SHEET_PATTERN.match(sheet_name)
+    if match is None:
+        return None
+    return int(match.group('project_id')), match.group('sheet')
+
+
+def apply_cell_edit(sheet_data: Dict[str, Any], row_name: str, column_index: int, value: Any):
+    """
+    Set a cell value in a sheet, creating the row if it doesn't exist
+
+    Args:
+        sheet_data: Dictionary with sheet data (modified in place)
+        row_name: Name of the row (first cell of the row)
+        column_index: Index of the column to update
+        value: New cell value
+    """
+    rows = sheet_data.setdefault('rows', [])
+
+    for row in rows:
+        if row and len(row) > 0 and row[0] == row_name:
+            # Ensure row has enough columns
+            if len(row) <= column_index:
+                row.extend([''] * (column_index + 1 - len(row)))
+            row[column_index] = value
+            return
+
+    # Create new row
+    new_row = [row_name] + [''] * (column_index)
+    new_row.append(value)
+    rows.append(new_row)
+
+
+def copy_sheet(sheet_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy sheet data deeply enough that the copy can be modified safely
+
+    Rows are lists of scalar cells, so they are copied one level deep, which
+    is much cheaper than copy.deepcopy on large sheets.
+
+    Args:
+        sheet_data: Dictionary with sheet data
+
+    Returns:
+        Independent copy of the sheet data
+    """
+    result = {}
+    for key, value in sheet_data.items():
+        if key == 'rows' and isinstance(value, list):
+            result[key] = [list(row) if isinstance(row, list) else copy.deepcopy(row) for row in value]
+        elif isinstance(value, (list, dict)):
+            result[key] = copy.deepcopy(value)
+        else:
+            result[key] = value
+    return result
+
+
+def sheet_version(sheet_data: Dict[str, Any]) -> int:
+    """
+    Get the version of a sheet (0 for sheets that were never written)
+
+    Args:
+        sheet_data: Dictionary with sheet data
+
+    Returns:
+        Sheet version
+    """
+    return int(sheet_data.get('version') or 0)
+
+
+class SheetVersionConflict(Exception):
+    """Raised when a write is based on an outdated version of a sheet"""
+
+    def __init__(self, sheet_name: str, expected_version: int, current_version: int):
+        super().__init__(f'Sheet {sheet_name} is at version {current_version}, expected {expected_version}')
+        self.sheet_name = sheet_name
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+
+class DetachedProjectData:
+    """
+    Sheets of a project being deleted, kept until the deletion commits
+
+    DataStorage moves the project directory aside; restore() moves it back if
+    the deletion fails and discard() removes it for good once it succeeded.
+    Stores that delete inside the database transaction have nothing to undo.
+    """
+
+    def __init__(self, sheets: List[str], project_dir: Optional[Path] = None,
+                 trash_dir: Optional[Path] = None):
+        self.sheets = sheets
+        self.project_dir = project_dir
+        self.trash_dir = trash_dir
+
+    def restore(self):
+        """Put the sheets back where they were"""
+        if self.trash_dir is not None and self.trash_dir.exists():
+            os.replace(self.trash_dir, self.project_dir)
+            self.trash_dir = None
+
+    def discard(self):
+        """Remove the sheets for good"""
+        if self.trash_dir is not None:
+            shutil.rmtree(self.trash_dir, ignore_errors=True)
+            self.trash_dir = None
+
 
 class DataStorage:
     """Handle data storage operations"""
-    
-    def __init__(self, data_dir: str = 'data'):
+
+    JOURNAL_SUFFIX = '.journal'
+    LOCK_SUFFIX = '.lock'
+    PROJECTS_DIR = 'projects'
+    MANIFEST_FILE = 'manifest.json'
+    FILE_EXTENSIONS = {'json': '.json', 'binary': '.vbs'}
+
+    def __init__(self, data_dir: str = 'data', flush_interval: Optional[float] = None,
+                 journal_max_entries: Optional[int] = None, cache_size: Optional[int] = None,
+                 sheet_format: Optional[str] = None):
         """
         Initialize data storage
-        
+
         Args:
             data_dir: Directory to store data files
+            flush_interval: Seconds between journal compactions (defaults to
+                AUTOSAVE_INTERVAL; 0 compacts on every edit)
+            journal_max_entries: Journal size that triggers an immediate compaction
+            cache_size: Maximum number of parsed sheets kept in memory
+            sheet_format: Format used when writing sheet files ('json' or 'binary')
         """
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
-    
+
+        if flush_interval is None:
+            flush_interval = Config.AUTOSAVE_INTERVAL if Config.ENABLE_AUTOSAVE else 0
+        if journal_max_entries is None:
+            journal_max_entries = Config.JOURNAL_MAX_ENTRIES
+        if cache_size is None:
+            cache_size = Config.SHEET_CACHE_SIZE
+        if sheet_format is None:
+            sheet_format = Config.SHEET_FORMAT
+        if sheet_format not in self.FILE_EXTENSIONS:
+            raise ValueError(f'Unknown sheet format: {sheet_format}')
+        self.sheet_format = sheet_format
+        self.flush_interval = flush_interval
+        self.journal_max_entries = journal_max_entries
+        self.cache_size = cache_size
+
+        # Guards the in-memory state below; file I/O happens under the
+        # per-sheet locks only
+        self._lock = threading.RLock()
+        self._sheet_locks = KeyedLocks()
+        # Sheets with edits not yet compacted into their data file
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # File signature right after our last write of each pending sheet
+        self._pending_signatures: Dict[str, Tuple] = {}
+        self._journal_entries: Dict[str, int] = {}
+        self._flush_timer: Optional[threading.Timer] = None
+        # Parsed clean sheets: sheet name -> [file signature, sheet data, numeric view or None]
+        self._cache: 'OrderedDict[str, list]' = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._cache_evictions = 0
+
+        atexit.register(self.flush)
+
     def get_data_file(self, sheet_name: str) -> Path:
         """
         Get the path to the data file for a sheet
-        
+
+        An existing file in the other format is returned as long as no file in
+        the configured format exists yet.
+
         Args:
             sheet_name: Name of the sheet
-        
+
         Returns:
             Path to the data file
         """
-        return self.data_dir / f'{sheet_name}.json'
-    
+        base = self._sheet_dir(sheet_name) / self._file_stem(sheet_name)
+        preferred = base.with_name(base.name + self.FILE_EXTENSIONS[self.sheet_format])
+        if preferred.exists():
+            return preferred
+        for extension in self.FILE_EXTENSIONS.values():
+            candidate = base.with_name(base.name + extension)
+            if candidate.exists():
+                return candidate
+        return preferred
+
+    def get_journal_file(self, sheet_name: str) -> Path:
+        """
+        Get the path to the edit journal for a sheet
+
+        Args:
+            sheet_name: Name of the sheet
+
+        Returns:
+            Path to the journal file
+        """
+        return self._sheet_dir(sheet_name) / f'{self._file_stem(sheet_name)}{self.JOURNAL_SUFFIX}'
+
+    def get_lock_file(self, sheet_name: str) -> Path:
+        """
+        Get the path to the file lock that serializes writers of a sheet
+
+        Args:
+            sheet_name: Name of the sheet
+
+        Returns:
+            Path to the lock file
+        """
+        return self._sheet_dir(sheet_name) / f'{self._file_stem(sheet_name)}{self.LOCK_SUFFIX}'
+
+    def get_project_dir(self, project_id: int) -> Path:
+        """
+        Get the directory holding every sheet of a project
+
+        Args:
+            project_id: Project ID
+
+        Returns:
+            Path to the project directory
+        """
+        return self.data_dir / self.PROJECTS_DIR / str(project_id)
+
+    def load_project_manifest(self, project_id: int) -> Dict[str, Any]:
+        """
+        Load the manifest of a project's sheets
+
+        Args:
+            project_id: Project ID
+
+        Returns:
+            Dictionary with 'project_id' and 'sheets' (sheet -> size, version, updated_at)
+        """
+        manifest_path = self.get_project_dir(project_id) / self.MANIFEST_FILE
+        if manifest_path.exists():
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {'project_id': project_id, 'sheets': {}}
+
+    def list_project_sheets(self, project_id: int) -> List[str]:
+        """
+        List the storage names of every sheet of a project
+
+        Args:
+            project_id: Project ID
+
+        Returns:
+            List of sheet names (e.g., ['pressupostos_project_1'])
+        """
+        sheets = set(self.load_project_manifest(project_id)['sheets'])
+        # Sheets with only journaled edits are not in the manifest yet
+        for sheet_name in self.pending_sheets():
+            parts = split_project_sheet_name(sheet_name)
+            if parts is not None and parts[0] == project_id:
+                sheets.add(parts[1])
+        return [project_sheet_name(project_id, sheet) for sheet in sorted(sheets)]
+
+    def copy_project_data(self, source_project_id: int, target_project_id: int) -> List[str]:
+        """
+        Copy every sheet of a project to another project
+
+        Args:
+            source_project_id: Project to copy from
+            target_project_id: Project to copy to (must not have sheets yet)
+
+        Returns:
+            List of the new sheet names
+        """
+        for sheet_name in self.list_project_sheets(source_project_id):
+            self.flush(sheet_name)
+
+        source_dir = self.get_project_dir(source_project_id)
+        target_dir = self.get_project_dir(target_project_id)
+        if not source_dir.exists():
+            return []
+        shutil.copytree(source_dir, target_dir)
+
+        with self._manifest_locked(target_project_id):
+            manifest = self.load_project_manifest(target_project_id)
+            manifest['project_id'] = target_project_id
+            self._write_manifest(target_project_id, manifest)
+        return self.list_project_sheets(target_project_id)
+
+    def delete_project_data(self, project_id: int) -> List[str]:
+        """
+        Remove every sheet of a project
+
+        Args:
+            project_id: Project ID
+
+        Returns:
+            List of the removed sheet names
+        """
+        detached = self.detach_project_data(project_id)
+        detached.discard()
+        return detached.sheets
+
+    def detach_project_data(self, project_id: int) -> DetachedProjectData:
+        """
+        Take every sheet of a project out of the store, reversibly
+
+        Pending journaled edits are compacted first, so restore() brings back
+        the sheets exactly as they were.
+
+        Args:
+            project_id: Project ID
+
+        Returns:
+            DetachedProjectData to restore() or discard()
+        """
+        sheets = self.list_project_sheets(project_id)
+        project_dir = self.get_project_dir(project_id)
+        for sheet_name in sheets:
+            self.flush(sheet_name)
+            with self._locked(sheet_name):
+                self._forget(sheet_name)
+
+        if not project_dir.exists():
+            return DetachedProjectData(sheets)
+        trash_dir = project_dir.with_name(f'.deleting-{project_id}-{uuid.uuid4().hex}')
+        # No lock is held here: Windows can't rename a directory with open lock files
+        os.replace(project_dir, trash_dir)
+        return DetachedProjectData(sheets, project_dir, trash_dir)
+
     def load_sheet_data(self, sheet_name: str) -> Dict[str, Any]:
         """
-        Load sheet data from file
-        
+        Load sheet data, including edits that are still only in the journal
+
         Args:
             sheet_name: Name of the sheet
-        
+
         Returns:
             Dictionary with sheet data, or empty dict if file doesn't exist
         """
-        file_path = self.get_data_file(sheet_name)
-        if file_path.exists():
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
-    
-    def save_sheet_data(self, sheet_name: str, data: Dict[str, Any]):
+        with self._locked(sheet_name, exclusive=False):
+            return copy_sheet(self._current(sheet_name))
+
+    def load_sheets(self, sheet_names: List[str]) -> Dict[str, Dict[str, Any]]:
         """
-        Save sheet data to file
-        
+        Load several sheets, e.g. every sheet of a project
+
+        Args:
+            sheet_names: Names of the sheets
+
+        Returns:
+            Dictionary of sheet name -> sheet data (empty dict if missing)
+        """
+        return {sheet_name: self.load_sheet_data(sheet_name) for sheet_name in sheet_names}
+
+    def load_sheet_values(self, sheet_name: str) -> Dict[str, Any]:
+        """
+        Load sheet data with numeric cells as floats, for calculations
+
+        Binary sheets already store numbers as float64; JSON sheets are
+        converted once per cached version of the file.
+
+        Args:
+            sheet_name: Name of the sheet
+
+        Returns:
+            Dictionary with sheet data where numeric cells are floats
+        """
+        with self._locked(sheet_name, exclusive=False):
+            sheet_data = self._current(sheet_name)
+            with self._lock:
+                entry = self._cache.get(sheet_name)
+            if entry is None or entry[1] is not sheet_data:
+                # Pending edits, or cache disabled: build the view directly
+                return self._numeric_view(sheet_data)
+            if entry[2] is None:
+                file_path = self.get_data_file(sheet_name)
+                blob = file_path.read_bytes() if file_path.exists() else b''
+                if is_binary_sheet(blob) and not self.get_journal_file(sheet_name).exists():
+                    entry[2] = decode_sheet(blob, numeric=True)
+                else:
+                    entry[2] = self._numeric_view(sheet_data)
+            return copy_sheet(entry[2])
+
+    def export_sheet_json(self, sheet_name: str) -> str:
+        """
+        Export a sheet as pretty-printed JSON, whatever format it is stored in
+
+        Args:
+            sheet_name: Name of the sheet
+
+        Returns:
+            JSON document
+        """
+        return json.dumps(self.load_sheet_data(sheet_name), ensure_ascii=False, indent=2)
+
+    def save_sheet_data(self, sheet_name: str, data: Dict[str, Any],
+                        expected_version: Optional[int] = None) -> int:
+        """
+        Save sheet data to file, replacing any pending journaled edits
+
         Args:
             sheet_name: Name of the sheet
             data: Dictionary with sheet data
+            expected_version: Version the caller based the data on, or None
+                to overwrite unconditionally
+
+        Returns:
+            New version of the sheet
+
+        Raises:
+            SheetVersionConflict: If the sheet is no longer at expected_version
+        """
+        with self._locked(sheet_name):
+            current = self._current(sheet_name)
+            self._check_version(sheet_name, current, expected_version)
+
+            data = copy_sheet(data)
+            data['version'] = sheet_version(current) + 1
+            self._drop_pending(sheet_name)
+            self._write_sheet_file(sheet_name, data)
+            self._discard_journal(sheet_name)
+            self._cache_put(sheet_name, data)
+            return data['version']
+
+    def save_sheets(self, sheets: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Save several sheets, e.g. every sheet of a new project
+
+        Each project manifest is rewritten once for all of its sheets instead
+        of once per sheet.
+
+        Args:
+            sheets: Dictionary of sheet name -> sheet data
+
+        Returns:
+            Dictionary of sheet name -> new version
+        """
+        versions = {}
+        manifest_entries: Dict[int, Dict[str, Any]] = {}
+        for sheet_name, sheet_data in sheets.items():
+            with self._locked(sheet_name):
+                data = copy_sheet(sheet_data)
+                data['version'] = sheet_version(self._current(sheet_name)) + 1
+                self._drop_pending(sheet_name)
+                entry = self._write_sheet_file(sheet_name, data, update_manifest=False)
+                self._discard_journal(sheet_name)
+                self._cache_put(sheet_name, data)
+                versions[sheet_name] = data['version']
+
+            parts = split_project_sheet_name(sheet_name)
+            if parts is not None:
+                manifest_entries.setdefault(parts[0], {})[parts[1]] = entry
+
+        for project_id, entries in manifest_entries.items():
+            with self._manifest_locked(project_id):
+                manifest = self.load_project_manifest(project_id)
+                manifest['sheets'].update(entries)
+                self._write_manifest(project_id, manifest)
+        return versions
+
+    def update_cell(self, sheet_name: str, row_name: str, column_index: int, value: Any,
+                    expected_version: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Update a single cell through the write-behind journal
+
+        Args:
+            sheet_name: Name of the sheet
+            row_name: Name of the row (first cell of the row)
+            column_index: Index of the column to update
+            value: New cell value
+            expected_version: Version the caller based the edit on, or None
+
+        Returns:
+            Copy of the updated sheet data
+        """
+        return self.update_cells(sheet_name, [
+            {'row_name': row_name, 'column_index': column_index, 'value': value}
+        ], expected_version)
+
+    def update_cells(self, sheet_name: str, edits: List[Dict[str, Any]],
+                     expected_version: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Update several cells through the write-behind journal
+
+        The edits are applied in memory and appended to the sheet journal in a
+        single write; the sheet file itself is rewritten later by flush().
+
+        Args:
+            sheet_name: Name of the sheet
+            edits: List of {'row_name', 'column_index', 'value'} dictionaries
+            expected_version: Version the caller based the edits on, or None
+                to apply them unconditionally
+
+        Returns:
+            Copy of the updated sheet data
+
+        Raises:
+            SheetVersionConflict: If the sheet is no longer at expected_version
+        """
+        edits = [
+            {'row_name': edit['row_name'], 'column_index': edit['column_index'], 'value': edit['value']}
+            for edit in edits
+        ]
+
+        with self._locked(sheet_name):
+            sheet_data = self._get_working_copy(sheet_name)
+            self._check_version(sheet_name, sheet_data, expected_version)
+            for edit in edits:
+                apply_cell_edit(sheet_data, edit['row_name'], edit['column_index'], edit['value'])
+            sheet_data['version'] = sheet_version(sheet_data) + 1
+
+            with self._lock:
+                self._pending[sheet_name] = sheet_data
+            self._append_journal(sheet_name, edits, sheet_data['version'])
+            result = copy_sheet(sheet_data)
+
+            if self.flush_interval <= 0 or self._journal_entries[sheet_name] >= self.journal_max_entries:
+                self.flush(sheet_name)
+            else:
+                self._schedule_flush()
+
+        return result
+
+    def flush(self, sheet_name: Optional[str] = None):
+        """
+        Compact pending journaled edits into the sheet files
+
+        Args:
+            sheet_name: Sheet to flush, or None to flush every pending sheet
+        """
+        names = [sheet_name] if sheet_name is not None else self.pending_sheets()
+        for name in names:
+            with self._locked(name):
+                sheet_data = self._pending.get(name)
+                if sheet_data is None:
+                    continue
+                if not self._pending_is_current(name):
+                    # Another worker changed the files since our last write and
+                    # now owns the sheet; our edits are already in its journal
+                    self._drop_pending(name)
+                    continue
+                # The sheet file is written before the journal is removed, so a
+                # crash in between only replays edits that are already applied
+                self._write_sheet_file(name, sheet_data)
+                self._discard_journal(name)
+                self._drop_pending(name)
+                # The pending copy is owned by storage, so it can be cached as is
+                self._cache_put(name, sheet_data)
+
+        with self._lock:
+            if not self._pending and self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+
+    def pending_sheets(self) -> List[str]:
+        """
+        List sheets with edits that have not been compacted yet
+
+        Returns:
+            List of sheet names
+        """
+        with self._lock:
+            return list(self._pending)
+
+    def cache_stats(self) -> Dict[str, int]:
+        """
+        Get parsed-sheet cache counters
+
+        Returns:
+            Dictionary with hits, misses, evictions, size and max_size
+        """
+        with self._lock:
+            return {
+                'hits': self._cache_hits,
+                'misses': self._cache_misses,
+                'evictions': self._cache_evictions,
+                'size': len(self._cache),
+                'max_size': self.cache_size
+            }
+
+    def _locked(self, sheet_name: str, exclusive: bool = True):
+        """Hold the thread and file lock of a sheet"""
+        return self._sheet_locks.hold(sheet_name, self.get_lock_file(sheet_name), exclusive)
+
+    def _manifest_locked(self, project_id: int):
+        """Hold the lock of a project manifest"""
+        lock_path = self.get_project_dir(project_id) / f'manifest{self.LOCK_SUFFIX}'
+        return self._sheet_locks.hold(f'manifest:{project_id}', lock_path)
+
+    @staticmethod
+    def _check_version(sheet_name: str, sheet_data: Dict[str, Any], expected_version: Optional[int]):
+        if expected_version is not None and expected_version != sheet_version(sheet_data):
+            raise SheetVersionConflict(sheet_name, expected_version, sheet_version(sheet_data))
+
+    def _current(self, sheet_name: str) -> Dict[str, Any]:
+        """
+        Return the latest state of a sheet: its pending edits or the parsed file
+
+        Must be called with the sheet lock held. The returned dictionary is
+        owned by storage and must not be modified.
+        """
+        if sheet_name in self._pending:
+            if self._pending_is_current(sheet_name):
+                return self._pending[sheet_name]
+            # Another worker wrote the sheet since: reload it from its files
+            self._drop_pending(sheet_name)
+        sheet_data = self._load_clean(sheet_name)
+        # Loading may have replayed a leftover journal into the pending set
+        return self._pending.get(sheet_name, sheet_data)
+
+    def _get_working_copy(self, sheet_name: str) -> Dict[str, Any]:
+        """Return the mutable in-memory sheet used to apply edits"""
+        sheet_data = self._current(sheet_name)
+        if self._pending.get(sheet_name) is sheet_data:
+            return sheet_data
+        return copy_sheet(sheet_data)
+
+    def _pending_is_current(self, sheet_name: str) -> bool:
+        return self._pending_signatures.get(sheet_name) == self._file_signature(sheet_name)
+
+    def _drop_pending(self, sheet_name: str):
+        with self._lock:
+            self._pending.pop(sheet_name, None)
+            self._pending_signatures.pop(sheet_name, None)
+
+    def _load_clean(self, sheet_name: str) -> Dict[str, Any]:
+        """
+        Return the parsed sheet from the cache, re-reading it if the files changed
+
+        The returned dictionary is shared with the cache and must not be modified.
         """
+        signature = self._file_signature(sheet_name)
+        with self._lock:
+            cached = self._cache.get(sheet_name)
+            if cached is not None and cached[0] == signature:
+                self._cache.move_to_end(sheet_name)
+                self._cache_hits += 1
+                return cached[1]
+            self._cache_misses += 1
+
+        sheet_data = self._read_sheet_file(sheet_name)
+        if self._replay_journal(sheet_name, sheet_data):
+            # Edits from a previous run or another worker: keep them pending so
+            # they get compacted on the next flush
+            with self._lock:
+                self._pending[sheet_name] = copy_sheet(sheet_data)
+                self._pending_signatures[sheet_name] = signature
+            self._schedule_flush()
+        self._cache_store(sheet_name, signature, sheet_data)
+        return sheet_data
+
+    def _file_signature(self, sheet_name: str) -> Tuple:
+        """Identify the on-disk state of a sheet by mtime and size of its files"""
+        signature = []
+        for path in (self.get_data_file(sheet_name), self.get_journal_file(sheet_name)):
+            try:
+                stat = path.stat()
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _cache_put(self, sheet_name: str, sheet_data: Dict[str, Any]):
+        self._cache_store(sheet_name, self._file_signature(sheet_name), sheet_data)
+
+    def _cache_store(self, sheet_name: str, signature: Tuple, sheet_data: Dict[str, Any]):
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[sheet_name] = [signature, sheet_data, None]
+            self._cache.move_to_end(sheet_name)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+                self._cache_evictions += 1
+
+    def _read_sheet_file(self, sheet_name: str) -> Dict[str, Any]:
         file_path = self.get_data_file(sheet_name)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        if not file_path.exists():
+            return {}
+        blob = file_path.read_bytes()
+        if is_binary_sheet(blob):
+            return decode_sheet(blob)
+        return json.loads(blob.decode('utf-8'))
+
+    def _write_sheet_file(self, sheet_name: str, data: Dict[str, Any],
+                          update_manifest: bool = True) -> Dict[str, Any]:
+        """Write a sheet file and return its manifest entry (size, version, updated_at)"""
+        base = self._sheet_dir(sheet_name) / self._file_stem(sheet_name)
+        file_path = base.with_name(base.name + self.FILE_EXTENSIONS[self.sheet_format])
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = file_path.with_name(file_path.name + '.tmp')
+        if self.sheet_format == 'binary':
+            with open(tmp_path, 'wb') as f:
+                f.write(encode_sheet(data))
+        else:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, file_path)
+
+        # Drop a copy left in the other format so it can't shadow this one
+        for extension in self.FILE_EXTENSIONS.values():
+            stale = base.with_name(base.name + extension)
+            if stale != file_path and stale.exists():
+                stale.unlink()
+
+        entry = {
+            'size': file_path.stat().st_size,
+            'version': sheet_version(data),
+            'updated_at': datetime.utcnow().isoformat()
+        }
+        parts = split_project_sheet_name(sheet_name)
+        if parts is not None and update_manifest:
+            project_id, sheet = parts
+            with self._manifest_locked(project_id):
+                manifest = self.load_project_manifest(project_id)
+                manifest['sheets'][sheet] = entry
+                self._write_manifest(project_id, manifest)
+        return entry
+
+    def _write_manifest(self, project_id: int, manifest: Dict[str, Any]):
+        manifest_path = self.get_project_dir(project_id) / self.MANIFEST_FILE
+        tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+    def _sheet_dir(self, sheet_name: str) -> Path:
+        parts = split_project_sheet_name(sheet_name)
+        if parts is None:
+            return self.data_dir
+        return self.get_project_dir(parts[0])
+
+    @staticmethod
+    def _file_stem(sheet_name: str) -> str:
+        parts = split_project_sheet_name(sheet_name)
+        return sheet_name if parts is None else parts[1]
+
+    @staticmethod
+    def _numeric_view(sheet_data: Dict[str, Any]) -> Dict[str, Any]:
+        view = copy_sheet(sheet_data)
+        # The first cell is the row label and stays as text
+        view['rows'] = [
+            row[:1] + [numeric_cell(cell) for cell in row[1:]] if isinstance(row, list) else row
+            for row in view.get('rows', [])
+        ]
+        return view
+
+    def _forget(self, sheet_name: str):
+        """Drop every in-memory trace of a sheet (pending edits, journal count, cache)"""
+        self._drop_pending(sheet_name)
+        with self._lock:
+            self._journal_entries.pop(sheet_name, None)
+            self._cache.pop(sheet_name, None)
+
+    def _append_journal(self, sheet_name: str, edits: List[Dict[str, Any]], version: int):
+        self._sheet_dir(sheet_name).mkdir(parents=True, exist_ok=True)
+        with open(self.get_journal_file(sheet_name), 'a', encoding='utf-8') as f:
+            # Every line carries the sheet version after the whole batch
+            for edit in edits:
+                f.write(json.dumps(dict(edit, version=version), ensure_ascii=False) + '\n')
+        signature = self._file_signature(sheet_name)
+        with self._lock:
+            self._journal_entries[sheet_name] = self._journal_entries.get(sheet_name, 0) + len(edits)
+            self._pending_signatures[sheet_name] = signature
+
+    def _replay_journal(self, sheet_name: str, sheet_data: Dict[str, Any]) -> int:
+        """Apply journaled edits to sheet_data and return how many were applied"""
+        journal_path = self.get_journal_file(sheet_name)
+        if not journal_path.exists():
+            return 0
+
+        applied = 0
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    edit = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-write; skip it
+                    continue
+                apply_cell_edit(sheet_data, edit['row_name'], edit['column_index'], edit['value'])
+                if 'version' in edit:
+                    sheet_data['version'] = edit['version']
+                applied += 1
+
+        with self._lock:
+            self._journal_entries[sheet_name] = applied
+        return applied
+
+    def _discard_journal(self, sheet_name: str):
+        with self._lock:
+            self._journal_entries.pop(sheet_name, None)
+        try:
+            self.get_journal_file(sheet_name).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _schedule_flush(self):
+        with self._lock:
+            if self._flush_timer is not None or self.flush_interval <= 0:
+                return
+            self._flush_timer = threading.Timer(self.flush_interval, self._timed_flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _timed_flush(self):
+        with self._lock:
+            self._flush_timer = None
+        self.flush()
+
+
+_storages: Dict[Any, Any] = {}
+_storages_lock = threading.Lock()
+
+
+def get_storage(data_dir: Optional[str] = None):
+    """
+    Get the shared sheet storage configured for the application
+
+    SHEET_STORE selects the JSON file store ('json', default) or the
+    database store ('sql'). All routes must go through the same instance so
+    that they see each other's pending journaled edits.
+
+    Args:
+        data_dir: Directory to store data files (defaults to DATA_DIR)
+
+    Returns:
+        DataStorage or SqlSheetStore instance
+    """
+    from flask import current_app, has_app_context
+
+    app_config = current_app.config if has_app_context() else {}
+    store_kind = app_config.get('SHEET_STORE', Config.SHEET_STORE)
+    if data_dir is None:
+        data_dir = app_config.get('DATA_DIR', Config.DATA_DIR)
+
+    if store_kind == 'sql':
+        key = ('sql',)
+    else:
+        key = ('json', Path(data_dir).resolve())
 
+    with _storages_lock:
+        if key not in _storages:
+            if store_kind == 'sql':
+                from backend.src.models.sheet import SqlSheetStore
+                _storages[key] = SqlSheetStore()
+            else:
+                _storages[key] = DataStorage(data_dir)
+        return _storages[key]
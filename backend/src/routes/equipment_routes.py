@@ -7,8 +7,12 @@ from flask import Blueprint, request, jsonify
 from backend.src import db
 from backend.src.models.equipment import Equipment
 from backend.src.models.project import Project
+from backend.src.services.equipment_service import sync_sheet_equipment
+from backend.src.utils.http_cache import cached_json, make_etag, not_modified
+from backend.src.utils.pagination import (
+    PaginationError, STREAM_BATCH_SIZE, keyset_after, page_params, stream_json_list, wants_stream
+)
 from datetime import datetime
-import json
 
 bp = Blueprint('equipment', __name__, url_prefix='/api/equipment')
 
@@ -18,26 +22,76 @@ def list_equipment(project_id, sheet_key):
     """
     List all equipment for a specific project and sheet
     
+    Query parameters:
+        after_id: Return the equipment after this one (keyset pagination)
+        limit: Page size (default 100 when after_id is given)
+        stream: With 1, stream every equipment as a chunked JSON array
+    
     Args:
         project_id: Project ID
         sheet_key: Sheet key (e.g., 'ativos-tangiveis-equipamento-basico')
     
     Returns:
-        JSON array of equipment
+        JSON array of equipment; pages also carry nextAfterId (None on the last page)
     """
     try:
         # Verify project exists
         project = Project.query.get_or_404(project_id)
+        page = None if wants_stream() else page_params()
         
-        equipment_list = Equipment.query.filter_by(
-            project_id=project_id,
-            sheet_key=sheet_key
-        ).order_by(Equipment.created_at.asc()).all()
+        # Any insert, update or delete changes the count, max id or max updated_at
+        version = db.session.query(
+            db.func.count(Equipment.id),
+            db.func.max(Equipment.id),
+            db.func.max(Equipment.updated_at)
+        ).filter_by(project_id=project_id, sheet_key=sheet_key).one()
+        etag = make_etag('equipment', project_id, sheet_key, *version, page)
         
-        return jsonify({
+        unchanged = not_modified(etag)
+        if unchanged is not None:
+            return unchanged
+        
+        query = (
+            db.select(Equipment)
+            .where(Equipment.project_id == project_id, Equipment.sheet_key == sheet_key)
+            .order_by(Equipment.created_at.asc(), Equipment.id.asc())
+        )
+        
+        if wants_stream():
+            rows = db.session.scalars(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+            return stream_json_list('equipment', rows, Equipment.to_dict, etag=etag)
+        
+        if page is None:
+            return cached_json({
+                'success': True,
+                'equipment': [eq.to_dict() for eq in db.session.scalars(query)]
+            }, etag=etag)
+        
+        after_id, limit = page
+        if after_id is not None:
+            cursor = db.session.execute(
+                db.select(Equipment.created_at, Equipment.id)
+                .where(Equipment.id == after_id, Equipment.project_id == project_id,
+                       Equipment.sheet_key == sheet_key)
+            ).first()
+            if cursor is None:
+                raise PaginationError('after_id não corresponde a um equipamento desta planilha')
+            query = query.where(keyset_after(Equipment.created_at, Equipment.id, *cursor))
+        
+        equipment_list = db.session.scalars(query.limit(limit + 1)).all()
+        has_more = len(equipment_list) > limit
+        equipment_list = equipment_list[:limit]
+        
+        return cached_json({
             'success': True,
-            'equipment': [eq.to_dict() for eq in equipment_list]
-        }), 200
+            'equipment': [eq.to_dict() for eq in equipment_list],
+            'nextAfterId': equipment_list[-1].id if has_more else None
+        }, etag=etag)
+    except PaginationError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -153,10 +207,7 @@ def update_equipment(equipment_id):
             equipment.ano0 = data['ano0']
         
         if 'yearValues' in data:
-            if isinstance(data['yearValues'], dict):
-                equipment.year_values = json.dumps(data['yearValues'])
-            else:
-                equipment.year_values = data['yearValues']
+            equipment.year_values = data['yearValues']
         
         equipment.updated_at = datetime.utcnow()
         db.session.commit()
@@ -208,12 +259,16 @@ def delete_equipment(equipment_id):
 @bp.route('/<int:project_id>/<sheet_key>/bulk', methods=['POST'])
 def save_bulk_equipment(project_id, sheet_key):
     """
-    Save all equipment for a sheet in bulk (replace all)
+    Save all equipment for a sheet in bulk
+    
+    Items with the id of a stored equipment update it, items without an id are
+    created, and stored equipment missing from the list is deleted.
     
     Request body:
         {
             "equipment": [
                 {
+                    "id": 12,
                     "equipmentName": "Máquina A",
                     "ano0": "1000,00",
                     "yearValues": {"2023": "2000,00"}
@@ -223,7 +278,8 @@ def save_bulk_equipment(project_id, sheet_key):
         }
     
     Returns:
-        JSON with saved equipment list
+        JSON with saved equipment list (in request order) and the number of
+        inserted, updated, deleted and unchanged rows
     """
     try:
         # Verify project exists
@@ -232,26 +288,18 @@ def save_bulk_equipment(project_id, sheet_key):
         data = request.get_json()
         equipment_list = data.get('equipment', [])
         
-        # Delete existing equipment for this sheet
-        Equipment.query.filter_by(
-            project_id=project_id,
-            sheet_key=sheet_key
-        ).delete()
-        
-        # Create new equipment
-        saved_equipment = []
-        for eq_data in equipment_list:
-            eq_data['projectId'] = project_id
-            eq_data['sheetKey'] = sheet_key
-            equipment = Equipment.from_dict(eq_data, project_id)
-            db.session.add(equipment)
-            saved_equipment.append(equipment)
+        if not isinstance(equipment_list, list) or not all(isinstance(eq, dict) for eq in equipment_list):
+            return jsonify({
+                'success': False,
+                'error': 'equipment deve ser uma lista de objetos'
+            }), 400
         
-        db.session.commit()
+        saved_equipment, counts = sync_sheet_equipment(project_id, sheet_key, equipment_list)
         
         return jsonify({
             'success': True,
             'equipment': [eq.to_dict() for eq in saved_equipment],
+            'counts': counts,
             'message': f'{len(saved_equipment)} equipamento(s) salvo(s) com sucesso!'
         }), 200
         
@@ -264,4 +312,3 @@ def save_bulk_equipment(project_id, sheet_key):
             'success': False,
             'error': f'Erro ao salvar equipamentos: {str(e)}'
         }), 500
-
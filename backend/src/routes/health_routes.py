@@ -2,8 +2,9 @@
 Health check routes
 """
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, jsonify
 from datetime import datetime
+from ..models.storage import get_storage
 
 bp = Blueprint('health', __name__, url_prefix='/api')
 
@@ -15,6 +16,8 @@ def health_check():
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
         'service': 'Viabiliza+África API',
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'sheet_cache': get_storage().cache_stats(),
+        'database': current_app.extensions.get('database_profile')
     })
 
@@ -1,286 +1,251 @@
 """
 Import routes
-Handle bulk import of data from Excel files
+Handle bulk import of data from Excel, CSV and Parquet files
 """
 
 import pandas as pd
 import io
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from backend.src import db
-from backend.src.models.equipment import Equipment
 from backend.src.models.project import Project
+from backend.src.services.import_service import (
+    DEFAULT_CHUNK_SIZE, DEFAULT_PREVIEW_SIZE, ImportFileError, ImportReport, detect_format,
+    import_chunks, import_summary, read_chunks
+)
+from backend.src.services.import_jobs import ImportJobLimitError, get_import_jobs
+from backend.src.utils.numbers import LOCALES
 
 bp = Blueprint('import', __name__, url_prefix='/api/import')
 
-def normalize_column_names(df):
+def parse_import_form():
     """
-    Normalize column names to standard keys
+    Validate the upload and the form fields of an import request
+    
+    Returns:
+        Tuple (parameters, None), or (None, error response) if the request
+        is invalid. Parameters: file, project (None if the items are only
+        parsed), sheet_key, resume_after, locale (None to infer it per
+        column) and warning.
     """
-    column_map = {
-        'descrição': 'description',
-        'descricao': 'description',
-        'item': 'description',
-        'produto': 'description',
-        'designação': 'description',
-        'quantidade': 'quantity',
-        'qtd': 'quantity',
-        'unidades': 'quantity',
-        'preço unitário': 'unit_price',
-        'preco unitario': 'unit_price',
-        'preço': 'unit_price',
-        'valor': 'unit_price',
-        'custo': 'unit_price',
-        'valor unitário': 'unit_price',
-        'total': 'total',
-        'valor total': 'total',
-        'categoria': 'category',
-        'tipo': 'category',
-        'vida útil': 'lifespan',
-        'vida util': 'lifespan',
-        'anos': 'lifespan'
-    }
+    if 'file' not in request.files:
+        return None, (jsonify({
+            'success': False,
+            'error': 'Nenhum arquivo enviado'
+        }), 400)
+        
+    file = request.files['file']
     
-    # Normalize to lowercase and strip
-    df.columns = [str(c).lower().strip() for c in df.columns]
+    if file.filename == '':
+        return None, (jsonify({
+            'success': False,
+            'error': 'Nome do arquivo vazio'
+        }), 400)
+        
+    # The format is detected from the content
+    try:
+        detect_format(file.stream)
+    except ImportFileError as e:
+        return None, (jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400)
     
-    # Rename columns based on map
-    new_columns = {}
-    for col in df.columns:
-        for key, value in column_map.items():
-            if key in col:
-                new_columns[col] = value
-                break
+    # Items are saved only if a valid project is provided
+    project = None
+    warning = None
+    project_id = request.form.get('project_id')
+    
+    if project_id:
+        try:
+            project_id = int(project_id)
+        except ValueError:
+            warning = 'project_id inválido. Dados processados mas não salvos no banco.'
+        else:
+            project = db.session.get(Project, project_id)
+            if not project:
+                return None, (jsonify({
+                    'success': False,
+                    'error': f'Projeto com ID {project_id} não encontrado'
+                }), 404)
+    
+    try:
+        resume_after = int(request.form.get('resume_after') or 0)
+    except ValueError:
+        resume_after = -1
+    if resume_after < 0:
+        return None, (jsonify({
+            'success': False,
+            'error': 'resume_after deve ser o número de uma linha da folha'
+        }), 400)
+    
+    # Locale of numbers written as text; inferred per column if not given
+    locale = request.form.get('locale') or None
+    if locale is not None and locale not in LOCALES:
+        return None, (jsonify({
+            'success': False,
+            'error': f"locale deve ser um de: {', '.join(LOCALES)}"
+        }), 400)
     
-    return df.rename(columns=new_columns)
+    return {
+        'file': file,
+        'project': project,
+        'sheet_key': request.form.get('sheet_key', 'imported_items'),
+        'resume_after': resume_after,
+        'locale': locale,
+        'warning': warning
+    }, None
 
 @bp.route('/excel', methods=['POST'])
 def import_excel():
     """
-    Import data from Excel file
+    Import data from an Excel, CSV or Parquet file
+    
+    The file is read, normalized and saved in chunks of IMPORT_CHUNK_SIZE
+    rows, so large files are imported in constant memory. Large files should
+    go through POST /api/import/jobs instead, which doesn't hold the request.
+    
+    Each chunk is saved with one bulk INSERT and committed on its own. If an
+    import stops halfway, the error response carries the checkpoint (last
+    committed row); sending the same file with resume_after=checkpoint
+    imports the rest.
     
     Request:
-        File: 'file' (xlsx)
-        Form data: 'project_id', 'sheet_key' (optional)
+        File: 'file' (xlsx, xls, csv or parquet, detected from the content)
+        Form data: 'project_id', 'sheet_key', 'resume_after' and 'locale'
+            (optional; 'pt-AO', 'pt-PT' or 'en' for numbers written as
+            text, inferred per column by default)
         
     Returns:
-        JSON with parsed data
+        JSON with the item counts, the rejected rows, the total value, a
+        preview of the first IMPORT_PREVIEW_SIZE items, the checkpoint and
+        the throughput (rows_per_second)
     """
     try:
-        if 'file' not in request.files:
-            return jsonify({
-                'success': False,
-                'error': 'Nenhum arquivo enviado'
-            }), 400
-            
-        file = request.files['file']
+        params, error = parse_import_form()
+        if error:
+            return error
+        project = params['project']
         
-        if file.filename == '':
-            return jsonify({
-                'success': False,
-                'error': 'Nome do arquivo vazio'
-            }), 400
-            
-        if not file.filename.endswith(('.xlsx', '.xls')):
-            return jsonify({
-                'success': False,
-                'error': 'Formato inválido. Use arquivos Excel (.xlsx, .xls)'
-            }), 400
-            
-        # Read Excel file
+        report = ImportReport(
+            preview_size=current_app.config.get('IMPORT_PREVIEW_SIZE', DEFAULT_PREVIEW_SIZE),
+            resume_after=params['resume_after']
+        )
         try:
-            df = pd.read_excel(file)
+            import_chunks(
+                read_chunks(params['file'].stream, current_app.config.get('IMPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)),
+                project_id=project.id if project else None,
+                sheet_key=params['sheet_key'],
+                report=report,
+                locale=params['locale']
+            )
         except Exception as e:
+            db.session.rollback()
+            # Committed chunks are kept: resume_after=checkpoint continues the import
+            status = 400 if isinstance(e, ImportFileError) else 500
+            if status == 500:
+                current_app.logger.exception('Erro na importação (checkpoint %s)', report.checkpoint)
             return jsonify({
                 'success': False,
-                'error': f'Erro ao ler arquivo Excel: {str(e)}'
-            }), 400
+                'error': str(e),
+                'saved': report.saved,
+                'checkpoint': report.checkpoint
+            }), status
             
         # Check if empty
-        if df.empty:
+        if report.count == 0 and report.skipped == 0:
             return jsonify({
                 'success': False,
                 'error': 'O arquivo está vazio'
             }), 400
-            
-        # Normalize columns
-        df = normalize_column_names(df)
-        
-        # Validate required columns
-        required_cols = ['description'] # Minimal requirement
-        missing = [col for col in required_cols if col not in df.columns]
         
-        if missing:
-            # If description is missing, maybe use the first column?
-            # Let's try to be flexible
-            if len(df.columns) > 0:
-                df = df.rename(columns={df.columns[0]: 'description'})
-            else:
-                return jsonify({
-                    'success': False,
-                    'error': 'Não foi possível identificar a coluna de descrição/item'
-                }), 400
+        result = import_summary(report, project, params['sheet_key'])
+        if params['warning']:
+            result['warning'] = params['warning']
+        return jsonify(result), 200
         
-        # Ensure other columns exist with defaults
-        if 'quantity' not in df.columns:
-            df['quantity'] = 1
-            
-        if 'unit_price' not in df.columns:
-            if 'total' in df.columns:
-                # Try to calc unit price from total / quantity
-                df['unit_price'] = pd.to_numeric(df['total'], errors='coerce') / pd.to_numeric(df['quantity'], errors='coerce')
-            else:
-                df['unit_price'] = 0
-                
-        # Fill NaN values
-        df['description'] = df['description'].fillna('Item sem nome')
-        df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce').fillna(1)
-        df['unit_price'] = pd.to_numeric(df['unit_price'], errors='coerce').fillna(0)
+    except Exception as e:
+        current_app.logger.exception('Erro na importação')
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@bp.route('/jobs', methods=['POST'])
+def create_import_job():
+    """
+    Start an import in the background
+    
+    The upload is spooled to disk and imported by the import thread pool;
+    poll GET /api/import/jobs/<job_id> for its progress and summary.
+    
+    Request:
+        Same as POST /api/import/excel
         
-        # Calculate total if not present
-        if 'total' not in df.columns:
-            df['total'] = df['quantity'] * df['unit_price']
-            
-        # Convert to list of dicts
-        items = []
-        for _, row in df.iterrows():
-            items.append({
-                'description': str(row['description']),
-                'quantity': float(row['quantity']),
-                'unit_price': float(row['unit_price']),
-                'total': float(row['quantity'] * row['unit_price']),
-                'category': str(row['category']) if 'category' in df.columns and not pd.isna(row['category']) else 'Geral'
-            })
+    Returns:
+        JSON with the queued job (202), or 429 if the project already has
+        IMPORT_JOBS_PER_PROJECT imports queued or running
+    """
+    try:
+        params, error = parse_import_form()
+        if error:
+            return error
+        project = params['project']
         
-        # Save to database if project_id and sheet_key are provided
-        project_id = request.form.get('project_id')
-        sheet_key = request.form.get('sheet_key', 'imported_items')
+        try:
+            job = get_import_jobs().submit(
+                params['file'],
+                project_id=project.id if project else None,
+                sheet_key=params['sheet_key'],
+                resume_after=params['resume_after'],
+                locale=params['locale']
+            )
+        except ImportJobLimitError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 429
         
-        if project_id:
-            try:
-                project_id = int(project_id)
-                project = Project.query.get(project_id)
-                
-                if not project:
-                    return jsonify({
-                        'success': False,
-                        'error': f'Projeto com ID {project_id} não encontrado'
-                    }), 404
-                
-                # Save items as equipment entries
-                saved_count = 0
-                for item in items:
-                    try:
-                        # Determine lifespan based on category
-                        lifespan = 10  # Default
-                        category_lower = item['category'].lower()
-                        if 'informatic' in category_lower or 'computador' in category_lower:
-                            lifespan = 4
-                        elif 'mobiliari' in category_lower or 'mesa' in category_lower or 'cadeira' in category_lower:
-                            lifespan = 10
-                        elif 'veiculo' in category_lower or 'viatura' in category_lower:
-                            lifespan = 4
-                        elif 'maquinaria' in category_lower or 'equipamento' in category_lower:
-                            lifespan = 8
-                        
-                        # Format value with AOA currency format (Angola uses comma as decimal separator)
-                        # Convert to string with proper formatting
-                        total_value = item['total']
-                        # Format: 1.234.567,89 (Angola format) - comma for decimal, dot for thousands
-                        if total_value >= 1000:
-                            # Format with thousands separator
-                            formatted_value = f"{total_value:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-                        else:
-                            # No thousands separator needed
-                            formatted_value = f"{total_value:.2f}".replace('.', ',')
-                        
-                        # Create equipment entry
-                        equipment = Equipment(
-                            project_id=project_id,
-                            sheet_key=sheet_key,
-                            equipment_name=item['description'],
-                            ano0=formatted_value,
-                            year_values='{}'
-                        )
-                        db.session.add(equipment)
-                        saved_count += 1
-                    except Exception as e:
-                        print(f"Erro ao salvar item {item['description']}: {e}")
-                        continue
-                
-                db.session.commit()
-                
-                # Get sheet display name for better feedback
-                sheet_display_names = {
-                    'ativos-tangiveis-terrenos': 'Terrenos e Recursos Naturais',
-                    'ativos-tangiveis-edificios': 'Edifícios e Outras Construções',
-                    'ativos-tangiveis-equipamento-basico': 'Equipamento Básico',
-                    'ativos-tangiveis-equipamento-transporte': 'Equipamento de Transporte',
-                    'ativos-tangiveis-equipamento-administrativo': 'Equipamento Administrativo',
-                    'ativos-tangiveis-equipamentos-biologicos': 'Equipamentos Biológicos',
-                    'ativos-intangiveis-goodwill': 'Goodwill',
-                    'ativos-intangiveis-projetos-desenvolvimento': 'Projetos de Desenvolvimento',
-                    'ativos-intangiveis-programas-computador': 'Programas de Computador',
-                    'ativos-intangiveis-propriedade-industrial': 'Propriedade Industrial',
-                    'ativos-intangiveis-outros': 'Outros Ativos Intangíveis'
-                }
-                sheet_name = sheet_display_names.get(sheet_key, sheet_key)
-                
-                # Calculate total value
-                total_value = sum(item['total'] for item in items)
-                # Format with AOA format (comma as decimal separator)
-                if total_value >= 1000:
-                    total_formatted = f"{total_value:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-                else:
-                    total_formatted = f"{total_value:.2f}".replace('.', ',')
-                
-                return jsonify({
-                    'success': True,
-                    'count': len(items),
-                    'saved': saved_count,
-                    'items': items,
-                    'preview': items[:5],
-                    'sheet_key': sheet_key,
-                    'sheet_name': sheet_name,
-                    'total_value': total_value,
-                    'total_formatted': total_formatted,
-                    'currency': project.unidade_monetaria,
-                    'message': f'{saved_count} itens importados e salvos com sucesso na aba "{sheet_name}"!'
-                }), 200
-                
-            except ValueError:
-                return jsonify({
-                    'success': True,
-                    'count': len(items),
-                    'items': items,
-                    'preview': items[:5],
-                    'warning': 'project_id inválido. Dados processados mas não salvos no banco.'
-                }), 200
-            except Exception as e:
-                db.session.rollback()
-                return jsonify({
-                    'success': True,
-                    'count': len(items),
-                    'items': items,
-                    'preview': items[:5],
-                    'warning': f'Dados processados mas erro ao salvar no banco: {str(e)}'
-                }), 200
-            
-        return jsonify({
+        result = {
             'success': True,
-            'count': len(items),
-            'items': items,
-            'preview': items[:5],
-            'message': 'Dados processados com sucesso. Forneça project_id para salvar no banco.'
-        }), 200
+            'job': job.to_dict(),
+            'status_url': f'/api/import/jobs/{job.id}'
+        }
+        if params['warning']:
+            result['warning'] = params['warning']
+        return jsonify(result), 202
         
     except Exception as e:
-        import traceback
-        print(traceback.format_exc())
+        current_app.logger.exception('Erro ao iniciar a importação')
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+@bp.route('/jobs/<job_id>', methods=['GET'])
+def get_import_job(job_id):
+    """
+    Get the progress of a background import
+    
+    Args:
+        job_id: Job ID returned by POST /api/import/jobs
+        
+    Returns:
+        JSON with the job status (queued, running, done or failed), the
+        progress (rows read, saved and rejected, checkpoint, percent when the
+        file tells its size), the rejected rows, and the summary once done
+    """
+    job = get_import_jobs().get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Importação não encontrada'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'job': job.to_dict()
+    }), 200
+
 @bp.route('/template', methods=['GET'])
 def get_template():
     """
@@ -4,45 +4,115 @@ Handle project CRUD operations
 """
 
 from flask import Blueprint, request, jsonify
+from sqlalchemy.exc import IntegrityError
 from backend.src import db
 from backend.src.models.project import Project
+from backend.src.services.projections import MAX_PROJECTION_YEARS
+from backend.src.services.investment_summary import get_investment_summary
+from backend.src.services.project_service import delete_project_cascade
+from backend.src.services.project_snapshot import build_project_snapshot
+from backend.src.services.sheet_templates import bootstrap_project_sheets
+from backend.src.utils.http_cache import cached_json, make_etag, not_modified
+from backend.src.utils.pagination import (
+    PaginationError, STREAM_BATCH_SIZE, keyset_after, page_params, stream_json_list, wants_stream
+)
 from datetime import datetime
 
 bp = Blueprint('projects', __name__, url_prefix='/api/projects')
 
 
+def _project_summary(project):
+    """
+    Serialize a project for listings
+    
+    Args:
+        project: Project
+    
+    Returns:
+        Dictionary representation of the project
+    """
+    try:
+        return project.to_dict()
+    except Exception as e:
+        # Log error but continue with other projects
+        print(f"Error serializing project {project.id}: {e}")
+        # Try to create a basic dict without PIN
+        return {
+            'id': project.id,
+            'nome': project.nome,
+            'primeiroAno': project.primeiro_ano,
+            'numAnos': project.num_anos,
+            'unidadeMonetaria': project.unidade_monetaria,
+            'hasPin': bool(project.pin),
+            'createdAt': project.created_at.isoformat() if project.created_at else None,
+            'updatedAt': project.updated_at.isoformat() if project.updated_at else None
+        }
+
+
 @bp.route('', methods=['GET'])
 def list_projects():
     """
     List all projects
     
+    Query parameters:
+        after_id: Return the projects after this one (keyset pagination)
+        limit: Page size (default 100 when after_id is given)
+        stream: With 1, stream every project as a chunked JSON array
+    
     Returns:
-        JSON array of projects
+        JSON array of projects, newest first; pages also carry nextAfterId
+        (None on the last page)
     """
     try:
-        projects = Project.query.order_by(Project.created_at.desc()).all()
-        projects_list = []
-        for project in projects:
-            try:
-                projects_list.append(project.to_dict())
-            except Exception as e:
-                # Log error but continue with other projects
-                print(f"Error serializing project {project.id}: {e}")
-                # Try to create a basic dict without PIN
-                projects_list.append({
-                    'id': project.id,
-                    'nome': project.nome,
-                    'primeiroAno': project.primeiro_ano,
-                    'numAnos': project.num_anos,
-                    'unidadeMonetaria': project.unidade_monetaria,
-                    'hasPin': bool(project.pin),
-                    'createdAt': project.created_at.isoformat() if project.created_at else None,
-                    'updatedAt': project.updated_at.isoformat() if project.updated_at else None
-                })
-        return jsonify({
+        page = None if wants_stream() else page_params()
+        
+        # Any insert, update or delete changes the count, max id or max updated_at
+        version = db.session.query(
+            db.func.count(Project.id),
+            db.func.max(Project.id),
+            db.func.max(Project.updated_at)
+        ).one()
+        etag = make_etag('projects', *version, page)
+        
+        unchanged = not_modified(etag)
+        if unchanged is not None:
+            return unchanged
+        
+        query = db.select(Project).order_by(Project.created_at.desc(), Project.id.desc())
+        
+        if wants_stream():
+            rows = db.session.scalars(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+            return stream_json_list('projects', rows, _project_summary, etag=etag)
+        
+        if page is None:
+            return cached_json({
+                'success': True,
+                'projects': [_project_summary(project) for project in db.session.scalars(query)]
+            }, etag=etag)
+        
+        after_id, limit = page
+        if after_id is not None:
+            cursor = db.session.execute(
+                db.select(Project.created_at, Project.id).where(Project.id == after_id)
+            ).first()
+            if cursor is None:
+                raise PaginationError('after_id não corresponde a um projeto')
+            query = query.where(keyset_after(Project.created_at, Project.id, *cursor, descending=True))
+        
+        projects = db.session.scalars(query.limit(limit + 1)).all()
+        has_more = len(projects) > limit
+        projects = projects[:limit]
+        
+        return cached_json({
             'success': True,
-            'projects': projects_list
-        }), 200
+            'projects': [_project_summary(project) for project in projects],
+            'nextAfterId': projects[-1].id if has_more else None
+        }, etag=etag)
+    except PaginationError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
@@ -108,10 +178,10 @@ def create_project():
                 'error': 'primeiroAno deve ser um número entre 2000 e 2100'
             }), 400
         
-        if not isinstance(data['numAnos'], int) or data['numAnos'] < 1 or data['numAnos'] > 20:
+        if not isinstance(data['numAnos'], int) or data['numAnos'] < 1 or data['numAnos'] > MAX_PROJECTION_YEARS:
             return jsonify({
                 'success': False,
-                'error': 'numAnos deve ser um número entre 1 e 20'
+                'error': f'numAnos deve ser um número entre 1 e {MAX_PROJECTION_YEARS}'
             }), 400
         
         # Check if project name already exists
@@ -129,37 +199,12 @@ def create_project():
         
         # Apply Angola tax settings if currency is AOA or KZ
         unidade_monetaria = data.get('unidadeMonetaria', '').upper()
-        if unidade_monetaria in ['AOA', 'KZ']:
-            try:
-                from backend.src.config.tax_settings import get_tax_settings
-                from backend.src.models.storage import DataStorage
-                
-                tax_settings = get_tax_settings('ANGOLA')
-                storage = DataStorage()
-                
-                # Initialize pressupostos with Angola tax rates
-                pressupostos_data = {
-                    'title': 'Plano Financeiro',
-                    'subtitle': '1. - Pressupostos do Projeto',
-                    'headers': ['Parâmetro', f'{project.primeiro_ano} (Inicial)'] + [f'{project.primeiro_ano + i}' for i in range(1, project.num_anos + 1)],
-                    'rows': [
-                        ['IVA (%)', str(tax_settings['taxes']['iva'])] + [str(tax_settings['taxes']['iva'])] * project.num_anos,
-                        ['Imposto Industrial (%)', str(tax_settings['taxes']['imposto_industrial'])] + [str(tax_settings['taxes']['imposto_industrial'])] * project.num_anos,
-                        ['Segurança Social Empresa (%)', str(tax_settings['taxes']['inss_patronal'])] + [str(tax_settings['taxes']['inss_patronal'])] * project.num_anos,
-                        ['Segurança Social Trabalhador (%)', str(tax_settings['taxes']['inss_trabalhador'])] + [str(tax_settings['taxes']['inss_trabalhador'])] * project.num_anos,
-                        ['Amortizações Imateriais (%)', str(tax_settings['taxes']['amortizacao_imaterial'])] + [str(tax_settings['taxes']['amortizacao_imaterial'])] * project.num_anos,
-                        ['Inflação (%)', '15.0'] + ['15.0'] * project.num_anos,
-                        ['Câmbio (USD/AOA)', '850.0'] + ['850.0'] * project.num_anos
-                    ]
-                }
-                
-                # Save pressupostos for this project
-                storage.save_sheet_data(f'pressupostos_project_{project.id}', pressupostos_data)
-                
+        try:
+            if bootstrap_project_sheets(project):
                 print(f"✓ Taxas de Angola aplicadas automaticamente ao projeto {project.id}")
-            except Exception as e:
-                print(f"⚠️  Aviso: Não foi possível aplicar taxas de Angola automaticamente: {e}")
-                # Continue anyway - project is already created
+        except Exception as e:
+            print(f"⚠️  Aviso: Não foi possível aplicar taxas de Angola automaticamente: {e}")
+            # Continue anyway - project is already created
         
         return jsonify({
             'success': True,
@@ -167,6 +212,13 @@ def create_project():
             'message': f'Projeto "{project.nome}" criado com sucesso! Taxas de Angola aplicadas automaticamente.' if unidade_monetaria in ['AOA', 'KZ'] else f'Projeto "{project.nome}" criado com sucesso!'
         }), 201
         
+    except IntegrityError:
+        # Another request created a project with the same name after the check above
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': 'Já existe um projeto com este nome'
+        }), 400
     except Exception as e:
         db.session.rollback()
         import traceback
@@ -202,6 +254,58 @@ def get_project(project_id):
         }), 404
 
 
+@bp.route('/<int:project_id>/snapshot', methods=['GET'])
+def get_project_snapshot(project_id):
+    """
+    Get everything needed to open a project in a single call
+    
+    Args:
+        project_id: Project ID
+    
+    Returns:
+        JSON with the project, its equipment grouped by sheet key and its sheets
+    """
+    project = Project.query.get_or_404(project_id)
+    try:
+        return cached_json({
+            'success': True,
+            'snapshot': build_project_snapshot(project)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/<int:project_id>/investment-summary', methods=['GET'])
+def get_project_investment_summary(project_id):
+    """
+    Get the investment and depreciation summary of a project
+    
+    Totals of the ativos tangíveis/intangíveis equipment sheets per year,
+    with depreciation at the AGT rates, computed on the server and cached
+    until equipment of the project changes.
+    
+    Args:
+        project_id: Project ID
+    
+    Returns:
+        JSON with column labels and investment/depreciation rows, subtotals and total
+    """
+    project = Project.query.get_or_404(project_id)
+    try:
+        return cached_json({
+            'success': True,
+            'summary': get_investment_summary(project)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @bp.route('/<int:project_id>', methods=['PUT'])
 def update_project(project_id):
     """
@@ -245,10 +349,10 @@ def update_project(project_id):
             project.primeiro_ano = data['primeiroAno']
         
         if 'numAnos' in data:
-            if not isinstance(data['numAnos'], int) or data['numAnos'] < 1 or data['numAnos'] > 20:
+            if not isinstance(data['numAnos'], int) or data['numAnos'] < 1 or data['numAnos'] > MAX_PROJECTION_YEARS:
                 return jsonify({
                     'success': False,
-                    'error': 'numAnos deve ser um número entre 1 e 20'
+                    'error': f'numAnos deve ser um número entre 1 e {MAX_PROJECTION_YEARS}'
                 }), 400
             project.num_anos = data['numAnos']
         
@@ -264,6 +368,12 @@ def update_project(project_id):
             'message': f'Projeto "{project.nome}" atualizado com sucesso!'
         }), 200
         
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': 'Já existe um projeto com este nome'
+        }), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -275,23 +385,24 @@ def update_project(project_id):
 @bp.route('/<int:project_id>', methods=['DELETE'])
 def delete_project(project_id):
     """
-    Delete a project
+    Delete a project with its equipment and sheets
     
     Args:
         project_id: Project ID
     
     Returns:
-        JSON confirmation
+        JSON confirmation with what was removed (equipment and year value
+        counts, sheet names)
     """
     try:
         project = Project.query.get_or_404(project_id)
         project_name = project.nome
-        db.session.delete(project)
-        db.session.commit()
+        removed = delete_project_cascade(project)
         
         return jsonify({
             'success': True,
-            'message': f'Projeto "{project_name}" deletado com sucesso!'
+            'message': f'Projeto "{project_name}" deletado com sucesso!',
+            'removed': removed
         }), 200
         
     except Exception as e:
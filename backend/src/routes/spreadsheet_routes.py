@@ -2,47 +2,44 @@
 Spreadsheet API routes
 """
 
-from flask import Blueprint, request, jsonify
-from ..models.storage import DataStorage
-from ..services.calculations import recalculate_formulas, calculate_rst
+from flask import Blueprint, Response, request, jsonify
+from ..models.storage import SheetVersionConflict, get_storage, sheet_version
+from ..services.calculations import recalculate_formulas, recalculate_changed, calculate_rst
+from ..services.projections import MAX_PROJECTION_YEARS
+from ..services.sheet_templates import default_sheet
 from ..utils.parsers import parse_value, format_decimal
-from ..config.tax_settings import ANGOLA_TAX_SETTINGS
+from ..utils.http_cache import cached_json, if_match_version, version_etag
 
 bp = Blueprint('spreadsheet', __name__, url_prefix='/api/spreadsheet')
-storage = DataStorage()
+
+
+def _versioned_json(payload: dict, version: int, status: int = 200):
+    """JSON response carrying the sheet version as its ETag"""
+    response = jsonify(payload)
+    response.status_code = status
+    response.set_etag(version_etag(version))
+    return response
+
+
+def _version_conflict(error: SheetVersionConflict):
+    """409 response for a write based on an outdated sheet version"""
+    return _versioned_json({
+        'success': False,
+        'error': 'A planilha foi alterada por outro utilizador. Recarregue-a e tente novamente.',
+        'version': error.current_version
+    }, error.current_version, 409)
 
 
 @bp.route('/<sheet_name>', methods=['GET'])
 def get_spreadsheet(sheet_name: str):
     """Get spreadsheet data"""
-    data = storage.load_sheet_data(sheet_name)
+    data = get_storage().load_sheet_data(sheet_name)
     
     if not data:
-        # Return default structure
-        default_response = {
-            'title': 'Plano Financeiro',
-            'subtitle': f'{sheet_name}',
-            'headers': ['Parâmetro', 'Inicial', 'Ano 1', 'Ano 2', 'Ano 3', 'Ano 4', 'Ano 5'],
-            'rows': []
-        }
-        
-        # Inject Angola Tax Settings if it's the 'pressupostos' sheet
-        if sheet_name == 'pressupostos':
-            taxes = ANGOLA_TAX_SETTINGS['taxes']
-            rows = [
-                ['IVA (%)', str(taxes['iva'])] + [''] * 5,
-                ['Imposto Industrial (%)', str(taxes['imposto_industrial'])] + [''] * 5,
-                ['Segurança Social Empresa (%)', str(taxes['inss_patronal'])] + [''] * 5,
-                ['Segurança Social Trabalhador (%)', str(taxes['inss_trabalhador'])] + [''] * 5,
-                ['Amortizações Imateriais (%)', str(taxes['amortizacao_imaterial'])] + [''] * 5,
-                ['Inflação (%)', '15.0'] + [''] * 5, # Default inflation estimate
-                ['Câmbio (USD/AOA)', '850.0'] + [''] * 5 # Default exchange rate estimate
-            ]
-            default_response['rows'] = rows
-            
-        return jsonify(default_response)
+        # Return default structure (compiled once in services/sheet_templates)
+        return cached_json(default_sheet(sheet_name), etag=version_etag(0))
     
-    return jsonify(data)
+    return cached_json(data, etag=version_etag(sheet_version(data)))
 
 
 @bp.route('/update', methods=['POST'])
@@ -58,40 +55,63 @@ def update_spreadsheet():
         if not all([row_name, column_index is not None, value is not None]):
             return jsonify({'error': 'Missing required fields'}), 400
         
-        # Load current sheet data
-        sheet_data = storage.load_sheet_data(sheet_name)
+        # Apply the edit through the write-behind journal
+        base_version = if_match_version()
+        sheet_data = get_storage().update_cell(sheet_name, row_name, column_index, value,
+                                               expected_version=base_version)
+        
+        # Recalculate only the formulas affected since the version the client had
+        calculated_values = recalculate_changed(sheet_data, sheet_name, base_version)
         
-        if 'rows' not in sheet_data:
-            sheet_data['rows'] = []
+        return _versioned_json({
+            'success': True,
+            'version': sheet_version(sheet_data),
+            'calculated_values': calculated_values
+        }, sheet_version(sheet_data))
+    
+    except SheetVersionConflict as e:
+        return _version_conflict(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/<sheet_name>/update/batch', methods=['POST'])
+def update_spreadsheet_batch(sheet_name: str):
+    """Update several cells in the spreadsheet with a single load, recalculation and write"""
+    try:
+        data = request.json or {}
+        edits = data.get('edits')
         
-        # Find the row
-        row_found = False
-        for row in sheet_data['rows']:
-            if row and len(row) > 0 and row[0] == row_name:
-                # Ensure row has enough columns
-                while len(row) <= column_index:
-                    row.append('')
-                row[column_index] = value
-                row_found = True
-                break
+        if not isinstance(edits, list) or not edits:
+            return jsonify({'error': 'edits must be a non-empty list'}), 400
         
-        if not row_found:
-            # Create new row
-            new_row = [row_name] + [''] * (column_index)
-            new_row.append(value)
-            sheet_data['rows'].append(new_row)
+        for idx, edit in enumerate(edits):
+            if not isinstance(edit, dict):
+                return jsonify({'error': f'Invalid edit at index {idx}'}), 400
+            row_name = edit.get('row_name')
+            column_index = edit.get('column_index')
+            value = edit.get('value')
+            if not all([row_name, column_index is not None, value is not None]):
+                return jsonify({'error': f'Missing required fields in edit at index {idx}'}), 400
+            if not isinstance(column_index, int) or column_index < 0:
+                return jsonify({'error': f'Invalid column_index in edit at index {idx}'}), 400
         
-        # Recalculate formulas
-        calculated_values = recalculate_formulas(sheet_data, sheet_name)
+        # Apply every edit through the storage in one go
+        base_version = if_match_version()
+        sheet_data = get_storage().update_cells(sheet_name, edits, expected_version=base_version)
         
-        # Save updated data
-        storage.save_sheet_data(sheet_name, sheet_data)
+        # Recalculate the affected formulas once for the whole batch
+        calculated_values = recalculate_changed(sheet_data, sheet_name, base_version)
         
-        return jsonify({
+        return _versioned_json({
             'success': True,
+            'updated': len(edits),
+            'version': sheet_version(sheet_data),
             'calculated_values': calculated_values
-        })
+        }, sheet_version(sheet_data))
     
+    except SheetVersionConflict as e:
+        return _version_conflict(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -100,7 +120,7 @@ def update_spreadsheet():
 def calculate_spreadsheet(sheet_name: str):
     """Recalculate all formulas in a spreadsheet"""
     try:
-        sheet_data = storage.load_sheet_data(sheet_name)
+        sheet_data = get_storage().load_sheet_values(sheet_name)
         calculated_values = recalculate_formulas(sheet_data, sheet_name)
         
         return jsonify({
@@ -112,14 +132,34 @@ def calculate_spreadsheet(sheet_name: str):
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/<sheet_name>/export', methods=['GET'])
+def export_spreadsheet(sheet_name: str):
+    """Download a spreadsheet as JSON, whatever format it is stored in"""
+    try:
+        storage = get_storage()
+        if not storage.load_sheet_data(sheet_name):
+            return jsonify({'error': 'Planilha não encontrada'}), 404
+        
+        return Response(
+            storage.export_sheet_json(sheet_name),
+            mimetype='application/json',
+            headers={'Content-Disposition': f'attachment; filename={sheet_name}.json'}
+        )
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @bp.route('/<sheet_name>/save', methods=['POST'])
 def save_spreadsheet(sheet_name: str):
     """Save entire spreadsheet"""
     try:
         data = request.json
-        storage.save_sheet_data(sheet_name, data)
-        return jsonify({'success': True})
+        version = get_storage().save_sheet_data(sheet_name, data, expected_version=if_match_version())
+        return _versioned_json({'success': True, 'version': version}, version)
     
+    except SheetVersionConflict as e:
+        return _version_conflict(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -141,7 +181,7 @@ def calculate_rst_endpoint():
                         row_name = row[0]
                         if 'Rendimentos' in row_name or 'Vendas' in row_name:
                             # Sum all revenue sources for each year
-                            for col_idx in range(1, min(7, len(row))):
+                            for col_idx in range(1, min(2 + MAX_PROJECTION_YEARS, len(row))):
                                 year_key = f'Ano {col_idx}'
                                 if year_key not in rendimentos:
                                     rendimentos[year_key] = 0
@@ -2,8 +2,19 @@
 Business logic and calculation services
 """
 
-from typing import Dict
+import threading
+from typing import Dict, Optional, Tuple
+import numpy as np
 from ..utils.parsers import parse_value, format_decimal
+from .formula_engine import FormulaEngine
+from .projections import MAX_PROJECTION_YEARS, inflation_index_kernel, rst_kernel
+
+INFLATION_INDEX_ROW = 'Índice de Inflação'
+INFLATION_RATE_ROW = 'Taxa de Inflação'
+
+# Formula engines kept between requests: sheet name -> (layout, version, engine)
+_sheet_engines: Dict[str, Tuple[tuple, Optional[int], FormulaEngine]] = {}
+_sheet_engines_lock = threading.Lock()
 
 
 def calculate_inflation_index(inflation_rate: float, previous_index: float) -> float:
@@ -34,20 +45,121 @@ def calculate_rst(rendimentos: Dict[str, float], percentage: float = 0.0) -> Dic
     Returns:
         Dictionary with calculated RST values per year
     """
-    rst_values = {}
+    if not rendimentos:
+        return {}
     
-    if percentage > 0:
-        # Use percentage of revenue
-        for year, revenue in rendimentos.items():
-            rst_values[year] = revenue * (percentage / 100)
-    else:
-        # Default: use average monthly revenue as RST
-        # 1.5 months of revenue as safety buffer
-        for year, revenue in rendimentos.items():
-            monthly_revenue = revenue / 12
-            rst_values[year] = monthly_revenue * 1.5
+    # Default (no percentage): 1.5 months of average monthly revenue as safety buffer
+    years = list(rendimentos)
+    rst_array = rst_kernel([rendimentos[year] for year in years], percentage)
+    return dict(zip(years, rst_array.tolist()))
+
+
+def _pressupostos_layout(sheet_data: dict) -> tuple:
+    """
+    Describe which formula cells the pressupostos sheet needs
+
+    Two sheets with the same layout get the same dependency graph, only
+    their input values differ.
+    """
+    row_indices = {}
+    for idx, row in enumerate(sheet_data.get('rows', [])):
+        if row and len(row) > 0:
+            row_indices[row[0]] = idx
+
+    index_idx = row_indices.get(INFLATION_INDEX_ROW)
+    rate_idx = row_indices.get(INFLATION_RATE_ROW)
+    rate_columns = 0
+    if index_idx is not None and rate_idx is not None:
+        # Column 1 = Inicial, Columns 2.. = one per projection year
+        rate_columns = min(2 + MAX_PROJECTION_YEARS, len(sheet_data['rows'][rate_idx]))
+    return (index_idx, rate_idx, rate_columns)
+
+
+def _pressupostos_inputs(sheet_data: dict, layout: tuple) -> dict:
+    """Parse the input cells of the inflation chain"""
+    index_idx, rate_idx, rate_columns = layout
+    if index_idx is None:
+        return {}
+
+    rows = sheet_data.get('rows', [])
+    index_row = rows[index_idx]
+    inputs = {(INFLATION_INDEX_ROW, 1): parse_value(index_row[1] if len(index_row) > 1 else '1')}
+
+    if rate_idx is not None:
+        rate_row = rows[rate_idx]
+        for col_idx in range(2, rate_columns):
+            inputs[(INFLATION_RATE_ROW, col_idx)] = parse_value(rate_row[col_idx])
+    return inputs
+
+
+def build_pressupostos_engine(layout: tuple) -> FormulaEngine:
+    """
+    Build the dependency graph of the pressupostos sheet
+
+    Índice de Inflação (n) depends on Taxa de Inflação (n) and
+    Índice de Inflação (n-1).
+
+    Args:
+        layout: Layout returned by _pressupostos_layout
+
+    Returns:
+        FormulaEngine with the inflation chain defined
+    """
+    engine = FormulaEngine()
+    index_idx, rate_idx, rate_columns = layout
+    if index_idx is None or rate_idx is None:
+        return engine
+
+    for col_idx in range(2, rate_columns):
+        engine.define(
+            (INFLATION_INDEX_ROW, col_idx),
+            calculate_inflation_index,
+            [(INFLATION_RATE_ROW, col_idx), (INFLATION_INDEX_ROW, col_idx - 1)]
+        )
+    return engine
+
+
+def _format_calculated(values: dict) -> dict:
+    return {f'{row_name}-{col_idx}': format_decimal(value) for (row_name, col_idx), value in values.items()}
+
+
+def recalculate_inflation_portfolio(sheets: Dict[str, dict]) -> Dict[str, dict]:
+    """
+    Recalculate the inflation index chain of many pressupostos sheets at once
+    
+    The inflation rates of every sheet are stacked into one (sheets x years)
+    matrix, so the whole portfolio is recalculated by a single cumulative
+    product instead of a Python loop per sheet and per year.
     
-    return rst_values
+    Args:
+        sheets: Dictionary of sheet name -> sheet data
+    
+    Returns:
+        Dictionary of sheet name -> calculated values
+    """
+    layouts = {name: _pressupostos_layout(data) for name, data in sheets.items()}
+    chains = {name: layout for name, layout in layouts.items() if layout[2] > 2}
+    results = {name: {} for name in sheets}
+    if not chains:
+        return results
+    
+    names = list(chains)
+    rates = np.zeros((len(names), MAX_PROJECTION_YEARS))
+    initial = np.ones(len(names))
+    for i, name in enumerate(names):
+        inputs = _pressupostos_inputs(sheets[name], chains[name])
+        initial[i] = inputs[(INFLATION_INDEX_ROW, 1)]
+        for col_idx in range(2, chains[name][2]):
+            rates[i, col_idx - 2] = inputs[(INFLATION_RATE_ROW, col_idx)]
+    
+    indices = inflation_index_kernel(rates, initial)
+    
+    for i, name in enumerate(names):
+        results[name] = {
+            f'{INFLATION_INDEX_ROW}-{col_idx}': format_decimal(float(indices[i, col_idx - 2]))
+            for col_idx in range(2, chains[name][2])
+        }
+    return results
 
 
 def recalculate_formulas(sheet_data: dict, sheet_name: str) -> dict:
@@ -64,30 +176,47 @@ def recalculate_formulas(sheet_data: dict, sheet_name: str) -> dict:
     if sheet_name != 'pressupostos':
         return {}
     
-    calculated_values = {}
-    rows = sheet_data.get('rows', [])
+    return recalculate_inflation_portfolio({sheet_name: sheet_data})[sheet_name]
+
+
+def recalculate_changed(sheet_data: dict, sheet_name: str, base_version: Optional[int] = None) -> dict:
+    """
+    Recalculate only the formulas affected by changes since base_version
     
-    # Find row indices
-    row_indices = {}
-    for idx, row in enumerate(rows):
-        if row and len(row) > 0:
-            row_indices[row[0]] = idx
+    The dependency graph of each sheet is kept between calls, together with
+    the sheet version its inputs were taken from. When that is the version the
+    client based its edit on, input cells are compared with the values the
+    engine already holds and only the formula cells downstream of the ones that
+    differ are recomputed. Otherwise (no base version, the first call for a
+    sheet, a changed layout, or a sheet written by another process since the
+    engine was filled) every formula value is returned, because the client's
+    values can't be diffed against the engine's.
+    
+    Args:
+        sheet_data: Dictionary containing sheet data
+        sheet_name: Name of the sheet
+        base_version: Version of the sheet the client's edit was based on
+            (e.g., from If-Match), or None if unknown
     
-    # Get initial inflation index
-    if 'Índice de Inflação' in row_indices:
-        idx_row = row_indices['Índice de Inflação']
-        initial_index = parse_value(rows[idx_row][1] if len(rows[idx_row]) > 1 else '1')
-        previous_index = initial_index
+    Returns:
+        Dictionary with the calculated values that changed
+    """
+    if sheet_name != 'pressupostos':
+        return {}
+    
+    layout = _pressupostos_layout(sheet_data)
+    inputs = _pressupostos_inputs(sheet_data, layout)
+    version = sheet_data.get('version')
+    
+    with _sheet_engines_lock:
+        cached = _sheet_engines.get(sheet_name)
+        if cached is None or cached[0] != layout or base_version is None or cached[1] != base_version:
+            engine = build_pressupostos_engine(layout)
+            for cell, value in inputs.items():
+                engine.set_input(cell, value)
+            _sheet_engines[sheet_name] = (layout, version, engine)
+            return _format_calculated(engine.evaluate_all())
         
-        # Calculate inflation index for each year
-        # Column 1 = 2022 (Inicial), Columns 2-6 = 2023, 2024, 2025, 2026, 2027
-        if 'Taxa de Inflação' in row_indices:
-            inf_row = row_indices['Taxa de Inflação']
-            for col_idx in range(2, min(7, len(rows[inf_row]))):  # Columns 2-6 = 2023-2027
-                inflation_rate = parse_value(rows[inf_row][col_idx] if len(rows[inf_row]) > col_idx else '0')
-                calculated_index = calculate_inflation_index(inflation_rate, previous_index)
-                calculated_values[f'Índice de Inflação-{col_idx}'] = format_decimal(calculated_index)
-                previous_index = calculated_index
-    
-    return calculated_values
-
+        engine = cached[2]
+        _sheet_engines[sheet_name] = (layout, version, engine)
+        return _format_calculated(engine.update(inputs))
@@ -0,0 +1,129 @@
+"""
+Equipment persistence services
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+from backend.src import db
+from backend.src.models.equipment import Equipment, EquipmentYearValue, parse_year_values
+from backend.src.utils.parsers import parse_pt_number
+
+
+def sync_sheet_equipment(project_id: int, sheet_key: str,
+                         items: List[Dict[str, Any]]) -> Tuple[List[Equipment], Dict[str, int]]:
+    """
+    Make the stored equipment of a sheet match a list sent by the client
+
+    Items with the id of stored equipment update it (only if something
+    changed), items without a known id are inserted and stored equipment
+    missing from the list is deleted. Each kind of change is applied with one
+    executemany-style statement, all in a single transaction, so unchanged
+    rows keep their id and created_at (the sort key of the sheet).
+
+    Args:
+        project_id: Project ID
+        sheet_key: Sheet key (e.g., 'ativos-tangiveis-equipamento-basico')
+        items: Equipment dictionaries ({'id', 'equipmentName', 'ano0', 'yearValues'})
+
+    Returns:
+        Tuple (equipment in the order of items, counts of inserted, updated,
+        deleted and unchanged rows)
+    """
+    stored = {
+        equipment.id: equipment
+        for equipment in Equipment.query.filter_by(project_id=project_id, sheet_key=sheet_key)
+    }
+    now = datetime.utcnow()
+
+    order = []           # stored id, or None for the next inserted row
+    insert_params = []
+    insert_years = []
+    update_params = []
+    year_params = []
+    changed_year_ids = []
+    kept = set()
+    unchanged = 0
+
+    for item in items:
+        name = item.get('equipmentName') or ''
+        ano0_amount = round(parse_pt_number(item.get('ano0', '0,00')) or 0.0, 2)
+        years = parse_year_values(item.get('yearValues', {}))
+
+        equipment = stored.get(item.get('id'))
+        if equipment is None or equipment.id in kept:
+            order.append(None)
+            insert_params.append({
+                'project_id': project_id,
+                'sheet_key': sheet_key,
+                'equipment_name': name,
+                'ano0_amount': ano0_amount,
+                'created_at': now,
+                'updated_at': now
+            })
+            insert_years.append(years)
+            continue
+
+        kept.add(equipment.id)
+        order.append(equipment.id)
+        stored_years = {value.year: value.amount for value in equipment.year_amounts}
+        if equipment.equipment_name == name and equipment.ano0_amount == ano0_amount and stored_years == years:
+            unchanged += 1
+            continue
+
+        update_params.append({
+            'id': equipment.id,
+            'equipment_name': name,
+            'ano0_amount': ano0_amount,
+            'updated_at': now
+        })
+        if stored_years != years:
+            changed_year_ids.append(equipment.id)
+            year_params.extend(
+                {'equipment_id': equipment.id, 'year': year, 'amount': amount}
+                for year, amount in years.items()
+            )
+
+    deleted_ids = [equipment_id for equipment_id in stored if equipment_id not in kept]
+
+    try:
+        if deleted_ids or changed_year_ids:
+            db.session.execute(
+                db.delete(EquipmentYearValue)
+                .where(EquipmentYearValue.equipment_id.in_(deleted_ids + changed_year_ids))
+            )
+        if deleted_ids:
+            db.session.execute(db.delete(Equipment).where(Equipment.id.in_(deleted_ids)))
+        if update_params:
+            db.session.execute(db.update(Equipment), update_params)
+        if insert_params:
+            new_ids = db.session.scalars(
+                db.insert(Equipment).returning(Equipment.id, sort_by_parameter_order=True),
+                insert_params
+            ).all()
+            for equipment_id, years in zip(new_ids, insert_years):
+                year_params.extend(
+                    {'equipment_id': equipment_id, 'year': year, 'amount': amount}
+                    for year, amount in years.items()
+                )
+            new_ids = iter(new_ids)
+            order = [next(new_ids) if equipment_id is None else equipment_id for equipment_id in order]
+        if year_params:
+            db.session.execute(db.insert(EquipmentYearValue), year_params)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    saved = {}
+    if order:
+        saved = {
+            equipment.id: equipment
+            for equipment in Equipment.query.filter(Equipment.id.in_(order))
+        }
+    counts = {
+        'inserted': len(insert_params),
+        'updated': len(update_params),
+        'deleted': len(deleted_ids),
+        'unchanged': unchanged
+    }
+    return [saved[equipment_id] for equipment_id in order], counts
@@ -0,0 +1,161 @@
+"""
+Incremental formula engine
+
+Cells are identified by any hashable key (the spreadsheet services use
+``(row_name, column_index)`` tuples). Formula cells declare the cells they
+depend on, which builds a dependency DAG. When input cells change, only the
+cells downstream of them are recomputed, in topological order, and only the
+cells whose value actually changed are reported back.
+"""
+
+from collections import defaultdict, deque
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Set, Tuple
+
+
+class FormulaCycleError(ValueError):
+    """Raised when a formula would make a cell depend on itself"""
+
+
+class FormulaEngine:
+    """Dependency graph of spreadsheet cells with incremental recalculation"""
+
+    def __init__(self):
+        """Initialize an empty engine"""
+        self._values: Dict[Hashable, Any] = {}
+        self._formulas: Dict[Hashable, Tuple[Callable[..., Any], Tuple[Hashable, ...]]] = {}
+        self._dependents: Dict[Hashable, Set[Hashable]] = defaultdict(set)
+
+    def set_input(self, cell: Hashable, value: Any):
+        """
+        Set an input cell value without recalculating dependents
+
+        Args:
+            cell: Cell key
+            value: Cell value
+        """
+        self._values[cell] = value
+
+    def define(self, cell: Hashable, func: Callable[..., Any], dependencies: Iterable[Hashable]):
+        """
+        Define a formula cell
+
+        Args:
+            cell: Cell key
+            func: Function called with the dependency values, in order
+            dependencies: Cells the formula reads
+
+        Raises:
+            FormulaCycleError: If the formula would create a dependency cycle
+        """
+        dependencies = tuple(dependencies)
+        if cell in dependencies or self._reaches(cell, dependencies):
+            raise FormulaCycleError(f'Circular reference in formula for {cell!r}')
+
+        if cell in self._formulas:
+            for dependency in self._formulas[cell][1]:
+                self._dependents[dependency].discard(cell)
+
+        self._formulas[cell] = (func, dependencies)
+        for dependency in dependencies:
+            self._dependents[dependency].add(cell)
+
+    def value(self, cell: Hashable, default: Any = None) -> Any:
+        """
+        Get the current value of a cell
+
+        Args:
+            cell: Cell key
+            default: Value returned for unknown cells
+
+        Returns:
+            Cell value
+        """
+        return self._values.get(cell, default)
+
+    def has_cell(self, cell: Hashable) -> bool:
+        """Check whether a cell is an input or a formula of this engine"""
+        return cell in self._values or cell in self._formulas
+
+    def inputs(self) -> List[Hashable]:
+        """List the cells that are not computed by a formula"""
+        return [cell for cell in self._values if cell not in self._formulas]
+
+    def evaluate_all(self) -> Dict[Hashable, Any]:
+        """
+        Compute every formula cell
+
+        Returns:
+            Dictionary with the value of every formula cell
+        """
+        order = self._topological_order(set(self._formulas))
+        for cell in order:
+            self._compute(cell)
+        return {cell: self._values[cell] for cell in order}
+
+    def update(self, changes: Dict[Hashable, Any]) -> Dict[Hashable, Any]:
+        """
+        Apply input changes and recompute only the affected formula cells
+
+        Args:
+            changes: Dictionary of cell key -> new value
+
+        Returns:
+            Dictionary with the formula cells whose value changed
+        """
+        changed = set()
+        for cell, value in changes.items():
+            if cell not in self._values or self._values[cell] != value:
+                self._values[cell] = value
+                changed.add(cell)
+
+        affected = self._downstream(changed)
+        deltas = {}
+        for cell in self._topological_order(affected):
+            previous = self._values.get(cell)
+            value = self._compute(cell)
+            if previous != value:
+                deltas[cell] = value
+        return deltas
+
+    def _compute(self, cell: Hashable) -> Any:
+        func, dependencies = self._formulas[cell]
+        value = func(*(self._values.get(dependency) for dependency in dependencies))
+        self._values[cell] = value
+        return value
+
+    def _downstream(self, cells: Set[Hashable]) -> Set[Hashable]:
+        """Collect every formula cell that transitively depends on the given cells"""
+        affected = set()
+        queue = deque(cells)
+        while queue:
+            for dependent in self._dependents.get(queue.popleft(), ()):
+                if dependent not in affected:
+                    affected.add(dependent)
+                    queue.append(dependent)
+        return affected
+
+    def _reaches(self, start: Hashable, targets: Iterable[Hashable]) -> bool:
+        """Check whether any target depends (transitively) on start"""
+        targets = set(targets)
+        return bool(targets & self._downstream({start}))
+
+    def _topological_order(self, cells: Set[Hashable]) -> List[Hashable]:
+        """Order formula cells so that every cell comes after its dependencies within the set"""
+        in_degree = {
+            cell: sum(1 for dependency in self._formulas[cell][1] if dependency in cells)
+            for cell in cells
+        }
+        queue = deque(cell for cell, degree in in_degree.items() if degree == 0)
+        order = []
+        while queue:
+            cell = queue.popleft()
+            order.append(cell)
+            for dependent in self._dependents.get(cell, ()):
+                if dependent in in_degree:
+                    in_degree[dependent] -= 1
+                    if in_degree[dependent] == 0:
+                        queue.append(dependent)
+
+        if len(order) != len(cells):
+            raise FormulaCycleError('Circular reference between formula cells')
+        return order
@@ -0,0 +1,241 @@
+"""
+Background import jobs
+
+An upload is spooled to IMPORT_JOBS_DIR and parsed and saved by a bounded
+pool of IMPORT_WORKERS threads, so the request returns a job id at once and
+the client polls the job for progress. Each project can have at most
+IMPORT_JOBS_PER_PROJECT queued or running jobs, so one huge file can't fill
+the pool, and each chunk is committed on its own, so interactive edits of
+the project get the database between chunks.
+"""
+
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Optional
+from flask import Flask
+from backend.src import db
+from backend.src.models.project import Project
+from backend.src.services.import_service import (
+    DEFAULT_CHUNK_SIZE, DEFAULT_PREVIEW_SIZE, ImportFileError, ImportReport,
+    estimate_rows, import_chunks, import_summary, read_chunks
+)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+
+class ImportJobLimitError(Exception):
+    """A job can't be queued now (the message is shown to the user)"""
+
+
+class ImportJob:
+    """An import running in the background"""
+
+    def __init__(self, filename: str, project_id: Optional[int], sheet_key: str, report: ImportReport,
+                 locale: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.path: Optional[str] = None  # Spooled upload, removed when the job ends
+        self.filename = filename
+        self.project_id = project_id
+        self.sheet_key = sheet_key
+        self.locale = locale
+        self.report = report
+        self.status = QUEUED
+        self.total_rows: Optional[int] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        report = self.report
+        processed = report.count + report.skipped
+        progress = {
+            'rows': report.count,
+            'saved': report.saved,
+            'failed': report.failed,
+            'skipped': report.skipped,
+            'chunks': report.chunks,
+            'checkpoint': report.checkpoint,
+            'total_rows': self.total_rows,
+            'percent': None,
+            'rows_per_second': round(report.rows_per_second, 1)
+        }
+        if self.status == DONE:
+            progress['percent'] = 100.0
+        elif self.total_rows:
+            progress['percent'] = round(min(processed / self.total_rows, 1.0) * 100, 1)
+
+        return {
+            'id': self.id,
+            'status': self.status,
+            'filename': self.filename,
+            'project_id': self.project_id,
+            'sheet_key': self.sheet_key,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'progress': progress,
+            'errors': report.errors,
+            'result': self.result,
+            'error': self.error
+        }
+
+
+class ImportJobQueue:
+    """
+    Bounded pool that runs the import jobs of an application
+
+    Finished jobs are kept for IMPORT_JOB_TTL seconds so clients can read
+    their summary.
+    """
+
+    def __init__(self, app: Flask):
+        self.app = app
+        self.directory = app.config.get('IMPORT_JOBS_DIR') or os.path.join(
+            app.config.get('DATA_DIR', 'data'), 'import_jobs'
+        )
+        self.workers = max(int(app.config.get('IMPORT_WORKERS', 2)), 1)
+        self.jobs_per_project = max(int(app.config.get('IMPORT_JOBS_PER_PROJECT', 1)), 1)
+        self.max_queued = max(int(app.config.get('IMPORT_MAX_QUEUED', 20)), 1)
+        self.ttl = int(app.config.get('IMPORT_JOB_TTL', 3600))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='import')
+        self._jobs: Dict[str, ImportJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, upload, project_id: Optional[int] = None, sheet_key: str = 'imported_items',
+               resume_after: int = 0, locale: Optional[str] = None) -> ImportJob:
+        """
+        Spool an upload to disk and queue its import
+
+        Args:
+            upload: Uploaded file (werkzeug FileStorage)
+            project_id: Project to save the items to, or None to only parse them
+            sheet_key: Sheet key the items are saved under
+            resume_after: Skip the rows up to this worksheet row
+            locale: Locale of the numbers written as text, or None to infer it
+
+        Returns:
+            The queued job
+
+        Raises:
+            ImportJobLimitError: If the project or the queue has too many jobs
+        """
+        report = ImportReport(
+            preview_size=self.app.config.get('IMPORT_PREVIEW_SIZE', DEFAULT_PREVIEW_SIZE),
+            resume_after=resume_after
+        )
+        os.makedirs(self.directory, exist_ok=True)
+        job = ImportJob(upload.filename, project_id, sheet_key, report, locale)
+        job.path = os.path.join(self.directory, f'{job.id}.upload')
+
+        with self._lock:
+            self._prune()
+            active = [queued for queued in self._jobs.values() if queued.status in ACTIVE_STATUSES]
+            if len(active) >= self.max_queued:
+                raise ImportJobLimitError('Fila de importações cheia. Tente novamente dentro de alguns minutos.')
+            if project_id is not None and sum(
+                    queued.project_id == project_id for queued in active) >= self.jobs_per_project:
+                raise ImportJobLimitError('Já existe uma importação em curso para este projeto.')
+            # Reserved before the upload is spooled, so concurrent requests see it
+            self._jobs[job.id] = job
+
+        try:
+            upload.save(job.path)
+            with open(job.path, 'rb') as spooled:
+                job.total_rows = estimate_rows(spooled)
+            self._executor.submit(self._run, job)
+        except Exception:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            self._remove_file(job)
+            raise
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: ImportJob):
+        job.status = RUNNING
+        job.started_at = datetime.utcnow()
+        chunk_size = self.app.config.get('IMPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+        try:
+            with self.app.app_context():
+                try:
+                    project = db.session.get(Project, job.project_id) if job.project_id is not None else None
+                    if job.project_id is not None and project is None:
+                        raise ImportFileError(f'Projeto com ID {job.project_id} não encontrado')
+                    with open(job.path, 'rb') as stream:
+                        import_chunks(
+                            read_chunks(stream, chunk_size),
+                            project_id=job.project_id,
+                            sheet_key=job.sheet_key,
+                            report=job.report,
+                            locale=job.locale
+                        )
+                    if job.report.count == 0 and job.report.skipped == 0:
+                        raise ImportFileError('O arquivo está vazio')
+                    job.result = import_summary(job.report, project, job.sheet_key)
+                    job.status = DONE
+                except Exception:
+                    db.session.rollback()
+                    raise
+        except ImportFileError as e:
+            job.error = str(e)
+            job.status = FAILED
+        except Exception as e:
+            self.app.logger.exception('Erro na importação %s', job.id)
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = datetime.utcnow()
+            self._remove_file(job)
+
+    def _prune(self):
+        """Forget finished jobs older than the TTL (caller holds the lock)"""
+        now = datetime.utcnow()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and (now - job.finished_at).total_seconds() > self.ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    @staticmethod
+    def _remove_file(job: ImportJob):
+        try:
+            os.remove(job.path)
+        except OSError:
+            pass
+
+
+def init_import_jobs(app: Flask) -> ImportJobQueue:
+    """
+    Create the import job queue of an application
+
+    Args:
+        app: Flask application
+
+    Returns:
+        The queue, also stored in app.extensions['import_jobs']
+    """
+    queue = ImportJobQueue(app)
+    app.extensions['import_jobs'] = queue
+    return queue
+
+
+def get_import_jobs() -> ImportJobQueue:
+    """Get the import job queue of the current application"""
+    from flask import current_app
+    return current_app.extensions['import_jobs']
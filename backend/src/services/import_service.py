@@ -0,0 +1,759 @@
+"""
+Spreadsheet import services
+
+Uploads are read as a stream of fixed-size chunks (openpyxl read_only mode for
+.xlsx, pandas chunks for CSV, record batches for Parquet), so only one chunk
+of rows is in memory at a time. The format is detected from the content of
+the file, not from its name. Each chunk is normalized, validated and
+persisted before the next one is read, and the import only keeps counts,
+totals and a bounded preview of the items.
+
+Chunks are transformed with column operations (numbers, totals, category
+lifespans and the formatting of the preview), never row by row, and saved
+with one executemany INSERT and one commit per chunk. Rejected rows are
+collected in an ImportReport together with the checkpoint to resume from and
+the throughput.
+"""
+
+import codecs
+import csv
+import re
+import time
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+import numpy as np
+import pandas as pd
+from flask import current_app
+from openpyxl import load_workbook
+from sqlalchemy.exc import DataError, IntegrityError
+from backend.src import db
+from backend.src.models.equipment import Equipment
+from backend.src.models.project import Project
+from backend.src.utils.numbers import DEFAULT_LOCALE, format_number, format_numbers, infer_locale, parse_numbers
+
+# Rows read, normalized and saved at a time
+DEFAULT_CHUNK_SIZE = 1000
+# Items returned to the client as a sample of the import
+DEFAULT_PREVIEW_SIZE = 5
+# Rejected rows listed in the report (the rest are only counted)
+MAX_REPORTED_ERRORS = 100
+
+# Limits of the equipment columns
+MAX_NAME_LENGTH = 255
+MAX_AMOUNT = 1e16  # Numeric(18, 2)
+
+COLUMN_MAP = {
+    'descrição': 'description',
+    'descricao': 'description',
+    'item': 'description',
+    'produto': 'description',
+    'designação': 'description',
+    'quantidade': 'quantity',
+    'qtd': 'quantity',
+    'unidades': 'quantity',
+    'preço unitário': 'unit_price',
+    'preco unitario': 'unit_price',
+    'preço': 'unit_price',
+    'valor': 'unit_price',
+    'custo': 'unit_price',
+    'valor unitário': 'unit_price',
+    'total': 'total',
+    'valor total': 'total',
+    'categoria': 'category',
+    'tipo': 'category',
+    'vida útil': 'lifespan',
+    'vida util': 'lifespan',
+    'anos': 'lifespan'
+}
+
+
+# Sheet display names for better feedback
+SHEET_DISPLAY_NAMES = {
+    'ativos-tangiveis-terrenos': 'Terrenos e Recursos Naturais',
+    'ativos-tangiveis-edificios': 'Edifícios e Outras Construções',
+    'ativos-tangiveis-equipamento-basico': 'Equipamento Básico',
+    'ativos-tangiveis-equipamento-transporte': 'Equipamento de Transporte',
+    'ativos-tangiveis-equipamento-administrativo': 'Equipamento Administrativo',
+    'ativos-tangiveis-equipamentos-biologicos': 'Equipamentos Biológicos',
+    'ativos-tangiveis-outros': 'Outros Ativos Fixos Tangíveis',
+    'ativos-intangiveis-goodwill': 'Goodwill',
+    'ativos-intangiveis-projetos-desenvolvimento': 'Projetos de Desenvolvimento',
+    'ativos-intangiveis-programas-computador': 'Programas de Computador',
+    'ativos-intangiveis-propriedade-industrial': 'Propriedade Industrial',
+    'ativos-intangiveis-outros': 'Outros Ativos Intangíveis'
+}
+
+# File signatures of the binary formats; anything else that is text is CSV
+FILE_SIGNATURES = (
+    (b'PK\x03\x04', 'xlsx'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'xls'),
+    (b'PAR1', 'parquet'),
+)
+# Bytes of a CSV file used to guess its encoding and delimiter
+CSV_SAMPLE_SIZE = 64 * 1024
+CSV_ENCODINGS = ('utf-8-sig', 'cp1252', 'latin-1')
+CSV_DELIMITERS = ';,\t|'
+
+
+class ImportFileError(ValueError):
+    """The uploaded file can't be imported (the message is shown to the user)"""
+
+
+def normalize_column_name(name: Any) -> str:
+    """
+    Map a column header to its standard key
+
+    Args:
+        name: Header as written in the file (e.g. 'Preço Unitário (AOA)')
+
+    Returns:
+        Standard key ('description', 'quantity', ...), or the lowercase
+        header if it isn't recognized
+    """
+    column = str(name).lower().strip()
+    for key, value in COLUMN_MAP.items():
+        if key in column:
+            return value
+    return column
+
+
+def _header_columns(header: tuple) -> List[str]:
+    """Standard keys of a header row; unnamed columns get positional names"""
+    columns = [
+        normalize_column_name(name) if name is not None and str(name).strip() else f'coluna_{index + 1}'
+        for index, name in enumerate(header)
+    ]
+    if 'description' not in columns and columns:
+        # Without a recognizable description column use the first one
+        columns[0] = 'description'
+    return columns
+
+
+def _chunk_frame(rows: List[tuple], row_numbers: List[int], columns: List[str]) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=columns, index=pd.Index(row_numbers, name='row'))
+    # Keep the first of columns that map to the same key
+    return df.loc[:, ~df.columns.duplicated()]
+
+
+def iter_excel_chunks(stream: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Read the first worksheet of an .xlsx file in chunks of rows
+
+    The first non-empty row is the header; rows with every cell empty are
+    skipped. The workbook is opened in read_only mode, so rows are parsed
+    from the file as they are iterated instead of being loaded all at once.
+    Chunks are indexed by the row number in the worksheet.
+
+    Args:
+        stream: Binary file object (seekable)
+        chunk_size: Maximum number of rows per chunk
+
+    Yields:
+        DataFrame per chunk with normalized column names
+
+    Raises:
+        ImportFileError: If the file is not a readable workbook
+    """
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFileError(f'Erro ao ler arquivo Excel: {str(e)}')
+
+    try:
+        columns = None
+        chunk = []
+        row_numbers = []
+        for row_number, row in enumerate(workbook.active.iter_rows(values_only=True), start=1):
+            if all(value is None or (isinstance(value, str) and not value.strip()) for value in row):
+                continue
+            if columns is None:
+                columns = _header_columns(row)
+                continue
+            # Rows can be shorter or longer than the header
+            chunk.append(tuple(row[:len(columns)]) + (None,) * (len(columns) - len(row)))
+            row_numbers.append(row_number)
+            if len(chunk) >= chunk_size:
+                yield _chunk_frame(chunk, row_numbers, columns)
+                chunk = []
+                row_numbers = []
+        if chunk:
+            yield _chunk_frame(chunk, row_numbers, columns)
+    finally:
+        workbook.close()
+
+
+def iter_legacy_excel_chunks(stream: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Read an .xls file in chunks of rows
+
+    The legacy format can't be streamed, so the sheet is loaded by pandas and
+    then split; the rest of the import still works chunk by chunk.
+
+    Args:
+        stream: Binary file object
+        chunk_size: Maximum number of rows per chunk
+
+    Yields:
+        DataFrame per chunk with normalized column names
+
+    Raises:
+        ImportFileError: If the file is not a readable workbook
+    """
+    try:
+        df = pd.read_excel(stream)
+    except Exception as e:
+        raise ImportFileError(f'Erro ao ler arquivo Excel: {str(e)}')
+
+    df = df.dropna(how='all')
+    # Row numbers in the worksheet (the header is row 1)
+    df.index = pd.Index(df.index + 2, name='row')
+    df.columns = _header_columns(tuple(df.columns))
+    df = df.loc[:, ~df.columns.duplicated()]
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def iter_csv_chunks(stream: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV file in chunks of rows
+
+    The encoding (UTF-8, Windows-1252 or Latin-1) and the delimiter (';', ',',
+    tab or '|') are guessed from the start of the file. Every cell is read as
+    text, so numbers are parsed later in any locale ("1.234,56").
+
+    Args:
+        stream: Binary file object (seekable)
+        chunk_size: Maximum number of rows per chunk
+
+    Yields:
+        DataFrame per chunk with normalized column names, indexed by line
+        number (the header is line 1)
+
+    Raises:
+        ImportFileError: If the file is not readable CSV
+    """
+    encoding, delimiter = _csv_dialect(stream.read(CSV_SAMPLE_SIZE))
+    stream.seek(0)
+    try:
+        reader = pd.read_csv(
+            stream, sep=delimiter, encoding=encoding, dtype=str,
+            # Blank lines are kept as empty rows so the index follows the line numbers
+            chunksize=chunk_size, skip_blank_lines=False
+        )
+        columns = None
+        for chunk in reader:
+            if columns is None:
+                columns = _header_columns(tuple(chunk.columns))
+            chunk.columns = columns
+            chunk = chunk.loc[:, ~chunk.columns.duplicated()]
+            chunk.index = pd.Index(chunk.index + 2, name='row')
+            chunk = chunk.dropna(how='all')
+            if not chunk.empty:
+                yield chunk
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+        raise ImportFileError(f'Erro ao ler arquivo CSV: {str(e)}')
+
+
+def _csv_dialect(sample: bytes):
+    """Encoding and delimiter of a CSV file, from its first bytes"""
+    for encoding in CSV_ENCODINGS:
+        try:
+            # Incremental decoding ignores a character cut at the end of the sample
+            text = codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            break
+        except UnicodeDecodeError:
+            continue
+    try:
+        delimiter = csv.Sniffer().sniff(text, delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        header = text.split('\n', 1)[0]
+        delimiter = max(CSV_DELIMITERS, key=header.count)
+    return encoding, delimiter
+
+
+def iter_parquet_chunks(stream: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Read a Parquet file in chunks of rows
+
+    Record batches are converted straight from Arrow's columnar memory, so
+    numeric columns reach the import already typed. Needs pyarrow.
+
+    Args:
+        stream: Binary file object (seekable)
+        chunk_size: Maximum number of rows per chunk
+
+    Yields:
+        DataFrame per chunk with normalized column names, indexed by row
+        number (counting the column names as row 1, like the other formats)
+
+    Raises:
+        ImportFileError: If pyarrow is missing or the file is not readable
+    """
+    parquet = _open_parquet(stream)
+    columns = _header_columns(tuple(parquet.schema_arrow.names))
+    start = 2
+    for batch in parquet.iter_batches(batch_size=chunk_size):
+        chunk = batch.to_pandas()
+        chunk.columns = columns
+        chunk = chunk.loc[:, ~chunk.columns.duplicated()]
+        chunk.index = pd.RangeIndex(start, start + len(chunk), name='row')
+        start += len(chunk)
+        chunk = chunk.dropna(how='all')
+        if not chunk.empty:
+            yield chunk
+
+
+def _open_parquet(stream: BinaryIO):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportFileError('A importação de arquivos Parquet requer o pacote pyarrow (pip install pyarrow)')
+    try:
+        return pq.ParquetFile(stream)
+    except Exception as e:
+        raise ImportFileError(f'Erro ao ler arquivo Parquet: {str(e)}')
+
+
+CHUNK_READERS = {
+    'xlsx': iter_excel_chunks,
+    'xls': iter_legacy_excel_chunks,
+    'csv': iter_csv_chunks,
+    'parquet': iter_parquet_chunks,
+}
+
+
+def detect_format(stream: BinaryIO) -> str:
+    """
+    Detect the format of an uploaded file from its content
+
+    Args:
+        stream: Binary file object (seekable); it is rewound afterwards
+
+    Returns:
+        'xlsx', 'xls', 'parquet' or 'csv'
+
+    Raises:
+        ImportFileError: If the file is empty or in an unknown binary format
+    """
+    sample = stream.read(CSV_SAMPLE_SIZE)
+    stream.seek(0)
+    if not sample.strip():
+        raise ImportFileError('O arquivo está vazio')
+    for signature, file_format in FILE_SIGNATURES:
+        if sample.startswith(signature):
+            return file_format
+    if b'\x00' not in sample:
+        return 'csv'
+    raise ImportFileError('Formato inválido. Use arquivos Excel (.xlsx, .xls), CSV ou Parquet')
+
+
+def read_chunks(stream: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Read an uploaded file in chunks with the reader of its format
+
+    Args:
+        stream: Binary file object (seekable)
+        chunk_size: Maximum number of rows per chunk
+
+    Returns:
+        Iterator of chunks indexed by row number
+
+    Raises:
+        ImportFileError: If the format is not supported
+    """
+    return CHUNK_READERS[detect_format(stream)](stream, chunk_size)
+
+
+def estimate_rows(stream: BinaryIO) -> Optional[int]:
+    """
+    Number of data rows of an uploaded file, read from its metadata
+
+    Args:
+        stream: Binary file object (seekable); it is rewound afterwards
+
+    Returns:
+        Rows below the header, or None if the format doesn't say (CSV)
+    """
+    try:
+        file_format = detect_format(stream)
+        if file_format == 'parquet':
+            return _open_parquet(stream).metadata.num_rows
+        if file_format != 'xlsx':
+            return None
+        workbook = load_workbook(stream, read_only=True)
+        try:
+            max_row = workbook.active.max_row
+        finally:
+            workbook.close()
+        return max(max_row - 1, 0) if max_row else None
+    except Exception:
+        return None
+    finally:
+        stream.seek(0)
+
+
+# Default lifespan in years of the item categories, first match wins; the
+# patterns are matched against the lowercase category without accents
+LIFESPAN_RULES = (
+    (re.compile(r'informatic|computador'), 4),
+    (re.compile(r'mobiliari|mesa|cadeira'), 10),
+    (re.compile(r'veiculo|viatura'), 4),
+    (re.compile(r'maquinaria|equipamento'), 8),
+)
+DEFAULT_LIFESPAN = 10
+
+ITEM_COLUMNS = ['description', 'quantity', 'unit_price', 'total', 'category', 'lifespan']
+
+
+def _fold(text: pd.Series) -> pd.Series:
+    """Lowercase text without accents ('Informática' -> 'informatica')"""
+    return (text.str.normalize('NFKD').str.encode('ascii', 'ignore')
+            .str.decode('ascii').str.lower())
+
+
+def category_lifespans(categories: pd.Series) -> np.ndarray:
+    """
+    Default lifespan in years of each item category
+
+    Categories repeat a lot, so only the distinct values are matched.
+
+    Args:
+        categories: Categories as written in the file
+
+    Returns:
+        int array with one lifespan per category
+    """
+    codes, uniques = pd.factorize(categories, use_na_sentinel=False)
+    folded = _fold(pd.Series(uniques, dtype=str))
+    lifespans = np.select(
+        [folded.str.contains(pattern).to_numpy(dtype=bool) for pattern, _ in LIFESPAN_RULES],
+        [lifespan for _, lifespan in LIFESPAN_RULES],
+        default=DEFAULT_LIFESPAN
+    )
+    return lifespans[codes]
+
+
+def category_lifespan(category: str) -> int:
+    """
+    Default lifespan in years of an item category
+
+    Args:
+        category: Category as written in the file
+
+    Returns:
+        Lifespan in years (10 if the category isn't recognized)
+    """
+    return int(category_lifespans(pd.Series([category]))[0])
+
+
+def _numeric(column: pd.Series, locale: Optional[str] = None,
+             column_locales: Optional[Dict[str, str]] = None) -> pd.Series:
+    """
+    Column as float64; text is parsed with one locale for the whole column, the rest is NaN
+
+    Without an explicit locale the column's locale is inferred from its text
+    (infer_locale) and remembered in column_locales for the next chunks;
+    columns whose cells fit both ("1.500") are read as DEFAULT_LOCALE.
+    """
+    if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+        return column.astype(np.float64)
+    values = column.tolist()
+    if locale is None:
+        column_locales = {} if column_locales is None else column_locales
+        locale = column_locales.get(column.name) or infer_locale(values)
+        if locale is None:
+            locale = DEFAULT_LOCALE
+        else:
+            column_locales[column.name] = locale
+    return pd.Series(parse_numbers(values, locale), index=column.index)
+
+
+def prepare_chunk(df: pd.DataFrame, locale: Optional[str] = None,
+                  column_locales: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    Compute the import items of a chunk of normalized rows
+
+    Every step is a column operation over the whole chunk.
+
+    Args:
+        df: Chunk with normalized column names
+        locale: Locale of the numbers written as text, or None to infer it per column
+        column_locales: Locales inferred for the columns of earlier chunks
+            (updated in place), so every chunk of a column is read the same way
+
+    Returns:
+        DataFrame with the ITEM_COLUMNS (description, quantity, unit_price,
+        total, category, lifespan)
+    """
+    def numeric(name):
+        return _numeric(df[name], locale, column_locales)
+
+    quantity = numeric('quantity') if 'quantity' in df.columns else pd.Series(1.0, index=df.index)
+
+    if 'unit_price' in df.columns:
+        unit_price = numeric('unit_price')
+    elif 'total' in df.columns:
+        # Try to calc unit price from total / quantity
+        unit_price = numeric('total') / quantity
+    else:
+        unit_price = pd.Series(0.0, index=df.index)
+
+    items = pd.DataFrame({
+        'description': df['description'].fillna('Item sem nome').astype(str),
+        'quantity': quantity.fillna(1.0),
+        'unit_price': unit_price.replace([np.inf, -np.inf], np.nan).fillna(0.0),
+    }, index=df.index)
+    items['total'] = items['quantity'] * items['unit_price']
+
+    if 'category' in df.columns:
+        items['category'] = df['category'].where(df['category'].notna(), 'Geral').astype(str)
+    else:
+        items['category'] = 'Geral'
+    items['lifespan'] = category_lifespans(items['category'])
+    return items[ITEM_COLUMNS]
+
+
+def chunk_items(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Turn a chunk of normalized rows into import items
+
+    Args:
+        df: Chunk with normalized column names
+
+    Returns:
+        List of item dictionaries (description, quantity, unit_price, total,
+        category, lifespan)
+    """
+    return prepare_chunk(df).to_dict('records')
+
+
+def preview_items(items: pd.DataFrame, locale: str = DEFAULT_LOCALE) -> List[Dict[str, Any]]:
+    """
+    Items of the preview, with their amounts also formatted for display
+
+    Args:
+        items: Prepared items (prepare_chunk)
+        locale: Locale of the formatted amounts
+
+    Returns:
+        List of item dictionaries with unit_price_formatted and total_formatted
+    """
+    items = items.assign(
+        unit_price_formatted=format_numbers(items['unit_price'], locale=locale),
+        total_formatted=format_numbers(items['total'], locale=locale)
+    )
+    return items.to_dict('records')
+
+
+def validate_items(items: pd.DataFrame, report: 'ImportReport') -> pd.DataFrame:
+    """
+    Drop the items that can't be stored, recording them in the report
+
+    Args:
+        items: Prepared items (prepare_chunk), indexed by row number
+        report: Report that collects the rejected rows and the checkpoint
+
+    Returns:
+        The valid items
+    """
+    too_long = items['description'].str.len() > MAX_NAME_LENGTH
+    out_of_range = ~np.isfinite(items['total']) | (items['total'].abs() >= MAX_AMOUNT)
+    for row in items.index[too_long]:
+        report.add_error(row, f'Descrição com mais de {MAX_NAME_LENGTH} caracteres')
+    for row in items.index[out_of_range & ~too_long]:
+        report.add_error(row, 'Valor total fora do intervalo permitido')
+    return items[~(too_long | out_of_range)]
+
+
+def insert_items(items: pd.DataFrame, project_id: int, sheet_key: str, report: 'ImportReport') -> int:
+    """
+    Insert a chunk of items as equipment of a project sheet and commit
+
+    The chunk is written with one executemany INSERT. If the database rejects
+    it, the rows are retried one by one so only the bad rows are lost; each
+    of them is recorded in the report, and report.checkpoint follows every
+    row committed (or rejected) this way.
+
+    Args:
+        items: Valid items, indexed by row number
+        project_id: Project ID
+        sheet_key: Sheet key (e.g., 'ativos-tangiveis-equipamento-basico')
+        report: Report that collects the rejected rows and the checkpoint
+
+    Returns:
+        Number of rows inserted
+    """
+    if items.empty:
+        return 0
+
+    now = datetime.utcnow()
+    params = [
+        {
+            'project_id': project_id,
+            'sheet_key': sheet_key,
+            'equipment_name': name,
+            'ano0_amount': round(amount, 2),
+            'created_at': now,
+            'updated_at': now
+        }
+        for name, amount in zip(items['description'].tolist(), items['total'].tolist())
+    ]
+
+    try:
+        db.session.execute(db.insert(Equipment), params)
+        db.session.commit()
+        return len(params)
+    except (IntegrityError, DataError):
+        db.session.rollback()
+
+    inserted = 0
+    for row, row_params in zip(items.index, params):
+        try:
+            db.session.execute(db.insert(Equipment), [row_params])
+            db.session.commit()
+            inserted += 1
+        except (IntegrityError, DataError) as e:
+            db.session.rollback()
+            report.add_error(row, f'Erro ao gravar: {getattr(e, "orig", None) or e}')
+        # Each row is committed on its own here, so a resumed import starts after it
+        report.checkpoint = int(row)
+    return inserted
+
+
+class ImportReport:
+    """
+    Progress and outcome of an import
+
+    Updated as each chunk is processed, so it can be read while the import
+    runs. checkpoint is the last worksheet row whose chunk is committed:
+    importing the same file again with resume_after=checkpoint continues
+    after it.
+    """
+
+    def __init__(self, preview_size: int = DEFAULT_PREVIEW_SIZE, resume_after: int = 0):
+        self.preview_size = preview_size
+        self.resume_after = resume_after
+        self.count = 0
+        self.saved = 0
+        self.failed = 0
+        self.skipped = 0
+        self.chunks = 0
+        self.total_value = 0.0
+        self.preview: List[Dict[str, Any]] = []
+        self.errors: List[Dict[str, Any]] = []
+        self.checkpoint = resume_after
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add_error(self, row: int, message: str):
+        """Record a rejected row (only the first MAX_REPORTED_ERRORS are kept)"""
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': int(row), 'error': message})
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.count / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'saved': self.saved,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'chunks': self.chunks,
+            'total_value': self.total_value,
+            'preview': self.preview,
+            'errors': self.errors,
+            'checkpoint': self.checkpoint,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1)
+        }
+
+
+def import_chunks(chunks: Iterator[pd.DataFrame], project_id: Optional[int] = None,
+                  sheet_key: str = 'imported_items', report: Optional[ImportReport] = None,
+                  locale: Optional[str] = None) -> ImportReport:
+    """
+    Normalize and persist an import chunk by chunk
+
+    With a project every chunk is committed on its own, so an interrupted
+    import keeps the chunks before report.checkpoint. Rows up to
+    report.resume_after are skipped.
+
+    Args:
+        chunks: Chunks of normalized rows indexed by row number (iter_excel_chunks)
+        project_id: Project to save the items to, or None to only parse them
+        sheet_key: Sheet key the items are saved under
+        report: Report to update (a new one by default)
+        locale: Locale of the numbers written as text ('pt-AO', 'pt-PT' or
+            'en'), or None to infer it once per column
+
+    Returns:
+        The report: rows read, saved, rejected (with the first errors) and
+        skipped, total value, preview, checkpoint and throughput
+    """
+    report = report or ImportReport()
+    column_locales: Dict[str, str] = {}
+    try:
+        for chunk in chunks:
+            if report.resume_after:
+                resumed = chunk[chunk.index > report.resume_after]
+                report.skipped += len(chunk) - len(resumed)
+                chunk = resumed
+                if chunk.empty:
+                    continue
+
+            items = validate_items(prepare_chunk(chunk, locale, column_locales), report)
+            report.count += len(chunk)
+            report.chunks += 1
+            report.total_value += float(items['total'].sum())
+            if len(report.preview) < report.preview_size:
+                report.preview.extend(preview_items(items.head(report.preview_size - len(report.preview))))
+            if project_id is not None:
+                report.saved += insert_items(items, project_id, sheet_key, report)
+            report.checkpoint = int(chunk.index[-1])
+            report.elapsed = time.perf_counter() - report.started
+    finally:
+        report.elapsed = time.perf_counter() - report.started
+
+    current_app.logger.info(
+        'Importação: %d linhas (%d gravadas, %d rejeitadas) em %.2fs (%.0f linhas/s)',
+        report.count, report.saved, report.failed, report.elapsed, report.rows_per_second
+    )
+    return report
+
+
+def import_summary(report: ImportReport, project: Optional[Project] = None,
+                   sheet_key: str = 'imported_items') -> Dict[str, Any]:
+    """
+    Response of a finished import
+
+    Args:
+        report: Report of the import
+        project: Project the items were saved to, or None if only parsed
+        sheet_key: Sheet key the items were saved under
+
+    Returns:
+        The report with the formatted total and a message for the user
+    """
+    result = report.to_dict()
+    result['success'] = True
+    # Format with AOA format (comma as decimal separator)
+    result['total_formatted'] = format_number(report.total_value)
+
+    if project is None:
+        result['message'] = 'Dados processados com sucesso. Forneça project_id para salvar no banco.'
+        return result
+
+    sheet_name = SHEET_DISPLAY_NAMES.get(sheet_key, sheet_key)
+    message = f'{report.saved} itens importados e salvos com sucesso na aba "{sheet_name}"!'
+    if report.failed:
+        message += f' {report.failed} linhas rejeitadas.'
+    result.update({
+        'sheet_key': sheet_key,
+        'sheet_name': sheet_name,
+        'currency': project.unidade_monetaria,
+        'message': message
+    })
+    return result
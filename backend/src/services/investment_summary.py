@@ -0,0 +1,224 @@
+"""
+Investment and depreciation summary of a project
+
+Aggregates the 12 equipment sheets of ativos tangíveis/intangíveis per year
+in the database and derives straight-line depreciation from the AGT rates in
+config/tax_settings, plus the depreciation typed into the depreciacoes-*
+sheets. The last INVESTMENT_SUMMARY_CACHE_SIZE summaries are
+kept in memory, each with a stamp read from the database (count, max id and
+max updated_at of the project's investment and depreciation equipment, like the equipment
+listing ETag), so a summary is rebuilt as soon as any process changes the
+equipment it was built from.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
+from backend.config.settings import Config
+from backend.src import db
+from backend.src.config.tax_settings import ANGOLA_TAX_SETTINGS
+from backend.src.models.equipment import Equipment, EquipmentYearValue
+from backend.src.models.project import Project
+
+TANGIBLE_GROUP = 'Ativos Fixos Tangíveis'
+INTANGIBLE_GROUP = 'Ativos Intangíveis'
+
+# Rate used for intangibles without a specific entry in depreciation_rates
+_INTANGIBLE_RATE = ANGOLA_TAX_SETTINGS['taxes']['amortizacao_imaterial']
+_RATES = ANGOLA_TAX_SETTINGS['depreciation_rates']
+
+# Equipment sheet -> (summary row, group, annual depreciation rate in %)
+INVESTMENT_SHEETS = {
+    'ativos-tangiveis-terrenos': ('Terrenos e recursos naturais', TANGIBLE_GROUP, 0.0),  # not depreciated
+    'ativos-tangiveis-edificios': ('Edifícios e outras construções', TANGIBLE_GROUP,
+                                   _RATES['edificios_escritorios']),
+    'ativos-tangiveis-equipamento-basico': ('Equipamento básico', TANGIBLE_GROUP, _RATES['equipamento_basico']),
+    'ativos-tangiveis-equipamento-transporte': ('Equipamento transporte', TANGIBLE_GROUP,
+                                                _RATES['equipamento_transporte_ligeiro']),
+    'ativos-tangiveis-equipamento-administrativo': ('Equipamento administrativo', TANGIBLE_GROUP,
+                                                    _RATES['mobiliario']),
+    'ativos-tangiveis-equipamentos-biologicos': ('Equipamentos biológicos', TANGIBLE_GROUP,
+                                                 _RATES['equipamento_basico']),
+    'ativos-tangiveis-outros': ('Outros ativos fixos tangíveis', TANGIBLE_GROUP, _RATES['equipamento_basico']),
+    'ativos-intangiveis-goodwill': ('Goodwill', INTANGIBLE_GROUP, 0.0),  # not amortized
+    'ativos-intangiveis-projetos-desenvolvimento': ('Projetos de desenvolvimento', INTANGIBLE_GROUP,
+                                                    _INTANGIBLE_RATE),
+    'ativos-intangiveis-programas-computador': ('Programas de computador', INTANGIBLE_GROUP, _RATES['software']),
+    'ativos-intangiveis-propriedade-industrial': ('Propriedade industrial', INTANGIBLE_GROUP, _INTANGIBLE_RATE),
+    'ativos-intangiveis-outros': ('Outros ativos intangíveis', INTANGIBLE_GROUP, _INTANGIBLE_RATE),
+}
+
+# Depreciation sheet -> investment sheet whose depreciation row it adds to
+DEPRECIATION_SHEETS = {
+    'depreciacoes-edificios': 'ativos-tangiveis-edificios',
+    'depreciacoes-equipamento-basico': 'ativos-tangiveis-equipamento-basico',
+    'depreciacoes-equipamento-transporte': 'ativos-tangiveis-equipamento-transporte',
+    'depreciacoes-equipamento-administrativo': 'ativos-tangiveis-equipamento-administrativo',
+    'depreciacoes-equipamentos-biologicos': 'ativos-tangiveis-equipamentos-biologicos',
+    'depreciacoes-outros-tangiveis': 'ativos-tangiveis-outros',
+    'depreciacoes-goodwill': 'ativos-intangiveis-goodwill',
+    'depreciacoes-projetos-desenvolvimento': 'ativos-intangiveis-projetos-desenvolvimento',
+    'depreciacoes-programas-computador': 'ativos-intangiveis-programas-computador',
+    'depreciacoes-propriedade-industrial': 'ativos-intangiveis-propriedade-industrial',
+    'depreciacoes-outros-intangiveis': 'ativos-intangiveis-outros',
+}
+
+# Project ID -> (stamp, summary), least recently used first
+_summaries: 'OrderedDict[int, tuple]' = OrderedDict()
+_summaries_lock = threading.Lock()
+
+
+def depreciation_schedule(investments: List[float], rate: float) -> List[float]:
+    """
+    Straight-line depreciation of the investments made in each year
+
+    An investment made in Ano 0 or year n is depreciated from year max(n, 1)
+    at rate % a year until it is fully depreciated.
+
+    Args:
+        investments: Investment per column (Ano 0, year 1, ..., year N)
+        rate: Annual depreciation rate as percentage
+
+    Returns:
+        Depreciation per column (Ano 0 is always 0)
+    """
+    depreciation = [0.0] * len(investments)
+    if rate <= 0:
+        return depreciation
+
+    for column, amount in enumerate(investments):
+        remaining = amount
+        annual = amount * rate / 100
+        for year in range(max(column, 1), len(investments)):
+            if remaining <= 0:
+                break
+            charge = min(annual, remaining)
+            depreciation[year] += charge
+            remaining -= charge
+    return depreciation
+
+
+def _sum_columns(rows: List[List[float]], width: int) -> List[float]:
+    return [sum(row[column] for row in rows) for column in range(width)]
+
+
+def build_investment_summary(project: Project) -> Dict[str, Any]:
+    """
+    Aggregate the investment and depreciation sheets of a project with two
+    GROUP BY queries
+
+    Args:
+        project: Project
+
+    Returns:
+        Dictionary with the column labels and, for investment and
+        depreciation, one row per sheet plus subtotals per group and a total
+    """
+    years = [project.primeiro_ano + i for i in range(1, project.num_anos + 1)]
+    width = len(years) + 1
+    column_of_year = {year: column for column, year in enumerate(years, start=1)}
+    sheet_keys = list(INVESTMENT_SHEETS)
+    source_keys = sheet_keys + list(DEPRECIATION_SHEETS)
+
+    # Both investment and depreciation sheets, summed in the same queries
+    totals = {sheet_key: [0.0] * width for sheet_key in source_keys}
+
+    initial = db.session.execute(
+        db.select(Equipment.sheet_key, db.func.sum(Equipment.ano0_amount))
+        .where(Equipment.project_id == project.id, Equipment.sheet_key.in_(source_keys))
+        .group_by(Equipment.sheet_key)
+    )
+    for sheet_key, total in initial:
+        totals[sheet_key][0] = float(total or 0)
+
+    per_year = db.session.execute(
+        db.select(Equipment.sheet_key, EquipmentYearValue.year, db.func.sum(EquipmentYearValue.amount))
+        .join(Equipment, Equipment.id == EquipmentYearValue.equipment_id)
+        .where(Equipment.project_id == project.id, Equipment.sheet_key.in_(source_keys),
+               EquipmentYearValue.year.in_(years))
+        .group_by(Equipment.sheet_key, EquipmentYearValue.year)
+    )
+    for sheet_key, year, total in per_year:
+        totals[sheet_key][column_of_year[year]] = float(total or 0)
+
+    investments = {sheet_key: totals[sheet_key] for sheet_key in sheet_keys}
+    depreciations = {
+        sheet_key: depreciation_schedule(investments[sheet_key], INVESTMENT_SHEETS[sheet_key][2])
+        for sheet_key in sheet_keys
+    }
+    # Depreciation typed into the depreciacoes-* sheets adds to the computed one
+    for depreciation_key, sheet_key in DEPRECIATION_SHEETS.items():
+        depreciations[sheet_key] = [
+            computed + typed for computed, typed in zip(depreciations[sheet_key], totals[depreciation_key])
+        ]
+
+    def section(values: Dict[str, List[float]]) -> Dict[str, Any]:
+        rows = []
+        for sheet_key in sheet_keys:
+            name, group, rate = INVESTMENT_SHEETS[sheet_key]
+            rows.append({'sheetKey': sheet_key, 'name': name, 'group': group, 'rate': rate,
+                         'values': values[sheet_key]})
+        subtotals = {
+            group: _sum_columns([row['values'] for row in rows if row['group'] == group], width)
+            for group in (TANGIBLE_GROUP, INTANGIBLE_GROUP)
+        }
+        return {
+            'rows': rows,
+            'subtotals': subtotals,
+            'total': _sum_columns(list(subtotals.values()), width)
+        }
+
+    return {
+        'projectId': project.id,
+        'columns': ['Ano 0'] + [str(year) for year in years],
+        'investment': section(investments),
+        'depreciation': section(depreciations)
+    }
+
+
+def investment_stamp(project: Project) -> tuple:
+    """
+    Read what a summary of the project depends on with one aggregate query
+
+    Any insert, update or delete of the project's investment or depreciation
+    equipment changes
+    the count, max id or max updated_at (year values bump updated_at too).
+
+    Args:
+        project: Project
+
+    Returns:
+        Tuple that changes whenever the summary would
+    """
+    equipment = db.session.execute(
+        db.select(db.func.count(Equipment.id), db.func.max(Equipment.id), db.func.max(Equipment.updated_at))
+        .where(Equipment.project_id == project.id,
+               Equipment.sheet_key.in_(list(INVESTMENT_SHEETS) + list(DEPRECIATION_SHEETS)))
+    ).one()
+    return (project.primeiro_ano, project.num_anos) + tuple(equipment)
+
+
+def get_investment_summary(project: Project) -> Dict[str, Any]:
+    """
+    Get the investment summary of a project, from the cache if it is current
+
+    Args:
+        project: Project
+
+    Returns:
+        Summary as returned by build_investment_summary
+    """
+    stamp = investment_stamp(project)
+    with _summaries_lock:
+        cached = _summaries.get(project.id)
+        if cached is not None and cached[0] == stamp:
+            _summaries.move_to_end(project.id)
+            return cached[1]
+
+    summary = build_investment_summary(project)
+    with _summaries_lock:
+        _summaries[project.id] = (stamp, summary)
+        _summaries.move_to_end(project.id)
+        while len(_summaries) > max(Config.INVESTMENT_SUMMARY_CACHE_SIZE, 0):
+            _summaries.popitem(last=False)
+    return summary
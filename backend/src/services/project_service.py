@@ -0,0 +1,55 @@
+"""
+Project persistence services
+"""
+
+from typing import Any, Dict
+from backend.src import db
+from backend.src.models.equipment import Equipment, EquipmentYearValue
+from backend.src.models.project import Project
+from backend.src.models.storage import get_storage
+
+
+def delete_project_cascade(project: Project) -> Dict[str, Any]:
+    """
+    Delete a project with its equipment and sheets
+
+    Equipment and its values per year are removed with one set-based DELETE
+    each, in the same transaction as the project. The project's sheets are
+    detached from the sheet store first and only discarded after the commit;
+    if anything fails the transaction is rolled back and the sheets are
+    restored.
+
+    Args:
+        project: Project to delete
+
+    Returns:
+        Dictionary with the number of equipment rows and year values removed
+        and the names of the removed sheets
+    """
+    project_id = project.id
+    equipment_ids = db.select(Equipment.id).where(Equipment.project_id == project_id)
+    detached = None
+
+    try:
+        year_values = db.session.execute(
+            db.delete(EquipmentYearValue).where(EquipmentYearValue.equipment_id.in_(equipment_ids))
+        ).rowcount
+        equipment = db.session.execute(
+            db.delete(Equipment).where(Equipment.project_id == project_id)
+        ).rowcount
+        db.session.execute(db.delete(Project).where(Project.id == project_id))
+
+        detached = get_storage().detach_project_data(project_id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        if detached is not None:
+            detached.restore()
+        raise
+
+    detached.discard()
+    return {
+        'equipment': equipment,
+        'equipmentYearValues': year_values,
+        'sheets': detached.sheets
+    }
@@ -0,0 +1,48 @@
+"""
+Project snapshot
+
+Everything the client needs to open a project, gathered in one call: the
+project, its equipment grouped by sheet and its sheets.
+"""
+
+from typing import Any, Dict
+from backend.src.models.equipment import Equipment
+from backend.src.models.project import Project
+from backend.src.models.storage import get_storage, split_project_sheet_name
+
+
+def build_project_snapshot(project: Project) -> Dict[str, Any]:
+    """
+    Build the snapshot of a project
+
+    Equipment comes from one query (plus the selectin load of its year
+    values) and the sheets from one batched storage load.
+
+    Args:
+        project: Project
+
+    Returns:
+        Dictionary with 'project', 'equipment' (sheet key -> list of
+        equipment, in creation order) and 'sheets' (sheet -> sheet data,
+        keyed without the _project_<id> suffix)
+    """
+    equipment = {}
+    rows = (
+        Equipment.query
+        .filter_by(project_id=project.id)
+        .order_by(Equipment.sheet_key, Equipment.created_at.asc())
+    )
+    for item in rows:
+        equipment.setdefault(item.sheet_key, []).append(item.to_dict())
+
+    storage = get_storage()
+    sheets = {}
+    for sheet_name, data in storage.load_sheets(storage.list_project_sheets(project.id)).items():
+        if data:
+            sheets[split_project_sheet_name(sheet_name)[1]] = data
+
+    return {
+        'project': project.to_dict(),
+        'equipment': equipment,
+        'sheets': sheets
+    }
@@ -0,0 +1,63 @@
+"""
+Vectorized projection kernels
+
+NumPy versions of the year-by-year projections in services/calculations.
+Every kernel takes an array of years for one project (1-D) or for a whole
+portfolio of projects (2-D, one project per row), so recalculating every
+project after a change in macro assumptions is a single array operation.
+"""
+
+import numpy as np
+
+# Maximum projection horizon (numAnos) accepted for a project
+MAX_PROJECTION_YEARS = 20
+
+
+def _as_year_array(values) -> np.ndarray:
+    array = np.asarray(values, dtype=np.float64)
+    if array.ndim not in (1, 2):
+        raise ValueError('Expected a 1-D (years) or 2-D (projects x years) array')
+    if array.shape[-1] > MAX_PROJECTION_YEARS:
+        raise ValueError(f'At most {MAX_PROJECTION_YEARS} projection years are supported')
+    return array
+
+
+def inflation_index_kernel(inflation_rates, initial_index=1.0) -> np.ndarray:
+    """
+    Calculate inflation indices for every year as a cumulative product
+    Formula: Índice de Inflação (n) = (1 + Taxa de Inflação (n)) × Índice de Inflação (n-1)
+
+    The initial index is the first factor of the product, so each year is
+    multiplied in the same order as calculate_inflation_index and gives
+    exactly the same result.
+
+    Args:
+        inflation_rates: Inflation rates as percentages, shape (years,) or (projects, years)
+        initial_index: Index of the initial year, a scalar or one value per project
+
+    Returns:
+        Array of inflation indices with the same shape as inflation_rates
+    """
+    rates = _as_year_array(inflation_rates)
+    factors = 1 + np.nan_to_num(rates) / 100
+
+    initial = np.broadcast_to(np.asarray(initial_index, dtype=np.float64), rates.shape[:-1])
+    chain = np.concatenate([initial[..., np.newaxis], factors], axis=-1)
+    return np.cumprod(chain, axis=-1)[..., 1:]
+
+
+def rst_kernel(rendimentos, percentage=0.0) -> np.ndarray:
+    """
+    Calculate Reserva de Segurança de Tesouraria (RST) for every year
+
+    Args:
+        rendimentos: Revenue per year, shape (years,) or (projects, years)
+        percentage: Percentage of revenue to use for RST (default: 1.5 months of revenue)
+
+    Returns:
+        Array of RST values with the same shape as rendimentos
+    """
+    revenue = _as_year_array(rendimentos)
+    if percentage > 0:
+        return revenue * (percentage / 100)
+    return revenue / 12 * 1.5
@@ -0,0 +1,166 @@
+"""
+Sheet templates
+
+Default sheets are compiled once per jurisdiction and projection horizon
+(warm_templates runs at startup) into immutable rows. Bootstrapping a project
+then only copies those rows, adds the year headers and saves every sheet with
+one batched storage write.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from backend.src.config.tax_settings import get_tax_settings
+from backend.src.models.project import Project
+from backend.src.models.storage import get_storage, project_sheet_name
+from backend.src.services.projections import MAX_PROJECTION_YEARS
+
+# Currency -> jurisdiction whose tax settings fill the new project's sheets
+CURRENCY_JURISDICTIONS = {
+    'AOA': 'ANGOLA',
+    'KZ': 'ANGOLA',
+}
+
+# Default rates that are not in the tax settings
+DEFAULT_INFLATION = '15.0'
+DEFAULT_EXCHANGE_RATE = '850.0'  # USD/AOA
+
+# Columns of the default sheet returned for sheets that were never saved
+DEFAULT_SHEET_YEARS = 5
+
+Rows = Tuple[Tuple[str, ...], ...]
+
+
+def _pressupostos_values(jurisdiction: str) -> List[Tuple[str, str]]:
+    """Row name and value of each assumption taken from the tax settings"""
+    taxes = get_tax_settings(jurisdiction)['taxes']
+    return [
+        ('IVA (%)', str(taxes['iva'])),
+        ('Imposto Industrial (%)', str(taxes['imposto_industrial'])),
+        ('Segurança Social Empresa (%)', str(taxes['inss_patronal'])),
+        ('Segurança Social Trabalhador (%)', str(taxes['inss_trabalhador'])),
+        ('Amortizações Imateriais (%)', str(taxes['amortizacao_imaterial'])),
+        ('Inflação (%)', DEFAULT_INFLATION),
+        ('Câmbio (USD/AOA)', DEFAULT_EXCHANGE_RATE),
+    ]
+
+
+@lru_cache(maxsize=None)
+def compile_project_templates(jurisdiction: str, num_anos: int) -> Dict[str, Tuple[str, str, Rows]]:
+    """
+    Compile the sheets of a new project
+
+    Args:
+        jurisdiction: Tax jurisdiction (e.g. 'ANGOLA')
+        num_anos: Projection horizon in years
+
+    Returns:
+        Dictionary of sheet -> (title, subtitle, rows); every value is repeated
+        in the initial column and in each projected year
+    """
+    pressupostos = tuple(
+        (name,) + (value,) * (num_anos + 1)
+        for name, value in _pressupostos_values(jurisdiction)
+    )
+    return {
+        'pressupostos': ('Plano Financeiro', '1. - Pressupostos do Projeto', pressupostos),
+    }
+
+
+@lru_cache(maxsize=None)
+def _default_pressupostos_rows() -> Rows:
+    """Rows of the pressupostos sheet before it is saved: initial values only"""
+    return tuple(
+        (name, value) + ('',) * DEFAULT_SHEET_YEARS
+        for name, value in _pressupostos_values('ANGOLA')
+    )
+
+
+@lru_cache(maxsize=256)
+def _year_headers(primeiro_ano: int, num_anos: int) -> Tuple[str, ...]:
+    return ('Parâmetro', f'{primeiro_ano} (Inicial)') + tuple(
+        str(primeiro_ano + i) for i in range(1, num_anos + 1)
+    )
+
+
+def jurisdiction_for_currency(currency: Optional[str]) -> Optional[str]:
+    """
+    Get the jurisdiction whose templates apply to a project currency
+
+    Args:
+        currency: Currency code (e.g. 'AOA')
+
+    Returns:
+        Jurisdiction, or None if new projects in this currency start empty
+    """
+    return CURRENCY_JURISDICTIONS.get((currency or '').upper())
+
+
+def instantiate_project_sheets(project: Project) -> Dict[str, Dict[str, Any]]:
+    """
+    Build the initial sheets of a project from the compiled templates
+
+    Args:
+        project: Project
+
+    Returns:
+        Dictionary of sheet (without the _project_<id> suffix) -> sheet data
+    """
+    jurisdiction = jurisdiction_for_currency(project.unidade_monetaria)
+    if jurisdiction is None:
+        return {}
+
+    headers = _year_headers(project.primeiro_ano, project.num_anos)
+    return {
+        sheet: {
+            'title': title,
+            'subtitle': subtitle,
+            'headers': list(headers),
+            'rows': [list(row) for row in rows]
+        }
+        for sheet, (title, subtitle, rows) in compile_project_templates(jurisdiction, project.num_anos).items()
+    }
+
+
+def bootstrap_project_sheets(project: Project) -> List[str]:
+    """
+    Save the initial sheets of a new project with one batched write
+
+    Args:
+        project: Project
+
+    Returns:
+        Names of the saved sheets
+    """
+    sheets = {
+        project_sheet_name(project.id, sheet): data
+        for sheet, data in instantiate_project_sheets(project).items()
+    }
+    if sheets:
+        get_storage().save_sheets(sheets)
+    return list(sheets)
+
+
+def default_sheet(sheet_name: str) -> Dict[str, Any]:
+    """
+    Build the sheet returned for a sheet that was never saved
+
+    Args:
+        sheet_name: Name of the sheet
+
+    Returns:
+        Sheet data (pressupostos comes with the Angola tax rates)
+    """
+    return {
+        'title': 'Plano Financeiro',
+        'subtitle': f'{sheet_name}',
+        'headers': ['Parâmetro', 'Inicial'] + [f'Ano {i}' for i in range(1, DEFAULT_SHEET_YEARS + 1)],
+        'rows': [list(row) for row in _default_pressupostos_rows()] if sheet_name == 'pressupostos' else []
+    }
+
+
+def warm_templates():
+    """Compile every template, so no request pays for it"""
+    for jurisdiction in set(CURRENCY_JURISDICTIONS.values()):
+        for num_anos in range(1, MAX_PROJECTION_YEARS + 1):
+            compile_project_templates(jurisdiction, num_anos)
+    _default_pressupostos_rows()
@@ -0,0 +1,100 @@
+"""
+HTTP caching helpers: strong ETags, conditional GET and Cache-Control
+"""
+
+import hashlib
+import re
+from typing import Any, Optional
+from flask import Response, jsonify, request
+
+# Clients may keep a copy but must revalidate it (If-None-Match) before use
+CACHE_CONTROL = 'private, no-cache'
+
+VERSION_ETAG_PATTERN = re.compile(r'^v(\d+)$')
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a strong ETag value from the parts that identify a resource version
+
+    Args:
+        parts: Values that change whenever the resource changes (ids, counters, timestamps)
+
+    Returns:
+        ETag value (without quotes)
+    """
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def version_etag(version: int) -> str:
+    """
+    Build the ETag of a versioned resource
+
+    Args:
+        version: Resource version
+
+    Returns:
+        ETag value (without quotes)
+    """
+    return f'v{version}'
+
+
+def if_match_version() -> Optional[int]:
+    """
+    Read the version a client based its write on from the If-Match header
+
+    Returns:
+        The version, None if the request has no precondition (no If-Match or
+        If-Match: *), or -1 if the header names no version, which never matches
+    """
+    if_match = request.if_match
+    if not if_match or if_match.star_tag:
+        return None
+    for etag in if_match.as_set():
+        match = VERSION_ETAG_PATTERN.match(etag)
+        if match:
+            return int(match.group(1))
+    return -1
+
+
+def not_modified(etag: str) -> Optional[Response]:
+    """
+    Answer a conditional GET before the payload is built
+
+    Args:
+        etag: Current ETag of the resource
+
+    Returns:
+        A 304 response if the client already has this version, else None
+    """
+    if request.if_none_match and request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = CACHE_CONTROL
+        return response
+    return None
+
+
+def cached_json(payload: Any, etag: Optional[str] = None, status: int = 200) -> Response:
+    """
+    Build a JSON response with a strong ETag and Cache-Control headers
+
+    If no ETag is given, one is derived from a hash of the response body.
+    Requests with a matching If-None-Match get a 304 without a body.
+
+    Args:
+        payload: JSON-serializable payload
+        etag: ETag value, or None to hash the body
+        status: HTTP status code
+
+    Returns:
+        Flask response
+    """
+    response = jsonify(payload)
+    response.status_code = status
+    if etag is None:
+        response.add_etag()
+    else:
+        response.set_etag(etag)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response.make_conditional(request)
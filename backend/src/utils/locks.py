@@ -0,0 +1,118 @@
+"""
+Per-key locks shared by threads and worker processes
+
+Each key (e.g. a sheet name) gets its own re-entrant thread lock, so work on
+different keys never waits on each other. The outermost acquisition by a
+thread also takes an advisory lock on a lock file, which serializes the same
+key across worker processes (fcntl on POSIX, msvcrt on Windows).
+
+Thread locks are only kept while some thread uses them, so idle keys don't
+pile up, and readers never create lock files: a reader of a key whose lock
+file doesn't exist yet has nothing to wait for.
+"""
+
+import os
+import threading
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class KeyedLocks:
+    """Re-entrant thread locks by key, backed by lock files"""
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        # Dropped as soon as no thread holds or waits for the lock
+        self._locks: 'weakref.WeakValueDictionary[str, threading.RLock]' = weakref.WeakValueDictionary()
+        # Key -> (lock file descriptor, nesting depth) for the thread holding the key
+        self._held: Dict[str, list] = {}
+
+    def thread_lock(self, key: str) -> threading.RLock:
+        """
+        Get the thread lock of a key, creating it on first use
+
+        The caller must keep a reference to the lock while it uses it.
+
+        Args:
+            key: Lock key
+
+        Returns:
+            Re-entrant lock for the key
+        """
+        with self._guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.RLock()
+            return lock
+
+    @contextmanager
+    def hold(self, key: str, lock_path: Path, exclusive: bool = True) -> Iterator[None]:
+        """
+        Hold a key for this thread and, at the outermost level, its lock file
+
+        Args:
+            key: Lock key
+            lock_path: Lock file shared by every process using the key
+            exclusive: Take an exclusive file lock (writers) or a shared one
+                (readers; Windows only has exclusive locks). Readers skip the
+                file lock when the lock file doesn't exist, instead of creating
+                it and its directory.
+        """
+        with self.thread_lock(key):
+            held = self._held.get(key)
+            if held is not None:
+                # Re-entered by the thread that already holds the file lock
+                held[1] += 1
+                try:
+                    yield
+                finally:
+                    held[1] -= 1
+                return
+
+            fd = _lock_file(lock_path, exclusive)
+            self._held[key] = [fd, 1]
+            try:
+                yield
+            finally:
+                del self._held[key]
+                if fd is not None:
+                    _unlock_file(fd)
+
+
+def _lock_file(lock_path: Path, exclusive: bool) -> Optional[int]:
+    if exclusive:
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    else:
+        try:
+            fd = os.open(lock_path, os.O_RDWR)
+        except FileNotFoundError:
+            return None
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+    except BaseException:
+        os.close(fd)
+        raise
+    return fd
+
+
+def _unlock_file(fd: int):
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
@@ -0,0 +1,252 @@
+"""
+Locale-aware number parsing and formatting
+
+Cells hold numbers written the Portuguese way ("1.234,56", pt-AO/pt-PT), the
+English way ("1,234.56") or plainly ("1234.56"), often with a currency or
+percent sign. parse_number reads all of them: with a locale it uses that
+locale's separators, without one it infers the decimal separator from the
+text. Plain numbers skip all of that through a precompiled fast path, unless
+the locale reads them differently ("1.500" is 1500 in pt-AO).
+
+infer_locale reads the separators of a whole column once, from the cells
+that give them away, for files whose locale is unknown (CSV exports).
+parse_numbers parses a whole row or column into a float64 numpy array and
+format_number caches its results, since sheets repeat the same values a lot;
+format_numbers formats a whole column with string operations instead.
+"""
+
+import math
+import re
+from functools import lru_cache
+from typing import Any, Iterable, NamedTuple, Optional
+import numpy as np
+import pandas as pd
+
+
+class NumberLocale(NamedTuple):
+    """Separators of a locale"""
+    decimal: str
+    group: str
+
+
+LOCALES = {
+    # The application writes Portuguese numbers with '.' grouping; spaces
+    # (the CLDR grouping for pt) are accepted too when parsing
+    'pt-AO': NumberLocale(decimal=',', group='.'),
+    'pt-PT': NumberLocale(decimal=',', group='.'),
+    'en': NumberLocale(decimal='.', group=','),
+}
+DEFAULT_LOCALE = 'pt-AO'
+
+# Plain numbers: optional sign, digits, optional '.' decimals
+_PLAIN_NUMBER = re.compile(r'^[+-]?(?:\d+\.?\d*|\.\d+)$')
+# Plain numbers that are also valid '.' grouping ("1.500", "-12.345.678")
+_DOT_GROUPED = re.compile(r'^[+-]?\d{1,3}(?:\.\d{3})+$')
+# Plain numbers that are also valid ',' grouping ("1,500")
+_COMMA_GROUPED = re.compile(r'^[+-]?\d{1,3}(?:,\d{3})+$')
+# Digits with separators only, as left after the noise is dropped
+_SEPARATED_NUMBER = re.compile(r'^[+-]?[\d.,]*\d[\d.,]*$')
+# Position of each thousands separator in the integer part of a number
+_GROUPS = re.compile(r'(\d)(?=(?:\d{3})+$)')
+# Currency and percent signs and every kind of space, dropped before parsing
+_NOISE = re.compile(r'[\s\u00a0\u202f%€$]|\b(?:Kz|AOA|USD|EUR)\b', re.IGNORECASE)
+
+
+def _locale(locale: Optional[str]) -> Optional[NumberLocale]:
+    if locale is None:
+        return None
+    try:
+        return LOCALES[locale]
+    except KeyError:
+        raise ValueError(f"Unknown number locale '{locale}' (expected {', '.join(LOCALES)})")
+
+
+def _infer_separators(text: str) -> NumberLocale:
+    """Guess the separators of a number written in an unknown locale"""
+    comma, dot = text.rfind(','), text.rfind('.')
+    if comma >= 0 and dot >= 0:
+        # Both used: the last one is the decimal separator
+        return LOCALES['pt-PT'] if comma > dot else LOCALES['en']
+    if comma >= 0:
+        # "1,5" is a decimal comma, "1,234,567" is grouping
+        return LOCALES['pt-PT'] if text.count(',') == 1 else LOCALES['en']
+    # "1.5" is a decimal point, "1.234.567" is grouping
+    return LOCALES['pt-PT'] if text.count('.') > 1 else LOCALES['en']
+
+
+def _is_plain(text: str, separators: Optional[NumberLocale]) -> bool:
+    """Whether text is a plain number that means the same in the given locale"""
+    if not _PLAIN_NUMBER.match(text):
+        return False
+    # With '.' grouping, "1.500" is fifteen hundred; "1.5" can't be grouping
+    return separators is None or separators.group != '.' or not _DOT_GROUPED.match(text)
+
+
+def _contradicts(text: str, separators: NumberLocale) -> bool:
+    """Whether text uses the separators of the other convention than the locale's"""
+    decimal = text.rfind(separators.decimal)
+    if decimal < 0 or separators.group not in text:
+        return False
+    # "1,234.56" in pt-AO or "1.234,56" in en: grouping after the decimal
+    # separator, or three or more decimals after grouped thousands
+    return text.rfind(separators.group) > decimal or len(text) - decimal - 1 > 2
+
+
+@lru_cache(maxsize=8192)
+def _parse_text(text: str, locale: Optional[str]) -> Optional[float]:
+    locale_separators = _locale(locale)
+    if _is_plain(text, locale_separators):
+        return float(text)
+
+    cleaned = _NOISE.sub('', text)
+    if not cleaned:
+        return None
+    if _is_plain(cleaned, locale_separators):
+        return float(cleaned)
+
+    if locale_separators is not None and _contradicts(cleaned, locale_separators):
+        return None
+    separators = locale_separators or _infer_separators(cleaned)
+    cleaned = cleaned.replace(separators.group, '').replace(separators.decimal, '.')
+    if _PLAIN_NUMBER.match(cleaned):
+        return float(cleaned)
+    return None
+
+
+def parse_number(value: Any, locale: Optional[str] = None) -> Optional[float]:
+    """
+    Parse a number written in any of the supported locales
+
+    Without a locale, or with 'en', a single dot without a comma is always
+    the decimal point ("1.500" is 1.5). With 'pt-AO' or 'pt-PT' a dot that
+    groups thousands is read as grouping ("1.500" is 1500), while other plain
+    numbers ("1234.56", "1.5") keep their decimal point. Text written in
+    the other convention than an explicit locale ("1,234.56" in pt-AO,
+    "1.234,56" in en) is not a number.
+
+    Args:
+        value: String or number (e.g. "1.234,56", "1,234.56", "€ 12,5", "15%")
+        locale: 'pt-AO', 'pt-PT' or 'en', or None to infer the separators
+
+    Returns:
+        Parsed float (percentages are not divided by 100), or None if the
+        value is empty or not a number
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    return _parse_text(value.strip(), locale)
+
+
+def parse_numbers(values: Iterable[Any], locale: Optional[str] = None, default: float = math.nan) -> np.ndarray:
+    """
+    Parse a whole row or column of cells
+
+    Cells that are all numbers are converted by numpy in one call; text goes
+    through the cached per-value parser, so repeated strings are parsed once.
+
+    Args:
+        values: Cells (strings and/or numbers)
+        locale: 'pt-AO', 'pt-PT' or 'en', or None to infer the separators
+        default: Value for cells that are empty or not numbers
+
+    Returns:
+        float64 array with one value per cell
+    """
+    if isinstance(values, np.ndarray) and values.dtype.kind in 'iuf':
+        return values.astype(np.float64)
+    values = values if isinstance(values, (list, tuple)) else list(values)
+    if all(type(value) in (int, float) for value in values):
+        return np.asarray(values, dtype=np.float64)
+
+    def parse(value):
+        number = parse_number(value, locale)
+        return default if number is None else number
+
+    return np.fromiter(map(parse, values), dtype=np.float64, count=len(values))
+
+
+def infer_locale(values: Iterable[Any]) -> Optional[str]:
+    """
+    Guess the locale of a column of numbers from its text cells
+
+    The first cell whose separators can only be read one way decides:
+    "1.234,56" or "1,5" mean pt-AO, "1,234.56", "1.5" or "1,234,567" mean
+    en. Cells like "1.500" or "1,500" fit both and are skipped.
+
+    Args:
+        values: Cells of the column (strings and/or numbers)
+
+    Returns:
+        'pt-AO' or 'en', or None if no cell tells them apart
+    """
+    for value in values:
+        if not isinstance(value, str):
+            continue
+        text = _NOISE.sub('', value.strip())
+        if not _SEPARATED_NUMBER.match(text):
+            continue
+        comma, dot = text.rfind(','), text.rfind('.')
+        if comma >= 0 and dot >= 0:
+            return DEFAULT_LOCALE if comma > dot else 'en'
+        if comma >= 0:
+            if text.count(',') > 1:
+                return 'en'
+            if not _COMMA_GROUPED.match(text):
+                return DEFAULT_LOCALE
+        elif dot >= 0:
+            if text.count('.') > 1:
+                return DEFAULT_LOCALE
+            if not _DOT_GROUPED.match(text):
+                return 'en'
+    return None
+
+
+@lru_cache(maxsize=8192)
+def format_number(value: float, decimals: int = 2, locale: str = DEFAULT_LOCALE, grouping: bool = True) -> str:
+    """
+    Format a number with the separators of a locale
+
+    Args:
+        value: Number to format
+        decimals: Number of decimal places
+        locale: 'pt-AO', 'pt-PT' or 'en'
+        grouping: Whether to add thousands separators
+
+    Returns:
+        Formatted string (e.g., "1.234,56" for pt-AO)
+    """
+    separators = _locale(locale)
+    text = f'{value:,.{decimals}f}' if grouping else f'{value:.{decimals}f}'
+    if separators.decimal == '.':
+        return text.replace(',', separators.group)
+    return text.replace(',', '\0').replace('.', separators.decimal).replace('\0', separators.group)
+
+
+def format_numbers(values: Iterable[float], decimals: int = 2, locale: str = DEFAULT_LOCALE,
+                   grouping: bool = True) -> np.ndarray:
+    """
+    Format a whole column of numbers, like format_number for each value
+
+    Args:
+        values: Numbers to format
+        decimals: Number of decimal places
+        locale: 'pt-AO', 'pt-PT' or 'en'
+        grouping: Whether to add thousands separators
+
+    Returns:
+        Array of formatted strings (object dtype)
+    """
+    separators = _locale(locale)
+    numbers = np.asarray(values if isinstance(values, (np.ndarray, pd.Series)) else list(values), dtype=np.float64)
+    if not numbers.size:
+        return np.array([], dtype=object)
+    text = pd.Series(np.char.mod(f'%.{decimals}f', numbers), dtype=object)
+    parts = text.str.partition('.')
+    integer = parts[0]
+    if grouping:
+        integer = integer.str.replace(_GROUPS, r'\1' + separators.group, regex=True)
+    if decimals:
+        integer = integer + parts[1].str.replace('.', separators.decimal, regex=False) + parts[2]
+    return integer.to_numpy(dtype=object)
@@ -0,0 +1,107 @@
+"""
+Keyset pagination and streamed JSON lists
+
+Listings take ?after_id=<id>&limit=<n>: the page holds the rows that come
+after the row with id after_id in the listing order, so the database seeks
+straight to them instead of skipping an OFFSET. With ?stream=1 the whole
+listing is sent as a chunked JSON document built from a server-side cursor.
+"""
+
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+from flask import Response, request, stream_with_context
+from sqlalchemy import and_, or_
+from backend.src.utils.http_cache import CACHE_CONTROL
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Rows fetched from the cursor at a time when streaming
+STREAM_BATCH_SIZE = 500
+
+
+class PaginationError(ValueError):
+    """Invalid pagination parameters (the message is shown to users)"""
+
+
+def page_params() -> Optional[Tuple[Optional[int], int]]:
+    """
+    Read the keyset pagination parameters of the request
+
+    Returns:
+        None if the request asks for no page (neither after_id nor limit),
+        else tuple (after_id or None for the first page, limit)
+
+    Raises:
+        PaginationError: If after_id or limit is not a valid number
+    """
+    after_id = request.args.get('after_id')
+    limit = request.args.get('limit')
+    if after_id is None and limit is None:
+        return None
+
+    try:
+        after_id = int(after_id) if after_id is not None else None
+    except ValueError:
+        raise PaginationError('after_id deve ser um número inteiro')
+
+    try:
+        limit = int(limit) if limit is not None else DEFAULT_PAGE_SIZE
+    except ValueError:
+        raise PaginationError('limit deve ser um número inteiro')
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise PaginationError(f'limit deve ser um número entre 1 e {MAX_PAGE_SIZE}')
+    return after_id, limit
+
+
+def keyset_after(order_column, id_column, cursor_value: Any, cursor_id: int, descending: bool = False):
+    """
+    Build the WHERE clause selecting the rows after a cursor row
+
+    The listing must be ordered by (order_column, id_column), both ascending
+    or both descending; the id breaks ties between equal order values.
+
+    Args:
+        order_column: Column the listing is ordered by (e.g. created_at)
+        id_column: Primary key column
+        cursor_value: order_column value of the cursor row
+        cursor_id: ID of the cursor row
+        descending: Whether the listing is in descending order
+
+    Returns:
+        SQL expression
+    """
+    if descending:
+        return or_(order_column < cursor_value, and_(order_column == cursor_value, id_column < cursor_id))
+    return or_(order_column > cursor_value, and_(order_column == cursor_value, id_column > cursor_id))
+
+
+def wants_stream() -> bool:
+    """Whether the request asks for a streamed response (?stream=1)"""
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def stream_json_list(key: str, items: Iterable[Any], serialize: Callable[[Any], Dict[str, Any]],
+                     etag: Optional[str] = None) -> Response:
+    """
+    Stream {"success": true, "<key>": [...]} one item at a time
+
+    Args:
+        key: Name of the list in the document
+        items: Items to send, e.g. a yield_per result
+        serialize: Converts an item to a JSON-serializable dictionary
+        etag: ETag value of the listing, if known
+
+    Returns:
+        Chunked Flask response
+    """
+    def generate() -> Iterator[str]:
+        yield f'{{"success": true, {json.dumps(key)}: ['
+        for index, item in enumerate(items):
+            yield (',' if index else '') + json.dumps(serialize(item), ensure_ascii=False)
+        yield ']}'
+
+    response = Response(stream_with_context(generate()), mimetype='application/json')
+    if etag is not None:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
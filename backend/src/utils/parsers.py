@@ -2,27 +2,54 @@
 Utility functions for parsing and formatting values
 """
 
+from typing import Optional
+from backend.src.utils.numbers import format_number, parse_number
+
 
 def parse_value(value: str) -> float:
     """
     Parse a cell value to float, handling percentages and currency
     
     Args:
-        value: String value that may contain currency symbols, percentages, etc.
+        value: String value that may contain currency symbols, percentages,
+            thousands separators and a decimal comma or point
     
     Returns:
         Parsed float value, or 0.0 if parsing fails
     """
-    if not value:
-        return 0.0
-    # Remove currency symbols, commas, spaces, and percentage signs
-    cleaned = value.replace('€', '').replace(',', '').replace(' ', '').replace('%', '')
-    # Replace comma decimal separator with dot
-    cleaned = cleaned.replace(',', '.')
-    try:
-        return float(cleaned)
-    except ValueError:
-        return 0.0
+    number = parse_number(value)
+    return 0.0 if number is None else number
+
+
+def parse_pt_number(value) -> Optional[float]:
+    """
+    Parse a number written in Portuguese format (e.g. "1.234,56")
+
+    Plain numbers ("1234.56", 1234.56) are accepted too. A single dot without
+    a comma is read as the decimal point; dots are only thousands separators
+    next to a decimal comma or when there are several of them ("1.234.567").
+
+    Args:
+        value: String or number
+
+    Returns:
+        Parsed float, or None if the value is empty or not a number
+    """
+    return parse_number(value)
+
+
+def format_pt_number(value: float, decimals: int = 2) -> str:
+    """
+    Format a number in Portuguese format with thousands separators
+
+    Args:
+        value: Float value to format
+        decimals: Number of decimal places
+
+    Returns:
+        Formatted string (e.g., "1.234,56")
+    """
+    return format_number(value, decimals)
 
 
 def format_decimal(value: float, decimals: int = 4) -> str:
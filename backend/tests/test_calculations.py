@@ -3,7 +3,9 @@ Tests for calculation services
 """
 
 import pytest
-from backend.src.services.calculations import calculate_inflation_index, calculate_rst
+import numpy as np
+from backend.src.services.calculations import calculate_inflation_index, calculate_rst, recalculate_inflation_portfolio
+from backend.src.services.projections import MAX_PROJECTION_YEARS, inflation_index_kernel
 
 
 def test_calculate_inflation_index():
@@ -46,3 +48,42 @@ def test_calculate_rst_with_percentage():
     # Should be 10% of revenue
     assert rst['Ano 1'] == 10000.0
 
+
+
+def test_inflation_index_kernel_matches_scalar_chain():
+    """Test that the vectorized kernel reproduces the scalar year-by-year chain"""
+    rates = [2.0, 3.5, -1.0, 15.0, 0.0, 7.25]
+    expected = []
+    previous = 1.1
+    for rate in rates:
+        previous = calculate_inflation_index(rate, previous)
+        expected.append(previous)
+
+    assert inflation_index_kernel(rates, 1.1).tolist() == expected
+
+
+def test_inflation_index_kernel_portfolio():
+    """Test that many projects are computed in one call, up to 20 years"""
+    rates = np.full((3, MAX_PROJECTION_YEARS), 10.0)
+    rates[1] = 0.0
+
+    indices = inflation_index_kernel(rates, [1.0, 2.0, 1.0])
+
+    assert indices.shape == (3, MAX_PROJECTION_YEARS)
+    assert indices[1].tolist() == [2.0] * MAX_PROJECTION_YEARS
+    assert indices[0, -1] == pytest.approx(1.1 ** MAX_PROJECTION_YEARS)
+
+    with pytest.raises(ValueError):
+        inflation_index_kernel(np.zeros(MAX_PROJECTION_YEARS + 1))
+
+
+def test_recalculate_inflation_portfolio():
+    """Test that sheets with different horizons are recalculated together"""
+    short = {'rows': [['Índice de Inflação', '1'], ['Taxa de Inflação', '', '10', '10']]}
+    long = {'rows': [['Índice de Inflação', '1'], ['Taxa de Inflação', ''] + ['0'] * 20]}
+
+    results = recalculate_inflation_portfolio({'short': short, 'long': long, 'empty': {}})
+
+    assert results['short'] == {'Índice de Inflação-2': '1.1000', 'Índice de Inflação-3': '1.2100'}
+    assert len(results['long']) == 20
+    assert results['empty'] == {}
@@ -0,0 +1,95 @@
+"""
+Tests for the database engine profiles
+"""
+
+import pytest
+from backend.config.database import configure_database, describe_profile, resolve_profile
+from backend.config.settings import TestingConfig
+from backend.src import db
+from backend.src.app import create_app
+
+
+def test_sqlite_profile_sets_pragmas_on_every_connection(tmp_path, monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "test.db"}')
+    monkeypatch.setattr(TestingConfig, 'DATA_DIR', str(tmp_path / 'data'))
+    app = create_app('testing')
+
+    assert app.extensions['database_profile']['profile'] == 'sqlite'
+    assert describe_profile(app.extensions['database_profile']).startswith('sqlite (journal_mode=WAL')
+    with app.app_context():
+        with db.engine.connect() as connection:
+            assert connection.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+            assert connection.exec_driver_sql('PRAGMA synchronous').scalar() == 1  # NORMAL
+            assert connection.exec_driver_sql('PRAGMA busy_timeout').scalar() == TestingConfig.DB_BUSY_TIMEOUT
+            assert connection.exec_driver_sql('PRAGMA cache_size').scalar() == -TestingConfig.SQLITE_CACHE_SIZE_KB
+
+
+def test_server_profile_sizes_the_pool():
+    config = {
+        'SQLALCHEMY_DATABASE_URI': 'postgresql://user@localhost/viabiliza',
+        'DB_PROFILE': 'auto',
+        'DB_POOL_SIZE': 8,
+        'SQLALCHEMY_ENGINE_OPTIONS': {'pool_recycle': 60}
+    }
+    info = configure_database(config)
+
+    assert info['profile'] == 'server'
+    options = config['SQLALCHEMY_ENGINE_OPTIONS']
+    assert options['pool_size'] == 8
+    assert options['pool_pre_ping'] is True
+    assert options['pool_recycle'] == 60  # explicit engine options win
+
+
+def test_profile_must_match_the_database():
+    with pytest.raises(ValueError):
+        resolve_profile({'SQLALCHEMY_DATABASE_URI': 'postgresql://localhost/db', 'DB_PROFILE': 'sqlite'})
+    with pytest.raises(ValueError):
+        resolve_profile({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'DB_PROFILE': 'fast'})
+    assert resolve_profile({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'DB_PROFILE': 'none'}) == 'none'
+
+
+def test_migrations_build_the_model_schema(tmp_path, monkeypatch):
+    from alembic.autogenerate import compare_metadata
+    from alembic.migration import MigrationContext
+    from backend.src.app import upgrade_database
+
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "test.db"}')
+    monkeypatch.setattr(TestingConfig, 'DATA_DIR', str(tmp_path / 'data'))
+    app = create_app('testing')
+
+    with app.app_context():
+        # create_app leaves the schema to the migrations
+        assert db.inspect(db.engine).get_table_names() == []
+        upgrade_database()
+        with db.engine.connect() as connection:
+            assert compare_metadata(MigrationContext.configure(connection), db.metadata) == []
+
+
+def test_duplicate_project_names_stop_the_index_migration(tmp_path, monkeypatch, capsys):
+    from flask_migrate import upgrade
+    from backend.src.app import MIGRATIONS_DIR, upgrade_database
+
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "test.db"}')
+    monkeypatch.setattr(TestingConfig, 'DATA_DIR', str(tmp_path / 'data'))
+    app = create_app('testing')
+
+    with app.app_context():
+        upgrade(directory=str(MIGRATIONS_DIR), revision='0002_equipment_year_values')
+        for project_id in (1, 2, 3):
+            db.session.execute(db.text(
+                "INSERT INTO projects (id, nome, primeiro_ano, num_anos, unidade_monetaria, created_at, updated_at) "
+                "VALUES (:id, 'Fábrica', 2024, 5, 'AOA', '2024-01-01', '2024-01-01')"
+            ), {'id': project_id})
+        db.session.commit()
+
+        # Flask-Migrate logs the error and exits with status 1
+        with pytest.raises(SystemExit):
+            upgrade_database()
+        assert '"Fábrica" (3x)' in capsys.readouterr().err
+
+        db.session.execute(db.text("UPDATE projects SET nome = nome || ' ' || id WHERE id > 1"))
+        db.session.commit()
+        upgrade_database()
+        indexes = {index['name']: index for index in db.inspect(db.engine).get_indexes('projects')}
+        assert indexes['uq_projects_nome']['unique']
+        assert 'ix_projects_nome' not in indexes
@@ -0,0 +1,329 @@
+"""
+Tests for equipment amounts stored as numbers
+"""
+
+import json
+import pytest
+from backend.config.settings import TestingConfig
+from backend.src import db
+from backend.src.app import create_app, upgrade_database
+from backend.src.models.equipment import Equipment
+from backend.src.models.project import Project
+from backend.src.utils.parsers import parse_pt_number, format_pt_number
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "test.db"}')
+    monkeypatch.setattr(TestingConfig, 'DATA_DIR', str(tmp_path / 'data'))
+    app = create_app('testing')
+    with app.app_context():
+        upgrade_database()
+        db.session.add(Project(id=1, nome='Teste', primeiro_ano=2024, num_anos=5))
+        db.session.commit()
+        yield app
+
+
+def test_pt_number_helpers():
+    assert parse_pt_number('1.234,56') == 1234.56
+    assert parse_pt_number('1000,00') == 1000.0
+    assert parse_pt_number('1234.5') == 1234.5
+    assert parse_pt_number('abc') is None
+    assert format_pt_number(1234567.891) == '1.234.567,89'
+
+
+def test_year_values_keep_string_interface(app):
+    equipment = Equipment.from_dict({
+        'sheetKey': 'equipamento-basico',
+        'equipmentName': 'Máquina A',
+        'ano0': '1.234,56',
+        'yearValues': {'2024': '2000,00', '2025': '1.500,5'}
+    }, 1)
+    db.session.add(equipment)
+    db.session.commit()
+
+    data = db.session.get(Equipment, equipment.id).to_dict()
+    assert data['ano0'] == '1.234,56'
+    assert data['yearValues'] == {'2024': '2.000,00', '2025': '1.500,50'}
+
+    # Replacing values updates existing years in place
+    equipment.year_values = {'2025': '10,00', '2026': '5'}
+    db.session.commit()
+    assert db.session.get(Equipment, equipment.id).to_dict()['yearValues'] == {'2025': '10,00', '2026': '5,00'}
+
+
+def test_year_totals_group_by_year(app):
+    for name, values in (('A', {'2024': '100,00', '2025': '50,00'}), ('B', {'2024': '1.000,00'})):
+        db.session.add(Equipment.from_dict({'sheetKey': 'k', 'equipmentName': name, 'yearValues': values}, 1))
+    db.session.commit()
+
+    assert Equipment.year_totals(1) == {2024: 1100.0, 2025: 50.0}
+    assert Equipment.year_totals(1, 'other') == {}
+
+
+def test_bulk_save_applies_only_the_differences(app):
+    client = app.test_client()
+    url = '/api/equipment/1/k/bulk'
+    first = client.post(url, json={'equipment': [
+        {'equipmentName': 'A', 'ano0': '100,00', 'yearValues': {'2024': '1,00'}},
+        {'equipmentName': 'B', 'ano0': '200,00', 'yearValues': {}},
+        {'equipmentName': 'C', 'ano0': '300,00', 'yearValues': {}}
+    ]}).get_json()
+    assert first['counts'] == {'inserted': 3, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+    a, b, c = first['equipment']
+
+    second = client.post(url, json={'equipment': [
+        {'id': a['id'], 'equipmentName': 'A', 'ano0': '100,00', 'yearValues': {'2024': '1,00'}},
+        {'id': c['id'], 'equipmentName': 'C', 'ano0': '300,00', 'yearValues': {'2025': '5,00'}},
+        {'equipmentName': 'D', 'ano0': '400,00', 'yearValues': {'2024': '2,00'}}
+    ]}).get_json()
+    assert second['counts'] == {'inserted': 1, 'updated': 1, 'deleted': 1, 'unchanged': 1}
+    assert [eq['equipmentName'] for eq in second['equipment']] == ['A', 'C', 'D']
+    assert second['equipment'][0]['id'] == a['id']
+    assert second['equipment'][0]['createdAt'] == a['createdAt']
+    assert second['equipment'][1]['yearValues'] == {'2025': '5,00'}
+    assert db.session.get(Equipment, b['id']) is None
+    assert Equipment.year_totals(1) == {2024: 3.0, 2025: 5.0}
+
+
+def test_depreciation_schedule_is_straight_line():
+    from backend.src.services.investment_summary import depreciation_schedule
+    # 1000 in Ano 0 at 25% and 400 in year 2 at 25%, over 5 years
+    assert depreciation_schedule([1000.0, 0, 0, 0, 0, 0], 25.0) == [0.0, 250.0, 250.0, 250.0, 250.0, 0.0]
+    assert depreciation_schedule([0, 0, 400.0, 0, 0, 0], 25.0) == [0.0, 0.0, 100.0, 100.0, 100.0, 100.0]
+    assert depreciation_schedule([500.0, 0], 0.0) == [0.0, 0.0]
+
+
+def test_investment_summary_is_cached_until_equipment_changes(app):
+    client = app.test_client()
+    client.post('/api/equipment/1/ativos-tangiveis-equipamento-basico/bulk', json={'equipment': [
+        {'equipmentName': 'Máquina', 'ano0': '1.000,00', 'yearValues': {'2025': '500,00'}}
+    ]})
+
+    summary = client.get('/api/projects/1/investment-summary').get_json()['summary']
+    assert summary['columns'] == ['Ano 0', '2025', '2026', '2027', '2028', '2029']
+    basic = summary['investment']['rows'][2]
+    assert basic['sheetKey'] == 'ativos-tangiveis-equipamento-basico'
+    assert basic['values'] == [1000.0, 500.0, 0.0, 0.0, 0.0, 0.0]
+    assert summary['investment']['total'][0] == 1000.0
+    assert summary['depreciation']['rows'][2]['values'][1:3] == [150.0, 150.0]
+
+    client.post('/api/equipment/1/ativos-intangiveis-goodwill/bulk', json={'equipment': [
+        {'equipmentName': 'Marca', 'ano0': '250,00', 'yearValues': {}}
+    ]})
+    summary = client.get('/api/projects/1/investment-summary').get_json()['summary']
+    assert summary['investment']['subtotals']['Ativos Intangíveis'][0] == 250.0
+    assert summary['investment']['total'][0] == 1250.0
+
+
+def test_investment_summary_sees_writes_of_other_processes(app, monkeypatch):
+    from backend.config.settings import Config
+    from backend.src.services import investment_summary
+
+    client = app.test_client()
+    client.post('/api/equipment/1/ativos-tangiveis-edificios/bulk', json={'equipment': [
+        {'equipmentName': 'Armazém', 'ano0': '100,00', 'yearValues': {}}
+    ]})
+    assert client.get('/api/projects/1/investment-summary').get_json()['summary']['investment']['total'][0] == 100.0
+
+    # Another worker's write: a separate connection, no session events here
+    with db.engine.begin() as connection:
+        connection.execute(db.text(
+            "UPDATE equipment SET ano0_amount = 300, updated_at = '2099-01-01 00:00:00.000000'"
+        ))
+    assert client.get('/api/projects/1/investment-summary').get_json()['summary']['investment']['total'][0] == 300.0
+
+    monkeypatch.setattr(Config, 'INVESTMENT_SUMMARY_CACHE_SIZE', 2)
+    for project_id in (2, 3, 4):
+        db.session.add(Project(id=project_id, nome=f'Projeto {project_id}', primeiro_ano=2024, num_anos=5))
+    db.session.commit()
+    for project_id in (1, 2, 3, 4):
+        client.get(f'/api/projects/{project_id}/investment-summary')
+    assert list(investment_summary._summaries) == [3, 4]
+
+
+def test_depreciation_summary_adds_depreciation_sheets(app):
+    client = app.test_client()
+    client.post('/api/equipment/1/ativos-tangiveis-outros/bulk', json={'equipment': [
+        {'equipmentName': 'Vedação', 'ano0': '1.000,00', 'yearValues': {}}
+    ]})
+    client.post('/api/equipment/1/depreciacoes-outros-tangiveis/bulk', json={'equipment': [
+        {'equipmentName': 'Vedação', 'ano0': '', 'yearValues': {'2025': '50,00'}}
+    ]})
+    client.post('/api/equipment/1/depreciacoes-goodwill/bulk', json={'equipment': [
+        {'equipmentName': 'Marca', 'ano0': '', 'yearValues': {'2026': '20,00'}}
+    ]})
+
+    depreciation = client.get('/api/projects/1/investment-summary').get_json()['summary']['depreciation']
+    rows = {row['sheetKey']: row for row in depreciation['rows']}
+    assert rows['ativos-tangiveis-outros']['name'] == 'Outros ativos fixos tangíveis'
+    assert rows['ativos-tangiveis-outros']['values'][1:3] == [150.0, 100.0]
+    assert rows['ativos-intangiveis-goodwill']['values'][1:3] == [0.0, 20.0]
+    assert depreciation['subtotals']['Ativos Fixos Tangíveis'][1] == 150.0
+    assert depreciation['total'][1:3] == [150.0, 120.0]
+
+    # Typing into a depreciation sheet changes the stamp of the cached summary
+    client.post('/api/equipment/1/depreciacoes-goodwill/bulk', json={'equipment': [
+        {'equipmentName': 'Marca', 'ano0': '', 'yearValues': {'2026': '30,00'}}
+    ]})
+    depreciation = client.get('/api/projects/1/investment-summary').get_json()['summary']['depreciation']
+    assert depreciation['total'][2] == 130.0
+
+
+def test_hot_queries_are_indexed(app):
+    inspector = db.inspect(db.engine)
+    equipment_indexes = {index['name']: index for index in inspector.get_indexes('equipment')}
+    assert equipment_indexes['ix_equipment_project_sheet_created']['column_names'] == [
+        'project_id', 'sheet_key', 'created_at']
+    project_indexes = {index['name']: index for index in inspector.get_indexes('projects')}
+    assert project_indexes['uq_projects_nome']['unique']
+    assert 'ix_projects_updated_at' in project_indexes
+
+    plan = db.session.execute(db.text(
+        "EXPLAIN QUERY PLAN SELECT * FROM equipment WHERE project_id = 1 AND sheet_key = 'x' ORDER BY created_at"
+    )).all()
+    assert 'ix_equipment_project_sheet_created' in plan[0][-1]
+
+
+def test_duplicate_project_name_is_rejected(app):
+    response = app.test_client().post('/api/projects', json={
+        'nome': 'Teste', 'primeiroAno': 2024, 'numAnos': 5, 'unidadeMonetaria': 'EUR', 'pin': '1234'
+    })
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Já existe um projeto com este nome'
+
+
+@pytest.mark.parametrize('sheet_store', ['json', 'sql'])
+def test_project_snapshot_returns_equipment_and_sheets(app, sheet_store):
+    from backend.src.models.storage import get_storage, project_sheet_name
+
+    app.config['SHEET_STORE'] = sheet_store
+    client = app.test_client()
+    for sheet_key, name in [('ativos-tangiveis-edificios', 'Armazém'),
+                            ('ativos-tangiveis-equipamento-basico', 'Máquina')]:
+        client.post(f'/api/equipment/1/{sheet_key}/bulk', json={'equipment': [
+            {'equipmentName': name, 'ano0': '100,00', 'yearValues': {'2025': '10,00'}}
+        ]})
+    storage = get_storage()
+    for sheet in ('pressupostos', 'rendimentos'):
+        storage.save_sheet_data(project_sheet_name(1, sheet), {'title': sheet, 'rows': [['Linha', '1']]})
+
+    snapshot = client.get('/api/projects/1/snapshot').get_json()['snapshot']
+    assert snapshot['project']['id'] == 1
+    assert sorted(snapshot['equipment']) == ['ativos-tangiveis-edificios', 'ativos-tangiveis-equipamento-basico']
+    assert snapshot['equipment']['ativos-tangiveis-edificios'][0]['yearValues'] == {'2025': '10,00'}
+    assert sorted(snapshot['sheets']) == ['pressupostos', 'rendimentos']
+    assert snapshot['sheets']['rendimentos']['rows'] == [['Linha', '1']]
+
+
+def test_snapshot_of_unknown_project_is_404(app):
+    response = app.test_client().get('/api/projects/999/snapshot')
+    assert response.status_code == 404
+
+
+def test_equipment_listing_pages_and_streams(app):
+    client = app.test_client()
+    url = '/api/equipment/1/ativos-tangiveis-equipamento-basico'
+    # One bulk save gives every row the same created_at: the id breaks the tie
+    client.post(f'{url}/bulk', json={'equipment': [
+        {'equipmentName': f'Item {i}', 'ano0': '1,00', 'yearValues': {}} for i in range(5)
+    ]})
+    everything = client.get(url).get_json()['equipment']
+
+    names, after_id = [], None
+    while True:
+        query = f'?limit=2&after_id={after_id}' if after_id else '?limit=2'
+        page = client.get(url + query).get_json()
+        names += [item['equipmentName'] for item in page['equipment']]
+        after_id = page['nextAfterId']
+        if after_id is None:
+            break
+    assert names == [item['equipmentName'] for item in everything]
+
+    streamed = client.get(f'{url}?stream=1')
+    assert streamed.is_streamed
+    assert json.loads(streamed.get_data()) == {'success': True, 'equipment': everything}
+
+    assert client.get(f'{url}?limit=0').status_code == 400
+    assert client.get(f'{url}?after_id=999').status_code == 400
+
+
+def test_project_listing_pages_newest_first(app):
+    for i in range(3):
+        db.session.add(Project(nome=f'Projeto {i}', primeiro_ano=2024, num_anos=5))
+    db.session.commit()
+    client = app.test_client()
+
+    first = client.get('/api/projects?limit=3').get_json()
+    second = client.get(f"/api/projects?limit=3&after_id={first['nextAfterId']}").get_json()
+    ids = [project['id'] for project in first['projects'] + second['projects']]
+    assert ids == [project['id'] for project in client.get('/api/projects').get_json()['projects']]
+    assert len(ids) == 4 and second['nextAfterId'] is None
+
+    streamed = json.loads(client.get('/api/projects?stream=1').get_data())
+    assert [project['id'] for project in streamed['projects']] == ids
+
+
+def _project_with_data(app):
+    from backend.src.models.storage import get_storage, project_sheet_name
+
+    client = app.test_client()
+    client.post('/api/equipment/1/ativos-tangiveis-edificios/bulk', json={'equipment': [
+        {'equipmentName': 'Armazém', 'ano0': '100,00', 'yearValues': {'2025': '10,00', '2026': '5,00'}}
+    ]})
+    storage = get_storage()
+    storage.save_sheet_data(project_sheet_name(1, 'pressupostos'), {'rows': [['Inflação (%)', '15.0']]})
+    storage.update_cell(project_sheet_name(1, 'pressupostos'), 'Inflação (%)', 1, '12.0')  # still journaled
+    return client, storage
+
+
+def test_delete_project_removes_equipment_and_sheets(app):
+    client, storage = _project_with_data(app)
+
+    response = client.delete('/api/projects/1')
+    assert response.status_code == 200
+    assert response.get_json()['removed'] == {
+        'equipment': 1, 'equipmentYearValues': 2, 'sheets': ['pressupostos_project_1']
+    }
+    assert db.session.scalar(db.select(db.func.count(Equipment.id))) == 0
+    assert storage.list_project_sheets(1) == []
+    assert not storage.get_project_dir(1).exists()
+    assert list(storage.get_project_dir(1).parent.glob('.deleting-*')) == []
+
+
+def test_failed_project_delete_restores_everything(app, monkeypatch):
+    from backend.src.models.storage import project_sheet_name
+
+    client, storage = _project_with_data(app)
+
+    def fail():
+        raise RuntimeError('disco cheio')
+    monkeypatch.setattr(db.session, 'commit', fail)
+    assert client.delete('/api/projects/1').status_code == 500
+    monkeypatch.undo()
+
+    assert db.session.get(Project, 1) is not None
+    assert len(Equipment.query.filter_by(project_id=1).all()) == 1
+    assert storage.load_sheet_data(project_sheet_name(1, 'pressupostos'))['rows'] == [['Inflação (%)', '12.0']]
+
+
+def test_new_aoa_project_gets_pressupostos_from_templates(app):
+    from backend.src.models.storage import get_storage
+
+    response = app.test_client().post('/api/projects', json={
+        'nome': 'Fazenda', 'primeiroAno': 2025, 'numAnos': 3, 'unidadeMonetaria': 'AOA', 'pin': '1234'
+    })
+    project_id = response.get_json()['project']['id']
+
+    sheet = get_storage().load_sheet_data(f'pressupostos_project_{project_id}')
+    assert sheet['headers'] == ['Parâmetro', '2025 (Inicial)', '2026', '2027', '2028']
+    assert sheet['rows'][0] == ['IVA (%)', '14.0', '14.0', '14.0', '14.0']
+    assert sheet['rows'][-1] == ['Câmbio (USD/AOA)', '850.0', '850.0', '850.0', '850.0']
+
+    default = app.test_client().get('/api/spreadsheet/pressupostos').get_json()
+    assert default['rows'][0] == ['IVA (%)', '14.0', '', '', '', '', '']
+
+
+def test_investment_summary_of_unknown_project_is_404(app):
+    response = app.test_client().get('/api/projects/999/investment-summary')
+    assert response.status_code == 404
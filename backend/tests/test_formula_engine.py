@@ -0,0 +1,101 @@
+"""
+Tests for the incremental formula engine
+"""
+
+import pytest
+from backend.src.services.formula_engine import FormulaEngine, FormulaCycleError
+from backend.src.services.calculations import recalculate_formulas, recalculate_changed
+
+
+def test_update_recomputes_only_downstream_cells():
+    """Test that only cells depending on the change are recomputed"""
+    calls = []
+
+    def add(a, b):
+        calls.append((a, b))
+        return a + b
+
+    engine = FormulaEngine()
+    engine.set_input('a', 1)
+    engine.set_input('b', 2)
+    engine.set_input('x', 10)
+    engine.define('c', add, ['a', 'b'])
+    engine.define('d', add, ['c', 'a'])
+    engine.define('y', add, ['x', 'x'])
+    engine.evaluate_all()
+    calls.clear()
+
+    deltas = engine.update({'b': 5})
+
+    assert deltas == {'c': 6, 'd': 7}
+    assert len(calls) == 2
+
+
+def test_update_reports_only_changed_values():
+    """Test that unchanged formula results are not reported"""
+    engine = FormulaEngine()
+    engine.set_input('a', 2)
+    engine.define('sign', lambda a: a > 0, ['a'])
+    engine.evaluate_all()
+
+    assert engine.update({'a': 3}) == {}
+    assert engine.update({'a': -1}) == {'sign': False}
+
+
+def test_define_rejects_cycles():
+    """Test that circular references are refused"""
+    engine = FormulaEngine()
+    engine.define('b', lambda a: a, ['a'])
+    engine.define('c', lambda b: b, ['b'])
+
+    with pytest.raises(FormulaCycleError):
+        engine.define('a', lambda c: c, ['c'])
+
+
+def test_recalculate_changed_returns_inflation_deltas():
+    """Test that the pressupostos inflation chain is recalculated incrementally"""
+    sheet = {
+        'rows': [
+            ['Índice de Inflação', '1', '', '', ''],
+            ['Taxa de Inflação', '', '2', '2', '2'],
+        ],
+        'version': 1
+    }
+    full = recalculate_formulas(sheet, 'pressupostos')
+    assert recalculate_changed(sheet, 'pressupostos') == full
+
+    # Changing the last year only affects the last index
+    sheet['rows'][1][4] = '5'
+    sheet['version'] = 2
+    assert recalculate_changed(sheet, 'pressupostos', base_version=1) == {'Índice de Inflação-4': '1.0924'}
+
+    # Changing the first year cascades through the chain
+    sheet['rows'][1][2] = '0'
+    sheet['version'] = 3
+    deltas = recalculate_changed(sheet, 'pressupostos', base_version=2)
+    assert set(deltas) == {'Índice de Inflação-2', 'Índice de Inflação-3', 'Índice de Inflação-4'}
+    assert deltas == recalculate_formulas(sheet, 'pressupostos')
+
+
+def test_recalculate_changed_returns_everything_for_other_base_versions():
+    """Test that edits not based on the cached version get every formula value"""
+    sheet = {
+        'rows': [
+            ['Índice de Inflação', '1', '', '', ''],
+            ['Taxa de Inflação', '', '2', '2', '2'],
+        ],
+        'version': 1
+    }
+    recalculate_changed(sheet, 'pressupostos')
+
+    # Another process wrote version 2; this edit was based on it
+    sheet['rows'][1][3] = '4'
+    sheet['rows'][1][4] = '5'
+    sheet['version'] = 3
+    full = recalculate_formulas(sheet, 'pressupostos')
+    assert recalculate_changed(sheet, 'pressupostos', base_version=2) == full
+
+    # Without a base version the client's values are unknown
+    sheet['version'] = 4
+    assert recalculate_changed(sheet, 'pressupostos') == full
+    assert recalculate_changed(sheet, 'pressupostos', base_version=4) == {}
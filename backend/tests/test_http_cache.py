@@ -0,0 +1,98 @@
+"""
+Tests for conditional GET (ETag, If-None-Match, Cache-Control) on the read endpoints
+"""
+
+import pytest
+from backend.config.settings import TestingConfig
+from backend.src import db
+from backend.src.app import create_app, upgrade_database
+from backend.src.models.project import Project
+from backend.src.utils.http_cache import CACHE_CONTROL
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "test.db"}')
+    monkeypatch.setattr(TestingConfig, 'DATA_DIR', str(tmp_path / 'data'))
+    app = create_app('testing')
+    with app.app_context():
+        upgrade_database()
+        db.session.add(Project(id=1, nome='Teste', primeiro_ano=2024, num_anos=5))
+        db.session.commit()
+        yield app
+
+
+def _revalidate(client, url):
+    """GET url, check its caching headers and that its ETag gets a 304; return the ETag"""
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == CACHE_CONTROL
+    etag, weak = response.get_etag()
+    assert etag and not weak
+
+    unchanged = client.get(url, headers={'If-None-Match': f'"{etag}"'})
+    assert unchanged.status_code == 304
+    assert unchanged.data == b''
+    assert unchanged.get_etag() == (etag, False)
+    assert unchanged.headers['Cache-Control'] == CACHE_CONTROL
+    return etag
+
+
+def test_spreadsheet_etag_is_its_version(app):
+    client = app.test_client()
+    assert _revalidate(client, '/api/spreadsheet/vendas') == 'v0'
+
+    client.post('/api/spreadsheet/vendas/save', json={'rows': [['Produto A', '10']]})
+    assert _revalidate(client, '/api/spreadsheet/vendas') == 'v1'
+    stale = client.get('/api/spreadsheet/vendas', headers={'If-None-Match': '"v0"'})
+    assert stale.status_code == 200
+    assert stale.get_json()['rows'] == [['Produto A', '10']]
+
+
+def test_equipment_listing_etag_changes_on_write(app):
+    client = app.test_client()
+    url = '/api/equipment/1/ativos-tangiveis-edificios'
+    first = _revalidate(client, url)
+
+    saved = client.post(f'{url}/bulk', json={'equipment': [
+        {'equipmentName': 'Armazém', 'ano0': '100,00', 'yearValues': {}}
+    ]}).get_json()['equipment'][0]
+    second = _revalidate(client, url)
+    assert second != first
+
+    assert client.put(f'/api/equipment/{saved["id"]}', json={'ano0': '200,00'}).status_code == 200
+    assert _revalidate(client, url) != second
+    # Each page has its own ETag
+    assert _revalidate(client, f'{url}?limit=1') != _revalidate(client, url)
+
+
+def test_project_listing_etag_changes_on_write(app):
+    client = app.test_client()
+    first = _revalidate(client, '/api/projects')
+
+    created = client.post('/api/projects', json={
+        'nome': 'Outro', 'primeiroAno': 2024, 'numAnos': 5, 'unidadeMonetaria': 'EUR', 'pin': '1234'
+    })
+    assert created.status_code == 201
+    second = _revalidate(client, '/api/projects')
+    assert second != first
+
+    # An update changes max(updated_at) only
+    assert client.put('/api/projects/1', json={'nome': 'Teste renomeado'}).status_code == 200
+    third = client.get('/api/projects', headers={'If-None-Match': f'"{second}"'})
+    assert third.status_code == 200
+    assert third.get_etag()[0] != second
+
+
+@pytest.mark.parametrize('resource', ['snapshot', 'investment-summary'])
+def test_project_resource_etag_changes_with_equipment(app, resource):
+    client = app.test_client()
+    url = f'/api/projects/1/{resource}'
+    first = _revalidate(client, url)
+
+    client.post('/api/equipment/1/ativos-tangiveis-edificios/bulk', json={'equipment': [
+        {'equipmentName': 'Armazém', 'ano0': '100,00', 'yearValues': {}}
+    ]})
+    stale = client.get(url, headers={'If-None-Match': f'"{first}"'})
+    assert stale.status_code == 200
+    assert _revalidate(client, url) != first
@@ -0,0 +1,244 @@
+"""
+Tests for the Excel import
+"""
+
+import io
+import threading
+import time
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+from backend.config.settings import TestingConfig
+from backend.src import db
+from backend.src.app import create_app, upgrade_database
+from backend.src.models.equipment import Equipment
+from backend.src.models.project import Project
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "test.db"}')
+    monkeypatch.setattr(TestingConfig, 'DATA_DIR', str(tmp_path / 'data'))
+    monkeypatch.setattr(TestingConfig, 'IMPORT_CHUNK_SIZE', 2)
+    monkeypatch.setattr(TestingConfig, 'IMPORT_PREVIEW_SIZE', 3)
+    monkeypatch.setattr(TestingConfig, 'IMPORT_WORKERS', 1)
+    app = create_app('testing')
+    with app.app_context():
+        upgrade_database()
+        db.session.add(Project(id=1, nome='Teste', primeiro_ano=2024, num_anos=5))
+        db.session.commit()
+        yield app
+
+
+def workbook_file(rows):
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    output = io.BytesIO()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def test_excel_import_is_saved_in_chunks(app):
+    rows = [['Descrição', 'Quantidade', 'Preço Unitário', 'Categoria']]
+    rows += [[f'Item {i}', 2, '100,5', 'Informática'] for i in range(5)]
+    rows.insert(3, [None, None, None, None])
+
+    response = app.test_client().post('/api/import/excel', data={
+        'file': (workbook_file(rows), 'lista.xlsx'),
+        'project_id': '1',
+        'sheet_key': 'ativos-tangiveis-equipamento-basico'
+    }, content_type='multipart/form-data')
+    result = response.get_json()
+
+    assert response.status_code == 200
+    assert result['count'] == 5 and result['saved'] == 5
+    assert result['chunks'] == 3
+    assert 'items' not in result
+    assert [item['description'] for item in result['preview']] == ['Item 0', 'Item 1', 'Item 2']
+    assert result['preview'][0]['lifespan'] == 4
+    assert result['preview'][0]['total_formatted'] == '201,00'
+    assert result['total_value'] == 1005.0
+    assert result['total_formatted'] == '1.005,00'
+    assert result['checkpoint'] == 7
+    assert result['rows_per_second'] > 0
+    assert Equipment.query.filter_by(project_id=1).count() == 5
+
+
+def test_excel_import_reports_rejected_rows_and_resumes(app):
+    rows = [['Descrição', 'Quantidade', 'Preço Unitário']]
+    rows += [[f'Item {i}', 1, 10] for i in range(4)]
+    rows[2][0] = 'x' * 300
+    client = app.test_client()
+
+    result = client.post('/api/import/excel', data={
+        'file': (workbook_file(rows), 'lista.xlsx'),
+        'project_id': '1'
+    }, content_type='multipart/form-data').get_json()
+
+    assert result['saved'] == 3 and result['failed'] == 1
+    assert result['errors'] == [{'row': 3, 'error': 'Descrição com mais de 255 caracteres'}]
+
+    # Resuming after row 3 only imports rows 4 and 5
+    result = client.post('/api/import/excel', data={
+        'file': (workbook_file(rows), 'lista.xlsx'),
+        'project_id': '1',
+        'resume_after': '3'
+    }, content_type='multipart/form-data').get_json()
+
+    assert result['saved'] == 2 and result['skipped'] == 2
+    assert Equipment.query.filter_by(project_id=1).count() == 5
+
+
+def test_excel_import_rejects_files_without_rows(app):
+    response = app.test_client().post('/api/import/excel', data={
+        'file': (workbook_file([['Descrição', 'Quantidade']]), 'vazio.xlsx')
+    }, content_type='multipart/form-data')
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'O arquivo está vazio'
+
+
+def test_row_by_row_fallback_advances_the_checkpoint(app, monkeypatch):
+    from backend.src.services.import_service import ImportReport, insert_items
+    items = pd.DataFrame({
+        'description': ['Item 2', None, 'Item 4', 'Item 5'],
+        'total': [10.0, 20.0, 30.0, 40.0]
+    }, index=[2, 3, 4, 5])
+    report = ImportReport()
+    commit = db.session.commit
+    commits = []
+
+    def commit_then_crash():
+        commits.append(1)
+        if len(commits) == 2:
+            raise RuntimeError('worker stopped')
+        commit()
+
+    # The bulk INSERT fails on the missing name, then the worker stops during the retries
+    monkeypatch.setattr(db.session, 'commit', commit_then_crash)
+    with pytest.raises(RuntimeError):
+        insert_items(items, 1, 'equipamento', report)
+
+    assert report.checkpoint == 3
+    assert report.failed == 1 and report.errors[0]['row'] == 3
+    db.session.rollback()
+    assert [eq.equipment_name for eq in Equipment.query.filter_by(project_id=1)] == ['Item 2']
+
+
+def wait_for_job(client, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f'/api/import/jobs/{job_id}').get_json()['job']
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'Import job {job_id} did not finish')
+
+
+def test_background_import_job(app):
+    rows = [['Descrição', 'Quantidade', 'Preço Unitário']] + [[f'Item {i}', 1, 10] for i in range(5)]
+    client = app.test_client()
+
+    response = client.post('/api/import/jobs', data={
+        'file': (workbook_file(rows), 'lista.xlsx'),
+        'project_id': '1'
+    }, content_type='multipart/form-data')
+    assert response.status_code == 202
+
+    job = wait_for_job(client, response.get_json()['job']['id'])
+    assert job['status'] == 'done'
+    assert job['progress']['total_rows'] == 5 and job['progress']['percent'] == 100.0
+    assert job['result']['saved'] == 5
+    assert Equipment.query.filter_by(project_id=1).count() == 5
+    assert client.get('/api/import/jobs/unknown').status_code == 404
+
+
+def test_import_jobs_are_limited_per_project(app):
+    rows = [['Descrição'], ['Item']]
+    client = app.test_client()
+    queue = app.extensions['import_jobs']
+    release = threading.Event()
+    # Keep the only worker busy so the jobs stay queued
+    queue._executor.submit(release.wait, 10)
+
+    def submit():
+        return client.post('/api/import/jobs', data={
+            'file': (workbook_file(rows), 'lista.xlsx'),
+            'project_id': '1'
+        }, content_type='multipart/form-data')
+
+    try:
+        first = submit()
+        assert first.status_code == 202
+        assert submit().status_code == 429
+    finally:
+        release.set()
+
+    assert wait_for_job(client, first.get_json()['job']['id'])['status'] == 'done'
+    third = submit()
+    assert third.status_code == 202
+    wait_for_job(client, third.get_json()['job']['id'])
+
+
+def test_csv_import_is_detected_by_content(app):
+    text = 'Descrição;Quantidade;Preço Unitário;Categoria\n'
+    text += 'Secretária;2;1.234,50;Mobiliário\n\nPortátil;1;250000;Informática\n'
+
+    response = app.test_client().post('/api/import/excel', data={
+        'file': (io.BytesIO(text.encode('cp1252')), 'export.txt'),
+        'project_id': '1'
+    }, content_type='multipart/form-data')
+    result = response.get_json()
+
+    assert response.status_code == 200
+    assert result['saved'] == 2
+    assert [item['description'] for item in result['preview']] == ['Secretária', 'Portátil']
+    assert result['total_value'] == 252469.0
+    assert result['checkpoint'] == 4
+
+
+def test_csv_numbers_use_one_locale_per_column(app):
+    client = app.test_client()
+
+    def post(text, **form):
+        return client.post('/api/import/excel', data={
+            'file': (io.BytesIO(text.encode('utf-8')), 'lista.csv'), **form
+        }, content_type='multipart/form-data')
+
+    # "1.500" fits both locales: the pt-AO default reads it as 1500
+    text = 'Descrição;Quantidade;Preço Unitário\nMesa;1;1.500\nCadeira;2;2.000\n'
+    assert post(text).get_json()['total_value'] == 5500.0
+    assert post(text, locale='en').get_json()['total_value'] == 5.5
+
+    # The first chunk ("1.5", "2.25") shows the column uses decimal points,
+    # so "1.500" in the next chunk is read as 1.5 too
+    text = 'Descrição,Preço Unitário\nA,1.5\nB,2.25\nC,1.500\n'
+    assert post(text).get_json()['total_value'] == 5.25
+
+    assert post(text, locale='fr').status_code == 400
+
+
+def test_parquet_import(app):
+    pytest.importorskip('pyarrow')
+    df = pd.DataFrame({'Produto': ['A', 'B', 'C'], 'Qtd': [1, 2, 3], 'Custo': [10.0, 20.0, 30.0]})
+    output = io.BytesIO()
+    df.to_parquet(output)
+    output.seek(0)
+
+    result = app.test_client().post('/api/import/excel', data={
+        'file': (output, 'dump.parquet'),
+        'project_id': '1'
+    }, content_type='multipart/form-data').get_json()
+
+    assert result['saved'] == 3
+    assert result['total_value'] == 140.0
+
+
+def test_unknown_binary_files_are_rejected(app):
+    response = app.test_client().post('/api/import/excel', data={
+        'file': (io.BytesIO(b'\x89PNG\r\n\x1a\n\x00\x00'), 'lista.xlsx')
+    }, content_type='multipart/form-data')
+
+    assert response.status_code == 400
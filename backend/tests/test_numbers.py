@@ -0,0 +1,85 @@
+"""
+Tests for locale-aware number parsing and formatting
+"""
+
+import math
+import numpy as np
+import pytest
+from backend.src.utils.numbers import format_number, format_numbers, parse_number, parse_numbers
+from backend.src.utils.parsers import parse_value
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('1.234,56', 1234.56),
+    ('1,234.56', 1234.56),
+    ('1234.56', 1234.56),
+    ('1,5', 1.5),
+    ('1.234.567', 1234567.0),
+    ('1,234,567', 1234567.0),
+    ('1 234,56', 1234.56),
+    ('€ 1.000,00', 1000.0),
+    ('2.500,00 Kz', 2500.0),
+    ('15%', 15.0),
+    ('-12,5', -12.5),
+])
+def test_parse_number_infers_separators(text, expected):
+    assert parse_number(text) == pytest.approx(expected)
+
+
+def test_parse_number_with_explicit_locale():
+    assert parse_number('1.234', 'pt-AO') == 1234.0
+    assert parse_number('1.500', 'pt-AO') == 1500.0
+    assert parse_number('1.500 Kz', 'pt-PT') == 1500.0
+    assert parse_number('1.500', 'en') == 1.5
+    assert parse_number('1.500') == 1.5
+    assert parse_number('1234.56', 'pt-AO') == 1234.56  # not a valid grouping
+    assert parse_number('12.345,6', 'pt-PT') == 12345.6
+    assert parse_number('12,345.6', 'en') == 12345.6
+    assert parse_number('1.234.567,891', 'pt-AO') is None
+    assert parse_number('1,234,567.891', 'en') is None
+
+
+def test_parse_number_rejects_the_other_convention():
+    assert parse_number('1,234.56', 'pt-AO') is None
+    assert parse_number('1,234.56 Kz', 'pt-PT') is None
+    assert parse_number('1.234,56', 'en') is None
+    assert parse_number('$ 1.234,56', 'en') is None
+    # Without a locale both are read the way they are written
+    assert parse_number('1,234.56') == 1234.56
+    assert parse_number('1.234,56') == 1234.56
+    assert parse_number('abc') is None
+    assert parse_number('') is None
+    assert parse_number('inf') is None
+    with pytest.raises(ValueError):
+        parse_number('1,5', 'fr')
+
+
+def test_parse_value_reads_portuguese_numbers():
+    # Commas used to be stripped before becoming decimal points
+    assert parse_value('1.234,56') == 1234.56
+    assert parse_value('2,50%') == 2.5
+    assert parse_value('€1,234.56') == 1234.56
+    assert parse_value('x') == 0.0
+    assert parse_value(3) == 3.0
+
+
+def test_parse_numbers_returns_arrays():
+    np.testing.assert_array_equal(parse_numbers([1, 2.5, 3]), np.array([1.0, 2.5, 3.0]))
+    parsed = parse_numbers(['1.000,00', '', '2,5', None], default=0.0)
+    np.testing.assert_array_equal(parsed, np.array([1000.0, 0.0, 2.5, 0.0]))
+    assert math.isnan(parse_numbers(['n/a'])[0])
+
+
+def test_format_number_per_locale():
+    assert format_number(1234567.891) == '1.234.567,89'
+    assert format_number(-1234.5, 1, 'pt-PT') == '-1.234,5'
+    assert format_number(1234.5, 2, 'en') == '1,234.50'
+    assert format_number(1234.5, 2, 'pt-AO', grouping=False) == '1234,50'
+
+
+@pytest.mark.parametrize('locale', ['pt-AO', 'en'])
+def test_format_numbers_matches_format_number(locale):
+    values = [0, 12, -1234.5, 999.995, 1234567.891, -0.004]
+    for decimals, grouping in [(2, True), (0, True), (2, False)]:
+        expected = [format_number(value, decimals, locale, grouping) for value in values]
+        assert list(format_numbers(values, decimals, locale, grouping)) == expected
@@ -0,0 +1,110 @@
+"""
+Tests for the SQL sheet store (SHEET_STORE=sql)
+"""
+
+import pytest
+from backend.config.settings import TestingConfig
+from backend.src.app import create_app, upgrade_database
+from backend.src.models.sheet import SqlSheetStore
+from backend.src.models.storage import DataStorage, SheetVersionConflict, get_storage, project_sheet_name
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "test.db"}')
+    monkeypatch.setattr(TestingConfig, 'DATA_DIR', str(tmp_path / 'data'))
+    monkeypatch.setattr(TestingConfig, 'SHEET_STORE', 'sql')
+    app = create_app('testing')
+    with app.app_context():
+        upgrade_database()
+        yield app
+
+
+def test_sql_store_is_selected(app):
+    assert isinstance(get_storage(), SqlSheetStore)
+
+
+def test_update_cell_appends_rows_and_pads_new_columns(app):
+    storage = get_storage()
+    storage.save_sheet_data('vendas', {'rows': [['Produto A', '10', '20']]})
+
+    # New row: built like apply_cell_edit builds it in the JSON store
+    data = storage.update_cell('vendas', 'Produto B', 3, '5')
+    assert data['rows'][1] == ['Produto B', '', '', '', '5']
+
+    # Existing row, column past its end: UPSERT of a new cell
+    data = storage.update_cell('vendas', 'Produto A', 5, '7')
+    assert data['rows'][0] == ['Produto A', '10', '20', '', '', '7']
+
+    # Existing cell: UPSERT of the same cell
+    data = storage.update_cell('vendas', 'Produto A', 1, '11')
+    assert data['rows'][0] == ['Produto A', '11', '20', '', '', '7']
+    assert data['version'] == 4
+
+
+def test_round_trip_matches_json_store(app, tmp_path):
+    sheet = {
+        'headers': ['Produto', '2024', '2025'],
+        'rows': [['Produto A', '1.000,50', '2'], ['Produto B', '', 3.5], ['Total', '=B1+B2', '']]
+    }
+    edits = [
+        {'row_name': 'Produto B', 'column_index': 4, 'value': '9'},
+        {'row_name': 'Produto C', 'column_index': 2, 'value': '1'}
+    ]
+    json_storage = DataStorage(str(tmp_path / 'json'), flush_interval=0)
+    sql_storage = get_storage()
+
+    for storage in (json_storage, sql_storage):
+        storage.save_sheet_data('vendas', dict(sheet))
+        storage.update_cells('vendas', edits)
+
+    assert sql_storage.load_sheet_data('vendas') == json_storage.load_sheet_data('vendas')
+    assert sql_storage.load_sheet_values('vendas') == json_storage.load_sheet_values('vendas')
+
+    # A full save replaces the rows instead of merging them
+    sql_storage.save_sheet_data('vendas', {'rows': [['Produto Z', '1']]})
+    json_storage.save_sheet_data('vendas', {'rows': [['Produto Z', '1']]})
+    assert sql_storage.load_sheet_data('vendas') == json_storage.load_sheet_data('vendas')
+    assert sql_storage.load_sheet_data('vendas')['rows'] == [['Produto Z', '1']]
+
+
+def test_stale_versions_are_rejected(app):
+    storage = get_storage()
+    assert storage.save_sheet_data('vendas', {'rows': [['Produto A', '10']]}) == 1
+    assert storage.update_cell('vendas', 'Produto A', 1, '20', expected_version=1)['version'] == 2
+
+    with pytest.raises(SheetVersionConflict) as conflict:
+        storage.update_cell('vendas', 'Produto A', 1, '30', expected_version=1)
+    assert conflict.value.current_version == 2
+    with pytest.raises(SheetVersionConflict):
+        storage.save_sheet_data('vendas', {'rows': []}, expected_version=1)
+    assert storage.load_sheet_data('vendas')['rows'] == [['Produto A', '20']]
+
+    client = app.test_client()
+    response = client.post('/api/spreadsheet/update', json={
+        'sheet': 'vendas', 'row_name': 'Produto A', 'column_index': 1, 'value': '30'
+    }, headers={'If-Match': '"v1"'})
+    assert response.status_code == 409
+
+    response = client.post('/api/spreadsheet/vendas/save', json={'rows': []}, headers={'If-Match': '"v1"'})
+    assert response.status_code == 409
+    assert storage.load_sheet_data('vendas')['rows'] == [['Produto A', '20']]
+
+
+def test_migration_script_copies_project_sheets(app, tmp_path):
+    from backend.scripts.migrate_sheets_to_db import migrate_sheets
+    json_storage = DataStorage(str(tmp_path / 'json'), flush_interval=3600)
+    json_storage.save_sheet_data('pressupostos', {'rows': [['2024', '1']]})
+    project_sheet = project_sheet_name(7, 'vendas')
+    json_storage.save_sheet_data(project_sheet, {'rows': [['Produto A', '10']]})
+    # Journaled edit, not compacted into the sheet file yet
+    json_storage.update_cell(project_sheet, 'Produto A', 1, '20')
+    assert (tmp_path / 'json' / 'projects' / '7' / 'vendas.json').exists()
+
+    recovered = DataStorage(str(tmp_path / 'json'), flush_interval=0)
+    assert migrate_sheets(recovered, get_storage()) == (2, 2)
+
+    storage = get_storage()
+    assert storage.list_project_sheets(7) == [project_sheet]
+    assert storage.load_sheet_data(project_sheet)['rows'] == [['Produto A', '20']]
+    assert storage.load_sheet_data('pressupostos')['rows'] == [['2024', '1']]
@@ -0,0 +1,228 @@
+"""
+Tests for sheet data storage
+"""
+
+import json
+from backend.src.models.storage import DataStorage, project_sheet_name
+
+
+def test_update_cell_is_journaled_until_flush(tmp_path):
+    """Test that cell edits land in the journal before the sheet file"""
+    storage = DataStorage(str(tmp_path), flush_interval=3600, journal_max_entries=100)
+    storage.save_sheet_data('pressupostos', {'rows': [['Taxa de Inflação', '', '2.0']]})
+
+    storage.update_cell('pressupostos', 'Taxa de Inflação', 2, '3.0')
+
+    # Sheet file is untouched, the edit is in the journal and in memory
+    with open(storage.get_data_file('pressupostos'), encoding='utf-8') as f:
+        assert json.load(f)['rows'][0][2] == '2.0'
+    assert storage.get_journal_file('pressupostos').exists()
+    assert storage.load_sheet_data('pressupostos')['rows'][0][2] == '3.0'
+
+    storage.flush()
+
+    with open(storage.get_data_file('pressupostos'), encoding='utf-8') as f:
+        assert json.load(f)['rows'][0][2] == '3.0'
+    assert not storage.get_journal_file('pressupostos').exists()
+
+
+def test_journal_compacts_at_size_threshold(tmp_path):
+    """Test that reaching journal_max_entries compacts the journal"""
+    storage = DataStorage(str(tmp_path), flush_interval=3600, journal_max_entries=2)
+
+    storage.update_cell('vendas', 'Produto A', 1, '10')
+    assert storage.pending_sheets() == ['vendas']
+
+    storage.update_cell('vendas', 'Produto A', 2, '20')
+    assert storage.pending_sheets() == []
+    assert not storage.get_journal_file('vendas').exists()
+
+
+def test_journal_replayed_after_crash(tmp_path):
+    """Test that a leftover journal is replayed on load"""
+    storage = DataStorage(str(tmp_path), flush_interval=3600, journal_max_entries=100)
+    storage.save_sheet_data('pressupostos', {'rows': [['Inflação (%)', '15.0']]})
+    storage.update_cell('pressupostos', 'Inflação (%)', 1, '12.0')
+    storage.update_cell('pressupostos', 'Câmbio (USD/AOA)', 1, '900.0')
+
+    # A new instance simulates a restart without the pending edits being flushed
+    recovered = DataStorage(str(tmp_path), flush_interval=3600)
+    rows = recovered.load_sheet_data('pressupostos')['rows']
+
+    assert rows[0] == ['Inflação (%)', '12.0']
+    assert rows[1][0] == 'Câmbio (USD/AOA)'
+    assert '900.0' in rows[1]
+
+
+def test_load_returns_copy(tmp_path):
+    """Test that callers cannot modify stored state through loaded data"""
+    storage = DataStorage(str(tmp_path), flush_interval=3600)
+    storage.save_sheet_data('pressupostos', {'rows': [['IVA (%)', '']]})
+    storage.update_cell('pressupostos', 'IVA (%)', 1, '14.0')
+
+    data = storage.load_sheet_data('pressupostos')
+    data['rows'][0][1] = 'corrupted'
+
+    assert storage.load_sheet_data('pressupostos')['rows'][0][1] == '14.0'
+
+
+def test_cache_hits_until_file_changes(tmp_path):
+    """Test that parsed sheets are cached and revalidated by file signature"""
+    storage = DataStorage(str(tmp_path), flush_interval=3600, cache_size=4)
+    storage.save_sheet_data('vendas', {'rows': [['Produto A', '10']]})
+    # Saving read the (missing) file once to get the current version
+    misses = storage.cache_stats()['misses']
+
+    storage.load_sheet_data('vendas')
+    storage.load_sheet_data('vendas')
+    assert storage.cache_stats()['hits'] == 2
+    assert storage.cache_stats()['misses'] == misses
+
+    # Another writer replaces the file behind the cache's back
+    with open(storage.get_data_file('vendas'), 'w', encoding='utf-8') as f:
+        json.dump({'rows': [['Produto A', '99', 'changed']]}, f)
+
+    assert storage.load_sheet_data('vendas')['rows'][0][1] == '99'
+    assert storage.cache_stats()['misses'] == misses + 1
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Test that the cache stays within its bound"""
+    storage = DataStorage(str(tmp_path), flush_interval=3600, cache_size=2)
+    for name in ('a', 'b', 'c'):
+        storage.save_sheet_data(name, {'rows': []})
+
+    stats = storage.cache_stats()
+    assert stats['size'] == 2
+    assert stats['evictions'] == 1
+
+
+def test_update_cells_applies_batch_in_one_journal_write(tmp_path):
+    """Test that a batch of edits is journaled together"""
+    storage = DataStorage(str(tmp_path), flush_interval=3600, journal_max_entries=100)
+    storage.save_sheet_data('pressupostos', {'rows': [['Taxa de Inflação', '', '', '']]})
+
+    data = storage.update_cells('pressupostos', [
+        {'row_name': 'Taxa de Inflação', 'column_index': 2, 'value': '2.0'},
+        {'row_name': 'Taxa de Inflação', 'column_index': 3, 'value': '3.0'},
+    ])
+
+    assert data['rows'][0] == ['Taxa de Inflação', '', '2.0', '3.0']
+    with open(storage.get_journal_file('pressupostos'), encoding='utf-8') as f:
+        assert len(f.readlines()) == 2
+
+
+def test_project_sheets_are_sharded_with_manifest(tmp_path):
+    """Test that project sheets live in their own directory with a manifest"""
+    storage = DataStorage(str(tmp_path), flush_interval=3600)
+    storage.save_sheet_data(project_sheet_name(7, 'pressupostos'), {'rows': [['IVA (%)', '14.0']]})
+    storage.save_sheet_data(project_sheet_name(7, 'pressupostos'), {'rows': [['IVA (%)', '16.0']]})
+    storage.update_cell(project_sheet_name(7, 'rendimentos'), 'Vendas', 1, '100')
+
+    assert storage.get_data_file('pressupostos_project_7') == tmp_path / 'projects' / '7' / 'pressupostos.json'
+    assert storage.load_project_manifest(7)['sheets']['pressupostos']['version'] == 2
+    assert storage.list_project_sheets(7) == ['pressupostos_project_7', 'rendimentos_project_7']
+
+    assert storage.copy_project_data(7, 8) == ['pressupostos_project_8', 'rendimentos_project_8']
+    assert storage.load_sheet_data('rendimentos_project_8')['rows'][0][0] == 'Vendas'
+
+    assert storage.delete_project_data(7) == ['pressupostos_project_7', 'rendimentos_project_7']
+    assert not (tmp_path / 'projects' / '7').exists()
+    assert storage.load_sheet_data('pressupostos_project_7') == {}
+    assert storage.load_sheet_values('pressupostos_project_7')['rows'] == []
+    # Reading a missing sheet doesn't bring its directory back
+    assert not (tmp_path / 'projects' / '7').exists()
+
+
+def test_save_sheets_writes_the_manifest_once(tmp_path, monkeypatch):
+    """Test that a batched save writes every sheet and one manifest per project"""
+    storage = DataStorage(str(tmp_path), flush_interval=3600)
+    storage.save_sheet_data(project_sheet_name(3, 'pressupostos'), {'rows': [['IVA (%)', '14.0']]})
+    manifest_writes = []
+    write_manifest = storage._write_manifest
+    monkeypatch.setattr(storage, '_write_manifest',
+                        lambda project_id, manifest: manifest_writes.append(project_id) or
+                        write_manifest(project_id, manifest))
+
+    versions = storage.save_sheets({
+        project_sheet_name(3, 'pressupostos'): {'rows': [['IVA (%)', '16.0']]},
+        project_sheet_name(3, 'rendimentos'): {'rows': [['Vendas', '100']]},
+    })
+
+    assert versions == {'pressupostos_project_3': 2, 'rendimentos_project_3': 1}
+    assert manifest_writes == [3]
+    assert sorted(storage.load_project_manifest(3)['sheets']) == ['pressupostos', 'rendimentos']
+    assert storage.load_sheet_data('pressupostos_project_3')['rows'] == [['IVA (%)', '16.0']]
+
+
+def test_binary_codec_round_trips_cells():
+    from backend.src.models.sheet_codec import decode_sheet, encode_sheet
+    data = {'title': 'Plano', 'rows': [['Taxa', '1.234,56', '15.0', '2000,00', '', 'abc', 3, 2.5, None]]}
+
+    assert decode_sheet(encode_sheet(data)) == data
+    assert decode_sheet(encode_sheet(data), numeric=True)['rows'][0][:4] == ['Taxa', 1234.56, 15.0, 2000.0]
+
+
+def test_binary_format_is_read_transparently(tmp_path):
+    binary = DataStorage(str(tmp_path), flush_interval=0, sheet_format='binary')
+    binary.save_sheet_data('pressupostos', {'rows': [['2024', '1,5']]})
+    assert (tmp_path / 'pressupostos.vbs').exists()
+
+    storage = DataStorage(str(tmp_path), flush_interval=0)
+    assert storage.load_sheet_data('pressupostos') == {'rows': [['2024', '1,5']], 'version': 1}
+    assert storage.load_sheet_values('pressupostos') == {'rows': [['2024', 1.5]], 'version': 1}
+
+    storage.save_sheet_data('pressupostos', {'rows': [['2024', '2,5']]})
+    assert (tmp_path / 'pressupostos.json').exists()
+    assert not (tmp_path / 'pressupostos.vbs').exists()
+
+
+def test_versions_reject_stale_writes(tmp_path):
+    from backend.src.models.storage import SheetVersionConflict
+    storage = DataStorage(str(tmp_path), flush_interval=3600)
+    assert storage.save_sheet_data('vendas', {'rows': [['Produto A', '10']]}) == 1
+
+    updated = storage.update_cell('vendas', 'Produto A', 1, '20', expected_version=1)
+    assert updated['version'] == 2
+
+    try:
+        storage.update_cell('vendas', 'Produto A', 1, '30', expected_version=1)
+        assert False, 'stale edit was applied'
+    except SheetVersionConflict as e:
+        assert e.current_version == 2
+    assert storage.load_sheet_data('vendas')['rows'][0][1] == '20'
+
+    # The version survives a crash through the journal
+    recovered = DataStorage(str(tmp_path), flush_interval=3600)
+    assert recovered.load_sheet_data('vendas')['version'] == 2
+
+
+def test_concurrent_edits_are_not_lost(tmp_path):
+    import threading
+    storage = DataStorage(str(tmp_path), flush_interval=0)
+    storage.save_sheet_data('vendas', {'rows': []})
+
+    def edit(column_index):
+        for i in range(10):
+            storage.update_cell('vendas', f'Produto {column_index}', column_index, str(i))
+
+    threads = [threading.Thread(target=edit, args=(idx,)) for idx in range(1, 5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    data = DataStorage(str(tmp_path), flush_interval=0).load_sheet_data('vendas')
+    assert data['version'] == 41
+    assert sorted(row[0] for row in data['rows']) == [f'Produto {idx}' for idx in range(1, 5)]
+
+
+def test_idle_sheet_locks_are_dropped(tmp_path):
+    storage = DataStorage(str(tmp_path), flush_interval=0)
+    for idx in range(50):
+        storage.save_sheet_data(f'vendas_{idx}', {'rows': []})
+        storage.load_sheet_data(f'vendas_{idx}')
+    assert len(storage._sheet_locks._locks) == 0
+    assert not (tmp_path / 'missing.lock').exists()
+    storage.load_sheet_data('missing')
+    assert not (tmp_path / 'missing.lock').exists()
@@ -43,6 +43,9 @@ setup(
             "flake8>=6.0.0",
             "mypy>=1.0.0",
         ],
+        "parquet": [
+            "pyarrow>=14.0",
+        ],
     },
     entry_points={
         "console_scripts": [